@@ -1,6 +1,8 @@
 import streamlit as st
 import os
-from components.db_utils import init_db, get_connection
+from components.db_utils import init_db, get_connection, DB_FILE
+from components.backup import start_backup_scheduler
+from components.analytics_db import start_analytics_refresher
 
 # 页面配置
 st.set_page_config(
@@ -40,7 +42,7 @@ footer {
 """, unsafe_allow_html=True)
 
 # 检查数据库文件是否存在
-db_exists = os.path.exists('project_manager.db')
+db_exists = os.path.exists(DB_FILE)
 
 # 如果数据库不存在，显示错误信息
 if not db_exists:
@@ -68,6 +70,10 @@ if not db_exists:
 # 初始化数据库
 init_db()
 
+# 启动自动备份（每个进程只启动一次）
+start_backup_scheduler()
+start_analytics_refresher()
+
 # 检查数据是否存在
 conn = get_connection()
 cursor = conn.cursor()
@@ -0,0 +1,456 @@
+"""
+性能基准测试
+
+按不同数据规模生成模拟数据库，通过 Streamlit AppTest 实际运行各页面，
+统计人员管理、关联查询各标签页、高级搜索、全局搜索、统计分析各标签页
+（含人员关联网络构建）的耗时 p50/p95 与峰值内存，结果写入 JSON 报告。
+
+用法:
+    python benchmarks/run_benchmarks.py                       # 1千、10万、100万人员三档
+    python benchmarks/run_benchmarks.py --scales 1000 --repeat 3
+    python benchmarks/run_benchmarks.py --scenarios stats_person collaboration_graph
+    python benchmarks/run_benchmarks.py --profile production     # 偏斜分布（高产作者、超大部门等）
+
+每个场景在独立子进程中运行，超时后终止该进程并记录已完成的测量。
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import sqlite3
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(ROOT, 'benchmarks')
+
+# 各表数据量相对人员数的比例，与 generate_data.DEFAULT_COUNTS 中 20/15/15/30/25 的比例一致
+TABLE_RATIOS = {
+    'project': 0.75,
+    'standard': 0.75,
+    'patent': 1.5,
+    'paper': 1.25,
+}
+
+DEFAULT_SCALES = [1000, 100000, 1000000]
+
+# 高级搜索使用的关键词（不少于3个字符，走全文索引）
+SEARCH_KEYWORDS = {
+    'person': '研发部',
+    'project': '白酒研究',
+    'standard': '白酒',
+    'patent': '一种白酒',
+    'paper': '白酒酿造',
+}
+
+ENTITY_TAB_LABELS = {
+    'person': ('按人员查询', '人员搜索'),
+    'project': ('按项目查询', '项目搜索'),
+    'standard': ('按标准查询', '标准搜索'),
+    'patent': ('按专利查询', '专利搜索'),
+    'paper': ('按论文查询', '论文搜索'),
+}
+
+STATS_TABS = {
+    'stats_person': '人员统计',
+    'stats_project': '项目统计',
+    'stats_standard': '标准统计',
+    'stats_patent': '专利统计',
+    'stats_paper': '论文统计',
+    'collaboration_graph': '人员关联网络',
+    'stats_custom': '自定义图表',
+}
+
+def _page_path(prefix):
+    # 页面文件名包含图标，按序号前缀查找
+    return glob.glob(os.path.join(ROOT, 'pages', f'{prefix}_*.py'))[0]
+
+# ---------------------------------------------------------------------------
+# 生成测试数据库
+# ---------------------------------------------------------------------------
+
+def generate_database(person_count, seed, workers, profile):
+    """
+    使用 generate_data 生成指定规模的数据库，其他表按比例缩放
+
+    数据库路径由环境变量 PROJECT_MANAGER_DB 指定，需在导入 generate_data 之前设置
+    """
+    import generate_data
+
+    counts = {'person': person_count}
+    counts.update({table: int(person_count * ratio) for table, ratio in TABLE_RATIOS.items()})
+    generate_data.generate_database(generate_data.DB_FILE, counts, seed=seed, workers=workers,
+                                    profile=generate_data.resolve_profile(profile))
+
+# ---------------------------------------------------------------------------
+# 场景执行（在子进程中运行）
+# ---------------------------------------------------------------------------
+
+# 当前运行中各标签页的耗时，以及测量目标标签页
+_tab_state = {'sections': {}, 'target': None, 'stop': False, 'traced_peak': None}
+
+class _TimedTab:
+    """包装 st.tabs 返回的标签页容器，记录 with 块内代码的执行耗时"""
+
+    def __init__(self, tab, label):
+        self._tab = tab
+        self._label = label
+        self._start = None
+
+    def __enter__(self):
+        if _tab_state['stop']:
+            # 目标标签页已测量完成，后续标签页不再执行
+            import streamlit as st
+            st.stop()
+        self._start = time.perf_counter()
+        return self._tab.__enter__()
+
+    def __exit__(self, *exc_info):
+        result = self._tab.__exit__(*exc_info)
+        _tab_state['sections'][self._label] = (time.perf_counter() - self._start) * 1000
+        if self._label == _tab_state['target']:
+            _tab_state['stop'] = True
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self._tab, name)
+
+def _install_tab_timer():
+    import streamlit as st
+    original_tabs = st.tabs
+
+    def timed_tabs(tabs, *args, **kwargs):
+        containers = original_tabs(tabs, *args, **kwargs)
+        return [_TimedTab(container, label) for container, label in zip(containers, tabs)]
+
+    st.tabs = timed_tabs
+
+def _install_function_timer(module_name, function_name):
+    # 包装页面调用的组件函数，记录其执行耗时（不含 AppTest 解析输出的开销）
+    import importlib
+    module = importlib.import_module(module_name)
+    original = getattr(module, function_name)
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            _tab_state['sections'][function_name] = (time.perf_counter() - start) * 1000
+
+    setattr(module, function_name, timed)
+
+def _run(at, target=None):
+    """
+    运行一次脚本并返回耗时（毫秒）
+
+    参数:
+    - at: AppTest 实例
+    - target: 目标标签页或组件函数名称，为None时返回整个脚本的耗时
+    """
+    _tab_state.update(sections={}, target=target, stop=False)
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if tracemalloc.is_tracing():
+        _tab_state['traced_peak'] = tracemalloc.get_traced_memory()[1]
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    if target is None:
+        return elapsed
+    if target not in _tab_state['sections']:
+        raise RuntimeError(f"标签页未执行: {target}")
+    return _tab_state['sections'][target]
+
+def _find_button(at, label=None, key_prefix=None, index=0):
+    matches = [button for button in at.button
+               if (label is None or button.label == label)
+               and (key_prefix is None or (button.key or '').startswith(key_prefix))]
+    if len(matches) <= index:
+        raise RuntimeError(f"未找到按钮: {label or key_prefix}")
+    return matches[index]
+
+def _scenario_person_list(app):
+    return _run(app(_page_path(1)), 'person_management')
+
+def _scenario_person_detail(app):
+    at = app(_page_path(1))
+    _run(at)
+    _find_button(at, label="查看详细信息").click()
+    return _run(at, 'person_management')
+
+def _scenario_query(entity_type):
+    index = list(ENTITY_TAB_LABELS).index(entity_type)
+    tab_label = ENTITY_TAB_LABELS[entity_type][0]
+
+    def scenario(app):
+        at = app(_page_path(7))
+        _run(at)
+        # 选中全部关联信息后查询
+        multiselect = at.multiselect[index]
+        multiselect.set_value(multiselect.options)
+        _find_button(at, label="查询", index=index).click()
+        return _run(at, tab_label)
+    return scenario
+
+def _scenario_advanced_search(entity_type, next_page=False):
+    tab_label = ENTITY_TAB_LABELS[entity_type][1]
+
+    def scenario(app):
+        at = app(_page_path(8))
+        _run(at)
+        at.text_input(key=f"keyword_{entity_type}").input(SEARCH_KEYWORDS[entity_type])
+        at.button(key=f"advanced_search_{entity_type}").click()
+        elapsed = _run(at, tab_label)
+        if next_page:
+            _find_button(at, key_prefix=f"next_page_{entity_type}_").click()
+            elapsed = _run(at, tab_label)
+        return elapsed
+    return scenario
+
+def _scenario_global_search(keyword):
+    def scenario(app):
+        at = app(_page_path(8))
+        _run(at)
+        at.text_input(key="global_search_keyword").input(keyword)
+        at.button(key="global_search_button").click()
+        return _run(at, "全局搜索")
+    return scenario
+
+def _scenario_stats(tab_label):
+    def scenario(app):
+        return _run(app(_page_path(6)), tab_label)
+    return scenario
+
+SCENARIOS = {
+    'person_list': _scenario_person_list,
+    'person_detail': _scenario_person_detail,
+}
+for _entity in ENTITY_TAB_LABELS:
+    SCENARIOS[f'query_{_entity}'] = _scenario_query(_entity)
+for _entity in ENTITY_TAB_LABELS:
+    SCENARIOS[f'advanced_search_{_entity}'] = _scenario_advanced_search(_entity)
+    SCENARIOS[f'advanced_search_{_entity}_next_page'] = _scenario_advanced_search(_entity, next_page=True)
+# 长关键词走全文索引，短关键词回退到LIKE匹配
+SCENARIOS['global_search'] = _scenario_global_search('白酒酿造')
+SCENARIOS['global_search_short'] = _scenario_global_search('酒')
+for _name, _label in STATS_TABS.items():
+    SCENARIOS[_name] = _scenario_stats(_label)
+
+def _rss_mb():
+    # Linux 下 ru_maxrss 单位为KB，macOS 下为字节
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _emit(record):
+    print(json.dumps(record, ensure_ascii=False), flush=True)
+
+def run_scenario(name, repeat, warmup, timeout):
+    """
+    在当前进程中运行一个场景，每次测量结果以一行JSON输出到标准输出
+
+    耗时测量不开启 tracemalloc（其开销会放大耗时），最后额外运行一次并统计
+    被测那次脚本运行的Python内存峰值；进程RSS峰值还包含SQLite页缓存等非Python内存
+    """
+    import warnings
+    warnings.filterwarnings('ignore')
+    from streamlit.testing.v1 import AppTest
+
+    _install_tab_timer()
+    _install_function_timer('components.person', 'person_management')
+    scenario = SCENARIOS[name]
+
+    def app(path):
+        return AppTest.from_file(path, default_timeout=timeout)
+
+    for i in range(warmup + repeat):
+        try:
+            elapsed = scenario(app)
+        except Exception as e:
+            _emit({'error': str(e)[:500]})
+            return
+        _emit({'ms': elapsed, 'warmup': i < warmup, 'peak_rss_mb': _rss_mb()})
+
+    tracemalloc.start()
+    try:
+        scenario(app)
+    except Exception as e:
+        _emit({'memory_error': str(e)[:500]})
+        return
+    _emit({'peak_python_mb': _tab_state['traced_peak'] / (1024 * 1024)})
+
+# ---------------------------------------------------------------------------
+# 主进程：生成数据库、调度场景、汇总报告
+# ---------------------------------------------------------------------------
+
+def _percentile(values, percent):
+    # 线性插值百分位数
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def _summarize(records, timed_out):
+    timings = [r['ms'] for r in records if 'ms' in r and not r['warmup']]
+    peak_rss = max((r['peak_rss_mb'] for r in records if 'peak_rss_mb' in r), default=None)
+    peak_python = next((r['peak_python_mb'] for r in records if 'peak_python_mb' in r), None)
+    error = next((r['error'] for r in records if 'error' in r), None)
+
+    summary = {
+        'runs': len(timings),
+        'status': 'error' if error else 'timeout' if timed_out else 'ok',
+    }
+    if error:
+        summary['error'] = error
+    memory_error = next((r['memory_error'] for r in records if 'memory_error' in r), None)
+    if memory_error:
+        summary['memory_error'] = memory_error
+    if timings:
+        summary.update({
+            'p50_ms': round(_percentile(timings, 50), 2),
+            'p95_ms': round(_percentile(timings, 95), 2),
+            'min_ms': round(min(timings), 2),
+            'max_ms': round(max(timings), 2),
+        })
+    if peak_python is not None:
+        summary['peak_python_mb'] = round(peak_python, 1)
+    if peak_rss is not None:
+        summary['peak_rss_mb'] = round(peak_rss, 1)
+    return summary
+
+def _child_env(db_path):
+    env = dict(os.environ)
+    env['PROJECT_MANAGER_DB'] = db_path
+    # 自动备份会干扰计时
+    env['PROJECT_MANAGER_BACKUP_INTERVAL'] = '0'
+    env['PROJECT_MANAGER_ANALYTICS_REFRESH'] = '0'
+    return env
+
+def _ensure_database(person_count, data_dir, seed, workers, profile, regenerate):
+    db_path = os.path.join(data_dir, f"benchmark_{person_count}_{'+'.join(profile)}.db")
+    if regenerate:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+    if not os.path.exists(db_path):
+        print(f"生成 {person_count} 人规模的数据库: {db_path}", flush=True)
+        start = time.perf_counter()
+        subprocess.run([sys.executable, __file__, '--generate', str(person_count), '--seed', str(seed),
+                        '--workers', str(workers), '--profile', *profile],
+                       cwd=ROOT, env=_child_env(db_path), check=True, stdout=subprocess.DEVNULL)
+        print(f"  用时 {time.perf_counter() - start:.1f}s", flush=True)
+    return db_path
+
+def _table_counts(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('person', 'project', 'standard', 'patent', 'paper')}
+    finally:
+        conn.close()
+
+def _run_child(name, db_path, args):
+    command = [sys.executable, __file__, '--scenario', name, '--repeat', str(args.repeat),
+               '--warmup', str(args.warmup), '--timeout', str(args.timeout)]
+    process = subprocess.Popen(command, cwd=ROOT, env=_child_env(db_path),
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    records = []
+    timed_out = False
+    try:
+        # 整个场景（含预热和内存统计）的总时限
+        stdout, _ = process.communicate(timeout=args.timeout * (args.repeat + args.warmup + 1))
+    except subprocess.TimeoutExpired:
+        process.kill()
+        stdout, _ = process.communicate()
+        timed_out = True
+    for line in stdout.splitlines():
+        if line.startswith('{'):
+            records.append(json.loads(line))
+    if process.returncode not in (0, None) and not timed_out and not any('error' in r for r in records):
+        records.append({'error': f"进程退出码 {process.returncode}"})
+    return _summarize(records, timed_out)
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="项目管理系统性能基准测试")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help="人员数量规模")
+    parser.add_argument('--scenarios', nargs='+', choices=sorted(SCENARIOS), help="只运行指定场景")
+    parser.add_argument('--repeat', type=int, default=5, help="每个场景的测量次数")
+    parser.add_argument('--warmup', type=int, default=1, help="每个场景不计入结果的预热次数")
+    parser.add_argument('--timeout', type=int, default=600, help="单次运行的超时时间（秒）")
+    parser.add_argument('--seed', type=int, default=42, help="生成数据的随机种子")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="生成数据库的并行进程数")
+    parser.add_argument('--profile', nargs='+', default=['uniform'],
+                        help="生成数据的分布方案（见 generate_data.PROFILES），如 production 模拟真实的偏斜分布")
+    parser.add_argument('--data-dir', default=os.path.join(BENCHMARK_DIR, 'data'), help="测试数据库目录")
+    parser.add_argument('--regenerate', action='store_true', help="重新生成测试数据库")
+    parser.add_argument('--output', help="JSON报告路径")
+    # 以下参数供子进程使用
+    parser.add_argument('--generate', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--scenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+
+    if args.generate:
+        generate_database(args.generate, args.seed, args.workers, args.profile)
+        return
+    if args.scenario:
+        run_scenario(args.scenario, args.repeat, args.warmup, args.timeout)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    output = args.output or os.path.join(
+        BENCHMARK_DIR, 'results', f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'warmup': args.warmup,
+        'profile': args.profile,
+        'scales': {},
+    }
+    scenario_names = args.scenarios or list(SCENARIOS)
+
+    for person_count in args.scales:
+        db_path = _ensure_database(person_count, args.data_dir, args.seed, args.workers, args.profile,
+                                   args.regenerate)
+        scale_report = {'table_counts': _table_counts(db_path), 'scenarios': {}}
+        report['scales'][str(person_count)] = scale_report
+
+        for name in scenario_names:
+            summary = _run_child(name, db_path, args)
+            scale_report['scenarios'][name] = summary
+            print(f"[{person_count}] {name}: {summary['status']} "
+                  f"p50={summary.get('p50_ms', '-')}ms p95={summary.get('p95_ms', '-')}ms "
+                  f"mem={summary.get('peak_python_mb', '-')}MB", flush=True)
+
+            # 每个场景完成后写入一次，中途终止时也能保留已有结果
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"基准测试报告已保存到 {output}")
+
+if __name__ == '__main__':
+    main()
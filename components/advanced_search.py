@@ -1,7 +1,24 @@
 import streamlit as st
 import pandas as pd
-from components.db_utils import get_connection
-from components.table_utils import translate_columns, get_display_columns, display_dataframe
+from components.db_utils import get_connection, keyword_condition, person_keyword_conditions, PERSON_LIST_FIELDS
+from components.lookup import get_person_names
+from components.pagination import cached_count, fetch_keyset_page, ordered_query, row_key
+from components.table_utils import translate_columns, display_dataframe
+
+def get_search_export_query(entity_type):
+    """
+    获取最近一次高级搜索的完整查询（不分页），用于导出全部结果
+
+    参数:
+    - entity_type: 实体类型
+
+    返回:
+    - (str, list): SQL查询和参数，尚未搜索时返回 (None, None)
+    """
+    page_state = st.session_state.get(f'search_page_state_{entity_type}')
+    if not page_state or 'export_query' not in page_state:
+        return None, None
+    return page_state['export_query']
 
 def advanced_search(entity_type):
     """
@@ -226,8 +243,13 @@ def advanced_search(entity_type):
         # 搜索按钮
         search_button = st.button("搜索", key=f"advanced_search_{entity_type}")
 
+    # 点击搜索按钮后保持搜索状态，翻页、导出等操作引起的页面刷新不会清空结果
+    if search_button:
+        st.session_state[f'search_active_{entity_type}'] = True
+    search_active = st.session_state.get(f'search_active_{entity_type}', False)
+
     # 如果点击了搜索按钮，执行搜索
-    if search_button or keyword or any(v for v in field_values.values() if v and v != "全部") or any(r[0] or r[1] for r in date_ranges.values()):
+    if search_active or keyword or any(v for v in field_values.values() if v and v != "全部") or any(r[0] or r[1] for r in date_ranges.values()):
         # 构建查询条件
         conditions = []
         params = []
@@ -240,69 +262,29 @@ def advanced_search(entity_type):
             text_searchable_fields = [
                 'name', 'title', 'outcome', 'company', 'organization', 'volume_info',
                 'department', 'position', 'major', 'school', 'phone', 'id_card',
-                'code', 'patent_number', 'journal', 'participants', 'co_authors'
+                'code', 'patent_number', 'journal'
             ]
 
-            # 对所有可搜索字段进行搜索
+            # 文本字段通过全文索引进行模糊匹配
+            text_fields = [field for field in current_searchable if field in text_searchable_fields]
+            if text_fields:
+                condition, condition_params = keyword_condition(entity_type, text_fields, keyword)
+                keyword_conditions.append(condition)
+                params.extend(condition_params)
+
+            # 对于枚举类型字段，如果关键词完全匹配则添加条件
             for field in current_searchable:
-                # 文本字段使用LIKE进行模糊匹配
-                if field in text_searchable_fields:
-                    keyword_conditions.append(f"{field} LIKE ?")
-                    params.append(f"%{keyword}%")
-                # 对于枚举类型字段，如果关键词完全匹配则添加条件
-                elif field in current_dropdowns:
+                if field in current_dropdowns:
                     options = current_dropdowns[field]
                     for option in options:
                         if option != "全部" and keyword.lower() in option.lower():
                             keyword_conditions.append(f"{field} = ?")
                             params.append(option)
 
-            # 特殊处理：如果关键词是人名，尝试在相关ID字段中查找
-            try:
-                # 尝试在人员表中查找匹配的人员
-                conn = get_connection()
-                person_query = "SELECT id, name FROM person WHERE name LIKE ?"
-                person_df = pd.read_sql(person_query, conn, params=[f"%{keyword}%"])
-                conn.close()
-
-                if not person_df.empty:
-                    # 找到了匹配的人员，根据实体类型添加相应的搜索条件
-                    for _, person in person_df.iterrows():
-                        person_id = person['id']
-
-                        if entity_type == 'project':
-                            # 搜索项目的负责人和成员
-                            keyword_conditions.append(f"leader_id = ?")
-                            params.append(person_id)
-                            keyword_conditions.append(f"members LIKE ?")
-                            params.append(f"%{person_id}%")
-
-                        elif entity_type == 'standard':
-                            # 搜索标准的参与人员
-                            keyword_conditions.append(f"participant_id = ?")
-                            params.append(person_id)
-
-                        elif entity_type == 'patent':
-                            # 搜索专利的所有人和参与人员
-                            keyword_conditions.append(f"owner_id = ?")
-                            params.append(person_id)
-                            keyword_conditions.append(f"participants LIKE ?")
-                            params.append(f"%{person_id}%")
-
-                        elif entity_type == 'paper':
-                            # 搜索论文的第一作者和参与作者
-                            keyword_conditions.append(f"first_author_id = ?")
-                            params.append(person_id)
-                            keyword_conditions.append(f"co_authors LIKE ?")
-                            params.append(f"%{person_id}%")
-            except Exception as e:
-                # 如果查询失败，忽略这部分搜索条件
-                pass
-
-            # 如果是paper实体，特殊处理title字段
-            if entity_type == 'paper' and 'title' in current_searchable:
-                keyword_conditions.append(f"title LIKE ?")
-                params.append(f"%{keyword}%")
+            # 特殊处理：如果关键词是人名，通过人员关联表在相关ID字段中查找
+            person_conditions, person_params = person_keyword_conditions(entity_type, keyword)
+            keyword_conditions.extend(person_conditions)
+            params.extend(person_params)
 
             if keyword_conditions:
                 conditions.append(f"({' OR '.join(keyword_conditions)})")
@@ -317,10 +299,16 @@ def advanced_search(entity_type):
                     'code', 'patent_number', 'journal', 'participants', 'co_authors'
                 ]
 
-                if field in text_searchable_fields:
-                    # 文本字段使用LIKE进行模糊匹配
-                    conditions.append(f"{field} LIKE ?")
-                    params.append(f"%{value}%")
+                if field in PERSON_LIST_FIELDS.get(entity_type, {}):
+                    # 人员列表字段通过关联表匹配人员ID或姓名
+                    conditions.append(PERSON_LIST_FIELDS[entity_type][field].format(
+                        person_ids="SELECT id FROM person WHERE CAST(id AS TEXT) = ? OR name LIKE ?"))
+                    params.extend([value.strip(), f"%{value.strip()}%"])
+                elif field in text_searchable_fields:
+                    # 文本字段通过全文索引进行模糊匹配
+                    condition, condition_params = keyword_condition(entity_type, [field], value)
+                    conditions.append(condition)
+                    params.extend(condition_params)
                 else:
                     # 其他字段使用精确匹配
                     conditions.append(f"{field} = ?")
@@ -335,52 +323,50 @@ def advanced_search(entity_type):
                 conditions.append(f"{field} <= ?")
                 params.append(end.strftime("%Y-%m-%d"))
 
-        # 构建SQL查询
-        table_name = 'paper' if entity_type == 'paper' else entity_type
-        query = f"SELECT * FROM {table_name}"
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-
-        # 添加排序
+        # 确定排序字段
+        sort_field_name = None
         if sort_field != "无":
             # 将显示名称转换回字段名
             sort_field_name = next((f for f, v in current_fields.items() if v == sort_field), None)
-            if sort_field_name:
-                query += f" ORDER BY {sort_field_name} {'DESC' if sort_order == '降序' else 'ASC'}"
+        descending = sort_order == '降序'
 
         # 执行查询
         conn = get_connection()
 
-        # 获取总记录数
-        count_query = f"SELECT COUNT(*) FROM ({query})"
-        count_df = pd.read_sql(count_query, conn, params=params)
-        total_records = count_df.iloc[0, 0]
-
-        # 分页查询
-        current_page = st.session_state.get(f'page_{entity_type}', 1)
+        # 获取总记录数（相同条件在数据未变化前只统计一次）
+        total_records = cached_count(conn, entity_type, conditions, params)
         total_pages = (total_records + page_size - 1) // page_size
 
-        # 确保当前页在有效范围内
-        if current_page < 1:
-            current_page = 1
-        if current_page > total_pages and total_pages > 0:
-            current_page = total_pages
-
-        # 更新分页状态
-        st.session_state[f'page_{entity_type}'] = current_page
-
-        # 添加分页限制
-        offset = (current_page - 1) * page_size
-        query += f" LIMIT {page_size} OFFSET {offset}"
-
-        # 执行最终查询
-        df = pd.read_sql(query, conn, params=params)
+        # 分页状态：搜索条件、排序或每页条数变化时回到第一页
+        state_key = f'search_page_state_{entity_type}'
+        signature = (tuple(conditions), tuple(params), sort_field_name, descending, page_size)
+        page_state = st.session_state.get(state_key)
+        if page_state is None or page_state['signature'] != signature or page_state['page'] > max(total_pages, 1):
+            page_state = {'signature': signature, 'page': 1, 'anchor': None}
+            st.session_state[state_key] = page_state
+
+        # 按键集分页查询当前页
+        df = fetch_keyset_page(conn, entity_type, conditions, params, sort_field_name, descending,
+                               page_state['anchor'], page_size)
+        if df.empty and page_state['page'] > 1:
+            # 数据已变化导致当前页为空时回到第一页
+            page_state.update(page=1, anchor=None)
+            df = fetch_keyset_page(conn, entity_type, conditions, params, sort_field_name, descending,
+                                   None, page_size)
+
+        # 记录完整查询，用于导出全部搜索结果
+        page_state['export_query'] = (ordered_query(entity_type, conditions, sort_field_name, descending), list(params))
+
+        current_page = page_state['page']
+        if not df.empty:
+            # 记录当前页首尾行的分页键，用于翻页
+            page_state['first_key'] = row_key(df, 0, sort_field_name)
+            page_state['last_key'] = row_key(df, -1, sort_field_name)
 
         # 处理特殊字段（如外键关联）
         if entity_type in ['project', 'standard', 'patent', 'paper']:
             # 获取人员信息用于显示
-            persons_df = pd.read_sql("SELECT id, name FROM person", conn)
-            persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
+            persons_dict = get_person_names()
 
             if entity_type == 'project':
                 # 处理负责人
@@ -420,22 +406,25 @@ def advanced_search(entity_type):
             page_cols = st.columns([1, 1, 3, 1, 1])
             with page_cols[0]:
                 if st.button("首页", key=f"first_page_{entity_type}_{current_page}") and current_page > 1:
-                    st.session_state[f'page_{entity_type}'] = 1
+                    page_state.update(page=1, anchor=None)
                     st.rerun()
 
             with page_cols[1]:
                 if st.button("上一页", key=f"prev_page_{entity_type}_{current_page}") and current_page > 1:
-                    st.session_state[f'page_{entity_type}'] = current_page - 1
+                    page_state.update(page=current_page - 1,
+                                      anchor=('before', page_state['first_key']) if current_page > 2 else None)
                     st.rerun()
 
             with page_cols[3]:
                 if st.button("下一页", key=f"next_page_{entity_type}_{current_page}") and current_page < total_pages:
-                    st.session_state[f'page_{entity_type}'] = current_page + 1
+                    page_state.update(page=current_page + 1, anchor=('after', page_state['last_key']))
                     st.rerun()
 
             with page_cols[4]:
                 if st.button("末页", key=f"last_page_{entity_type}_{current_page}") and current_page < total_pages:
-                    st.session_state[f'page_{entity_type}'] = total_pages
+                    # 末页只包含剩余的记录，保证页码边界与顺序翻页一致
+                    page_state.update(page=total_pages,
+                                      anchor=('last', total_records - (total_pages - 1) * page_size))
                     st.rerun()
 
             # 显示结果表格
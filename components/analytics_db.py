@@ -0,0 +1,155 @@
+import os
+import time
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from urllib.parse import quote
+from components.db_utils import DB_FILE, ConnectionPool, get_connection, get_data_version
+
+# 只读分析副本路径，默认与数据库位于同一目录，可通过环境变量 PROJECT_MANAGER_ANALYTICS_DB 指定
+ANALYTICS_DB = os.environ.get(
+    'PROJECT_MANAGER_ANALYTICS_DB',
+    os.path.join(os.path.dirname(DB_FILE), os.path.splitext(os.path.basename(DB_FILE))[0] + "_analytics.db")
+)
+
+# 自动刷新间隔（分钟），设置为0关闭自动刷新；数据没有修改时跳过刷新
+ANALYTICS_REFRESH_MINUTES = float(os.environ.get('PROJECT_MANAGER_ANALYTICS_REFRESH', '30'))
+
+# 分析副本只读且文件不会被原地修改，不需要WAL和繁忙等待
+ANALYTICS_PRAGMAS = [
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA temp_store = MEMORY",
+]
+
+_refresh_lock = threading.Lock()
+_refresher_lock = threading.Lock()
+_refresher_thread = None
+
+# 分析副本的连接池：以 immutable 方式只读打开，查询不加锁；慢查询日志仍写入主数据库
+_pool = ConnectionPool(f"file:{quote(os.path.abspath(ANALYTICS_DB))}?mode=ro&immutable=1",
+                       pragmas=ANALYTICS_PRAGMAS, uri=True, log_path=DB_FILE)
+
+def refresh_analytics_db():
+    """
+    重新生成只读分析副本
+
+    通过 VACUUM INTO 将数据库的一致快照写入临时文件（读事务，WAL模式下不阻塞写操作），
+    完成后替换原副本；正在进行的分析查询继续读取旧文件，之后获取的连接读取新副本
+
+    返回:
+    - datetime: 副本生成时间
+    """
+    partial = ANALYTICS_DB + ".partial"
+    with _refresh_lock:
+        if os.path.exists(partial):
+            os.remove(partial)
+        conn = get_connection()
+        try:
+            conn.execute("VACUUM INTO ?", (partial,))
+        except BaseException:
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        finally:
+            conn.close()
+        os.replace(partial, ANALYTICS_DB)
+        # 空闲连接仍指向被替换的旧文件
+        _pool.close_all()
+    return datetime.fromtimestamp(os.path.getmtime(ANALYTICS_DB))
+
+def get_analytics_connection():
+    """
+    获取只读分析副本的连接，用于统计分析等耗时的聚合和整表读取，不与编辑页面的写操作争用数据库；
+    副本不存在时先生成。与 get_connection() 相同，使用完毕后调用 close() 归还连接
+
+    返回:
+    - sqlite3.Connection: 只读连接
+    """
+    if not os.path.exists(ANALYTICS_DB):
+        refresh_analytics_db()
+    return _pool.acquire()
+
+def analytics_status():
+    """
+    获取分析副本的新鲜度
+
+    返回:
+    - dict: refreshed 生成时间（没有副本时为None），stale 副本生成后数据库是否发生过写入
+    """
+    if not os.path.exists(ANALYTICS_DB):
+        return {'refreshed': None, 'stale': True}
+
+    analytics_conn = get_analytics_connection()
+    try:
+        analytics_version = get_data_version(analytics_conn)
+    finally:
+        analytics_conn.close()
+    conn = get_connection()
+    try:
+        version = get_data_version(conn)
+    finally:
+        conn.close()
+    return {
+        'refreshed': datetime.fromtimestamp(os.path.getmtime(ANALYTICS_DB)),
+        'stale': version != analytics_version,
+    }
+
+def _run_refresher(interval_minutes):
+    interval = interval_minutes * 60
+    while True:
+        if os.path.exists(ANALYTICS_DB):
+            due = os.path.getmtime(ANALYTICS_DB) + interval
+        else:
+            # 尚无副本时由首次统计查询生成
+            due = time.time() + interval
+        time.sleep(max(due - time.time(), 0))
+        if not os.path.exists(ANALYTICS_DB):
+            continue
+        try:
+            if analytics_status()['stale']:
+                refresh_analytics_db()
+            else:
+                # 数据未修改，只更新副本时间，下一次在一个间隔后检查
+                os.utime(ANALYTICS_DB)
+        except (sqlite3.Error, OSError):
+            # 刷新失败时稍后重试，不影响应用运行
+            time.sleep(min(interval, 600))
+
+def start_analytics_refresher(interval_minutes=ANALYTICS_REFRESH_MINUTES):
+    """
+    启动分析副本自动刷新线程（每个进程只启动一次）：副本超过刷新间隔且数据有修改时重新生成
+
+    参数:
+    - interval_minutes: 刷新间隔（分钟），为0时不启动
+    """
+    global _refresher_thread
+    if interval_minutes <= 0:
+        return
+    with _refresher_lock:
+        if _refresher_thread is None or not _refresher_thread.is_alive():
+            _refresher_thread = threading.Thread(target=_run_refresher, args=(interval_minutes,),
+                                                 name="analytics-refresher", daemon=True)
+            _refresher_thread.start()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="生成或查看统计分析使用的只读数据库副本")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('refresh', help="立即重新生成分析副本")
+    subparsers.add_parser('status', help="查看分析副本的生成时间和是否过期")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == 'refresh':
+        start = time.time()
+        refresh_analytics_db()
+        print(f"分析副本已生成: {ANALYTICS_DB}，耗时 {time.time() - start:.1f} 秒")
+    else:
+        status = analytics_status()
+        if status['refreshed'] is None:
+            print("尚未生成分析副本")
+        else:
+            print(f"分析副本生成于 {status['refreshed']:%Y-%m-%d %H:%M:%S}"
+                  + ("，之后数据库已发生修改" if status['stale'] else "，与数据库一致"))
@@ -0,0 +1,298 @@
+import os
+import re
+import gzip
+import time
+import shutil
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+from components.db_utils import DB_FILE, get_connection, migrate
+
+# 备份目录，可通过环境变量 PROJECT_MANAGER_BACKUP_DIR 指定
+BACKUP_DIR = os.environ.get('PROJECT_MANAGER_BACKUP_DIR', 'backups')
+
+# 自动备份间隔（小时），设置为0关闭自动备份
+BACKUP_INTERVAL_HOURS = float(os.environ.get('PROJECT_MANAGER_BACKUP_INTERVAL', '24'))
+
+# 保留的备份数量，超出部分从最旧的开始删除
+BACKUP_KEEP = int(os.environ.get('PROJECT_MANAGER_BACKUP_KEEP', '7'))
+
+# 每一步复制的页数（默认页大小4KB，即每步约4MB），步与步之间释放数据库锁
+BACKUP_STEP_PAGES = 1024
+
+# 每步之间的停顿（秒），让出时间给正在进行的写操作
+BACKUP_STEP_SLEEP = 0.005
+
+# 没有任何备份时，应用启动后等待多久进行首次自动备份（秒）
+FIRST_BACKUP_DELAY = 60
+
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+
+# 同一时间只进行一个备份或恢复
+_backup_lock = threading.Lock()
+
+def _backup_prefix(db_path):
+    return os.path.splitext(os.path.basename(db_path))[0] + "_"
+
+def _backup_pattern(db_path):
+    return re.compile(re.escape(_backup_prefix(db_path)) + r"(\d{8}_\d{6})(?:_\d+)?\.db(\.gz)?$")
+
+def list_backups(backup_dir=BACKUP_DIR, db_path=DB_FILE):
+    """
+    列出备份文件，最新的在前
+
+    参数:
+    - backup_dir: 备份目录
+    - db_path: 数据库文件路径（备份文件名以其文件名开头）
+
+    返回:
+    - list: [{'name', 'path', 'created', 'size', 'compressed'}, ...]
+    """
+    if not os.path.isdir(backup_dir):
+        return []
+    pattern = _backup_pattern(db_path)
+    backups = []
+    for name in os.listdir(backup_dir):
+        match = pattern.match(name)
+        if match is None:
+            continue
+        path = os.path.join(backup_dir, name)
+        backups.append({
+            'name': name,
+            'path': path,
+            'created': datetime.strptime(match.group(1), "%Y%m%d_%H%M%S"),
+            'size': os.path.getsize(path),
+            'compressed': match.group(2) is not None,
+        })
+    backups.sort(key=lambda backup: (backup['created'], backup['name']), reverse=True)
+    return backups
+
+def rotate_backups(keep=BACKUP_KEEP, backup_dir=BACKUP_DIR, db_path=DB_FILE):
+    """
+    只保留最新的 keep 个备份
+
+    参数:
+    - keep: 保留数量
+    - backup_dir: 备份目录
+    - db_path: 数据库文件路径
+
+    返回:
+    - list: 被删除的备份文件路径
+    """
+    removed = []
+    for backup in list_backups(backup_dir, db_path)[keep:]:
+        os.remove(backup['path'])
+        removed.append(backup['path'])
+    return removed
+
+def _new_backup_path(backup_dir, db_path, compress):
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    extension = ".db.gz" if compress else ".db"
+    path = os.path.join(backup_dir, f"{_backup_prefix(db_path)}{stamp}{extension}")
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(backup_dir, f"{_backup_prefix(db_path)}{stamp}_{counter}{extension}")
+        counter += 1
+    return path
+
+def _copy_database(source, target, progress=None):
+    # 通过SQLite在线备份接口分步复制。复制期间源连接保持一个读事务：WAL模式下读事务
+    # 不阻塞写操作，且各步读取同一快照；否则其他连接每次写入都会使备份从头开始，
+    # 持续写入时可能永远无法完成
+    def step(status, remaining, total):
+        if progress:
+            progress(total - remaining, total)
+        time.sleep(BACKUP_STEP_SLEEP)
+
+    source.execute("BEGIN")
+    try:
+        source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+        source.backup(target, pages=BACKUP_STEP_PAGES, progress=step)
+    finally:
+        source.rollback()
+
+def _check_integrity(conn):
+    result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    if result != ['ok']:
+        raise ValueError("数据库完整性检查未通过: " + "; ".join(result[:5]))
+
+def _compress(path, target):
+    with open(path, 'rb') as source, gzip.open(target, 'wb', compresslevel=6) as output:
+        shutil.copyfileobj(source, output, 1024 * 1024)
+
+def _decompress(path, target):
+    with gzip.open(path, 'rb') as source, open(target, 'wb') as output:
+        shutil.copyfileobj(source, output, 1024 * 1024)
+
+def create_backup(compress=False, keep=BACKUP_KEEP, backup_dir=BACKUP_DIR, progress=None):
+    """
+    在线备份当前数据库，备份期间应用可以正常读写
+
+    备份先写入临时文件，检查完整性（并可选压缩）后再改为正式文件名，然后按 keep 轮换旧备份
+
+    参数:
+    - compress: 是否使用gzip压缩
+    - keep: 保留的备份数量，为None时不删除旧备份
+    - backup_dir: 备份目录
+    - progress: 复制进度回调，参数为 (已复制页数, 总页数)
+
+    返回:
+    - str: 备份文件路径
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    path = _new_backup_path(backup_dir, DB_FILE, compress)
+    partial = path + ".partial"
+    copy_path = partial if not compress else partial + ".db"
+
+    with _backup_lock:
+        try:
+            source = get_connection()
+            try:
+                target = sqlite3.connect(copy_path)
+                try:
+                    _copy_database(source, target, progress)
+                    # 备份文件使用回滚日志模式，单个文件即可完整打开
+                    target.execute("PRAGMA journal_mode = DELETE")
+                    _check_integrity(target)
+                finally:
+                    target.close()
+            finally:
+                source.close()
+
+            if compress:
+                _compress(copy_path, partial)
+                os.remove(copy_path)
+            os.replace(partial, path)
+        except BaseException:
+            for leftover in (partial, copy_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise
+
+    if keep is not None:
+        rotate_backups(keep, backup_dir)
+    return path
+
+def _prepare_restore(backup_path, fresh_path):
+    # 将备份解压/复制为新文件，检查完整性并执行迁移
+    if backup_path.endswith('.gz'):
+        _decompress(backup_path, fresh_path)
+    else:
+        shutil.copyfile(backup_path, fresh_path)
+
+    fresh = sqlite3.connect(fresh_path)
+    try:
+        try:
+            _check_integrity(fresh)
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"备份文件无法打开: {e}")
+        if fresh.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'person'").fetchone() is None:
+            raise ValueError("备份文件中没有人员表，不是本系统的数据库")
+        # 较早的备份可能缺少新增的表和索引
+        migrate(fresh)
+    finally:
+        fresh.close()
+
+def restore_backup(backup_path, backup_dir=BACKUP_DIR, progress=None):
+    """
+    从备份恢复数据库
+
+    备份先解压/复制为新的临时文件，通过完整性检查并执行数据库迁移后，
+    先备份当前数据库，再通过在线备份接口整体写回当前数据库（期间其他连接会等待写锁）
+
+    参数:
+    - backup_path: 备份文件路径
+    - backup_dir: 恢复前自动备份当前数据库的目录
+    - progress: 写回进度回调，参数为 (已复制页数, 总页数)
+
+    返回:
+    - str: 恢复前当前数据库的备份路径
+    """
+    restore_dir = os.path.dirname(os.path.abspath(DB_FILE))
+    fresh_path = os.path.join(restore_dir, f".restore_{os.getpid()}_{int(time.time())}.db")
+    try:
+        _prepare_restore(backup_path, fresh_path)
+
+        # 恢复前先备份当前数据，恢复有误时可以再恢复回来
+        safety_backup = create_backup(compress=True, keep=None, backup_dir=backup_dir)
+
+        with _backup_lock:
+            fresh = sqlite3.connect(fresh_path)
+            conn = get_connection()
+            try:
+                old_versions = dict(conn.execute("SELECT table_name, version FROM data_change").fetchall())
+                _copy_database(fresh, conn, progress)
+
+                # 恢复后的修改计数可能与之前出现过的计数相同，统一调大使所有缓存失效
+                conn.execute("BEGIN IMMEDIATE")
+                for table, version in old_versions.items():
+                    conn.execute("UPDATE data_change SET version = MAX(version, ?) + 1 WHERE table_name = ?",
+                                 (version, table))
+                conn.commit()
+            finally:
+                conn.close()
+                fresh.close()
+    finally:
+        if os.path.exists(fresh_path):
+            os.remove(fresh_path)
+    return safety_backup
+
+def _run_scheduler(interval_hours, keep, compress):
+    interval = interval_hours * 3600
+    while True:
+        backups = list_backups()
+        if backups:
+            due = backups[0]['created'].timestamp() + interval
+        else:
+            due = time.time() + FIRST_BACKUP_DELAY
+        time.sleep(max(due - time.time(), 0))
+        try:
+            create_backup(compress=compress, keep=keep)
+        except (sqlite3.Error, OSError, ValueError):
+            # 备份失败时稍后重试，不影响应用运行
+            time.sleep(min(interval, 3600))
+
+def start_backup_scheduler(interval_hours=BACKUP_INTERVAL_HOURS, keep=BACKUP_KEEP, compress=True):
+    """
+    启动自动备份线程（每个进程只启动一次）：距离最近一次备份超过间隔时自动备份并轮换
+
+    参数:
+    - interval_hours: 备份间隔（小时），为0时不启动
+    - keep: 保留的备份数量
+    - compress: 是否压缩
+    """
+    global _scheduler_thread
+    if interval_hours <= 0:
+        return
+    with _scheduler_lock:
+        if _scheduler_thread is None or not _scheduler_thread.is_alive():
+            _scheduler_thread = threading.Thread(target=_run_scheduler, args=(interval_hours, keep, compress),
+                                                 name="backup-scheduler", daemon=True)
+            _scheduler_thread.start()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="备份或恢复数据库，可配合cron等定时任务使用")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    create_parser = subparsers.add_parser('create', help="立即备份")
+    create_parser.add_argument('--compress', action='store_true', help="使用gzip压缩")
+    create_parser.add_argument('--keep', type=int, default=BACKUP_KEEP, help="保留的备份数量")
+
+    subparsers.add_parser('list', help="列出备份")
+
+    restore_parser = subparsers.add_parser('restore', help="从备份恢复")
+    restore_parser.add_argument('path', help="备份文件路径")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == 'create':
+        print(f"已备份到 {create_backup(compress=args.compress, keep=args.keep)}")
+    elif args.command == 'list':
+        for backup in list_backups():
+            print(f"{backup['created']:%Y-%m-%d %H:%M:%S}  {backup['size'] / 1024 / 1024:8.1f} MB  {backup['path']}")
+    else:
+        print(f"恢复前的数据已备份到 {restore_backup(args.path)}")
+        print("恢复完成")
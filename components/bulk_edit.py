@@ -0,0 +1,111 @@
+import streamlit as st
+from components.repository import get_repository, ids_condition, column_label, ENTITY_LABELS, CHOICE_COLUMNS
+from components.list_view import list_scope, clear_list_selection
+from components.entity_selector import entity_selectbox
+
+# 各实体可批量修改的字段，取值限定的字段使用 CHOICE_COLUMNS 中的选项，其他字段直接输入
+BULK_COLUMNS = {
+    'person': ['department', 'position', 'title', 'education', 'skill_level'],
+    'project': ['status'],
+    'standard': ['type', 'company'],
+    'patent': ['type', 'certificate', 'company'],
+    'paper': ['journal_type', 'organization'],
+}
+
+def _finish(entity_type, message):
+    # 批量操作完成：保存成功消息，清除选中的行并刷新页面
+    st.session_state[f"{entity_type}_success_message"] = message
+    clear_list_selection(entity_type)
+    st.rerun()
+
+def bulk_actions(entity_type, selected_ids, delete_func=None):
+    """
+    管理页面列表的批量操作：对选中的记录或全部符合筛选条件的记录批量修改字段、替换人员或删除。
+    每项操作在写队列中以一条集合语句执行并在一个事务中提交，而不是逐条修改（在 paged_list 之后调用）
+
+    参数:
+    - entity_type: 实体类型
+    - selected_ids: 列表中选中的记录ID
+    - delete_func: 删除时需要同时维护其他表的实体提供的删除函数，参数为 (条件列表, 参数列表)，
+      返回成功消息，不能删除时抛出 ValueError；为None时直接删除
+    """
+    repository = get_repository(entity_type)
+    entity_label = ENTITY_LABELS[entity_type]
+    list_conditions, list_params, total = list_scope(entity_type)
+
+    with st.expander(f"批量操作（已选中 {len(selected_ids)} 条）", expanded=bool(selected_ids)):
+        st.caption("在上方列表中勾选行，或选择对全部符合当前筛选条件的记录进行操作")
+        scope = st.radio("操作范围", ['selected', 'all'], horizontal=True, key=f"bulk_scope_{entity_type}",
+                         format_func=lambda x: f"选中的记录（{len(selected_ids)} 条）" if x == 'selected'
+                         else f"全部符合筛选条件的记录（{total} 条）")
+        if scope == 'selected':
+            condition, params = ids_condition(selected_ids)
+            conditions, count = [condition], len(selected_ids)
+        else:
+            conditions, params, count = list_conditions, list_params, total
+
+        tab_names = ["批量修改字段"]
+        person_columns = repository.person_columns()
+        if person_columns:
+            tab_names.append("批量替换人员")
+        tab_names.append("批量删除")
+        tabs = dict(zip(tab_names, st.tabs(tab_names)))
+
+        with tabs["批量修改字段"]:
+            column = st.selectbox("字段", BULK_COLUMNS[entity_type], key=f"bulk_column_{entity_type}",
+                                  format_func=lambda x: column_label(entity_type, x))
+            choices = CHOICE_COLUMNS.get(entity_type, {}).get(column)
+            if choices:
+                value = st.selectbox("修改为", choices, key=f"bulk_value_{entity_type}_{column}")
+            else:
+                value = st.text_input("修改为", key=f"bulk_value_{entity_type}_{column}").strip()
+
+            if st.button(f"修改 {count} 条记录", key=f"bulk_update_{entity_type}", disabled=count == 0):
+                try:
+                    updated = repository.update_where(conditions, params, {column: value})
+                except Exception as e:
+                    st.error(f"修改失败: {str(e)}")
+                else:
+                    _finish(entity_type, f"已将 {updated} 条{entity_label}信息的{column_label(entity_type, column)}修改为 {value}")
+
+        if person_columns:
+            with tabs["批量替换人员"]:
+                columns = st.multiselect("替换的人员字段", person_columns, default=person_columns,
+                                         key=f"bulk_person_columns_{entity_type}",
+                                         format_func=lambda x: column_label(entity_type, x))
+                col_old, col_new = st.columns(2)
+                with col_old:
+                    old_id = entity_selectbox("选择原人员", 'person', f"bulk_old_person_{entity_type}")
+                with col_new:
+                    new_id = entity_selectbox("选择新人员", 'person', f"bulk_new_person_{entity_type}")
+
+                if st.button(f"在 {count} 条记录中替换", key=f"bulk_reassign_{entity_type}",
+                             disabled=count == 0 or not columns or old_id is None or new_id is None):
+                    if old_id == new_id:
+                        st.error("原人员和新人员相同")
+                    else:
+                        try:
+                            updated = repository.reassign_person(conditions, params, old_id, new_id, columns)
+                        except Exception as e:
+                            st.error(f"替换失败: {str(e)}")
+                        else:
+                            _finish(entity_type, f"已在 {updated} 条{entity_label}信息中替换人员")
+
+        with tabs["批量删除"]:
+            confirmed = st.checkbox(f"确认删除 {count} 条{entity_label}信息（不可恢复）",
+                                    key=f"bulk_delete_confirm_{entity_type}")
+            if st.button(f"删除 {count} 条记录", key=f"bulk_delete_{entity_type}", type="primary",
+                         disabled=count == 0 or not confirmed):
+                try:
+                    if delete_func is None:
+                        message = f"已删除 {repository.delete_where(conditions, params)} 条{entity_label}信息"
+                    else:
+                        message = delete_func(conditions, params)
+                except ValueError as e:
+                    st.error(str(e))
+                except Exception as e:
+                    st.error(f"删除失败: {str(e)}")
+                else:
+                    # 下次批量删除需要重新确认
+                    st.session_state.pop(f"bulk_delete_confirm_{entity_type}", None)
+                    _finish(entity_type, message)
@@ -1,104 +1,761 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
+from components.query_log import InstrumentedCursor
+
+# 数据库文件路径，可通过环境变量 PROJECT_MANAGER_DB 指定其他数据库（如基准测试数据库）
+DB_FILE = os.environ.get('PROJECT_MANAGER_DB', 'project_manager.db')
+
+# 每个连接建立时执行一次的性能参数
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",        # 读写并发：读操作不再被写操作阻塞
+    "PRAGMA synchronous = NORMAL",      # WAL模式下兼顾安全与写入性能
+    "PRAGMA cache_size = -65536",       # 页缓存约64MB（负数表示KB）
+    "PRAGMA mmap_size = 268435456",     # 内存映射读取，最多256MB
+    "PRAGMA temp_store = MEMORY",       # 临时表和排序使用内存
+    "PRAGMA busy_timeout = 5000",       # 数据库被锁定时最多等待5秒
+]
+
+class PooledConnection(sqlite3.Connection):
+    """
+    连接池中的数据库连接
+
+    调用 close() 不会真正关闭连接，而是回滚未提交的事务后归还给连接池，
+    因此现有的 get_connection() ... conn.close() 写法无需修改
+
+    通过该连接执行的查询（包括 pd.read_sql）都使用 InstrumentedCursor 记录耗时
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        cursor = super().cursor(factory)
+        pool = getattr(self, 'pool', None)
+        if pool is not None and isinstance(cursor, InstrumentedCursor):
+            cursor._db_path = pool.log_path
+        return cursor
+
+    # sqlite3.Connection 的 execute 系列方法不经过 cursor()，需显式改为使用记录耗时的游标
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        pool = getattr(self, 'pool', None)
+        if pool is None:
+            super().close()
+        else:
+            pool.release(self)
+
+class ConnectionPool:
+    """
+    SQLite连接池，空闲连接在各线程（Streamlit会话）之间复用
+
+    参数:
+    - path: 数据库文件路径（uri=True 时为 file: URI）
+    - max_idle: 最多保留的空闲连接数，超出部分直接关闭
+    - pragmas: 每个连接建立时执行的PRAGMA语句
+    - uri: path 是否为 URI（如以只读方式打开）
+    - log_path: 慢查询日志写入的数据库，默认为 path
+    """
+
+    def __init__(self, path, max_idle=8, pragmas=CONNECTION_PRAGMAS, uri=False, log_path=None):
+        self.path = path
+        self.max_idle = max_idle
+        self.pragmas = pragmas
+        self.uri = uri
+        self.log_path = log_path or path
+        self._idle = []
+        self._lock = threading.Lock()
+        # close_all() 之后，此前借出的连接归还时直接关闭
+        self._generation = 0
+
+    def _connect(self):
+        generation = self._generation
+        conn = sqlite3.connect(self.path, factory=PooledConnection, check_same_thread=False, uri=self.uri)
+        for pragma in self.pragmas:
+            conn.execute(pragma)
+        conn.pool = self
+        conn.generation = generation
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, conn):
+        try:
+            # 归还前丢弃未提交的修改，避免影响下一个使用者
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            sqlite3.Connection.close(conn)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.max_idle and conn.generation == self._generation:
+                self._idle.append(conn)
+                return
+        sqlite3.Connection.close(conn)
+
+    def close_all(self):
+        # 关闭所有空闲连接（例如替换数据库文件之后），正在使用的连接归还时关闭
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._generation += 1
+        for conn in idle:
+            sqlite3.Connection.close(conn)
+
+# 默认数据库的连接池
+_pool = ConnectionPool(DB_FILE)
+
+# 表结构和迁移在每个进程首次获取连接时执行一次
+_schema_lock = threading.Lock()
+_schema_ready = False
 
 # 数据库连接
 def get_connection():
-    return sqlite3.connect('project_manager.db')
+    global _schema_ready
+    conn = _pool.acquire()
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                migrate(conn)
+                _schema_ready = True
+    return conn
 
-# 检查数据库是否存在并初始化
-def init_db():
-    # 检查数据库文件是否存在
-    if not os.path.exists('project_manager.db'):
-        print("数据库文件不存在，请先运行 generate_data.py 生成数据")
-        
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        # 创建人员表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS person (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            gender TEXT,
-            birth_date TEXT,
-            id_card TEXT UNIQUE,
-            education TEXT,
-            school TEXT,
-            graduation_date TEXT,
-            major TEXT,
-            title TEXT,
-            phone TEXT,
-            department TEXT,
-            position TEXT,
-            skill_level TEXT
-        )
+@contextmanager
+def transaction():
+    """
+    事务上下文管理器：正常退出时提交，发生异常时回滚，结束后归还连接
+
+    用法:
+    with transaction() as conn:
+        conn.execute(...)
+    """
+    conn = get_connection()
+    try:
+        # 立即获取写锁，避免读事务升级为写事务时发生锁冲突
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+# 人员关联表定义：关联表名 -> (主表, 主表ID列, 主表中以逗号分隔的人员ID列)
+# 主表中的逗号分隔列保留用于显示和兼容，关联表由触发器自动同步，用于按人员的索引查询
+RELATION_TABLES = {
+    'project_member': ('project', 'project_id', 'members'),
+    'patent_participant': ('patent', 'patent_id', 'participants'),
+    'paper_coauthor': ('paper', 'paper_id', 'co_authors'),
+}
+
+def _split_ids_sql(column_expr):
+    # 将逗号分隔的ID字符串转换为json_each可用的JSON数组，格式不合法时视为空列表
+    array_expr = f"'[' || {column_expr} || ']'"
+    return f"json_each(CASE WHEN json_valid({array_expr}) THEN {array_expr} ELSE '[]' END)"
+
+def _fill_relation_sql(relation):
+    # 根据主表中逗号分隔的人员ID列批量填充关联表
+    table, id_column, ids_column = RELATION_TABLES[relation]
+    return f'''
+            INSERT OR IGNORE INTO {relation} ({id_column}, person_id, position)
+            SELECT t.id, j.value, j.key
+            FROM {table} t, {_split_ids_sql(f"t.{ids_column}")} j
+            WHERE j.type = 'integer'
+            '''
+
+def _relation_update_trigger_sql(relation):
+    # 主表人员列表修改时的同步触发器：只删除移出列表的人员、插入新加入的人员并更新位置变化的人员，
+    # 列表未变化的行和未变化的人员不改动关联表，也不会触发贡献统计的重新计算
+    table, id_column, ids_column = RELATION_TABLES[relation]
+    new_ids = _split_ids_sql(f"NEW.{ids_column}")
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{relation}_update
+        AFTER UPDATE OF {ids_column} ON {table}
+        WHEN OLD.{ids_column} IS NOT NEW.{ids_column}
+        BEGIN
+            DELETE FROM {relation} WHERE {id_column} = OLD.id
+                AND person_id NOT IN (SELECT value FROM {new_ids} WHERE type = 'integer');
+            INSERT INTO {relation} ({id_column}, person_id, position)
+                SELECT NEW.id, value, MIN(key) FROM {new_ids} WHERE type = 'integer' GROUP BY value
+                ON CONFLICT ({id_column}, person_id) DO UPDATE SET position = excluded.position
+                WHERE position != excluded.position;
+        END
+        '''
+
+def create_relation_tables(conn):
+    """
+    创建人员关联表、复合索引和同步触发器，并从现有的逗号分隔数据迁移（不提交事务）
+
+    参数:
+    - conn: 数据库连接
+    """
+    cursor = conn.cursor()
+
+    for relation, (table, id_column, ids_column) in RELATION_TABLES.items():
+        # 主表不存在时跳过（例如数据尚未生成）
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table,))
+        if cursor.fetchone() is None:
+            continue
+
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (relation,))
+        relation_exists = cursor.fetchone() is not None
+
+        # 关联表：(主表ID, 人员ID) 为主键，position 记录人员在原列表中的顺序
+        cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS {relation} (
+            {id_column} INTEGER NOT NULL,
+            person_id INTEGER NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY ({id_column}, person_id)
+        ) WITHOUT ROWID
+        ''')
+
+        # 按人员查询的复合索引
+        cursor.execute(f'''
+        CREATE INDEX IF NOT EXISTS idx_{relation}_person
+        ON {relation} (person_id, {id_column})
+        ''')
+
+        insert_sql = f'''
+            INSERT OR IGNORE INTO {relation} ({id_column}, person_id, position)
+            SELECT NEW.id, value, key FROM {_split_ids_sql(f"NEW.{ids_column}")}
+            WHERE type = 'integer';
+        '''
+
+        # 触发器：主表新增、修改人员列表、删除时同步关联表
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{relation}_insert
+        AFTER INSERT ON {table}
+        BEGIN
+            {insert_sql}
+        END
+        ''')
+
+        cursor.execute(_relation_update_trigger_sql(relation))
+
+        cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{relation}_delete
+        AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {relation} WHERE {id_column} = OLD.id;
+        END
+        ''')
+
+        # 关联表首次创建时，从主表现有的逗号分隔数据迁移
+        if not relation_exists:
+            cursor.execute(_fill_relation_sql(relation))
+
+# 数据库表结构：所有建表语句统一定义于此，init_db 与 generate_data 共用
+TABLE_DEFINITIONS = {
+    # 人员表
+    'person': '''
+    CREATE TABLE IF NOT EXISTS person (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        gender TEXT,
+        birth_date TEXT,
+        id_card TEXT UNIQUE,
+        education TEXT,
+        school TEXT,
+        graduation_date TEXT,
+        major TEXT,
+        title TEXT,
+        phone TEXT,
+        department TEXT,
+        position TEXT,
+        skill_level TEXT
+    )
+    ''',
+    # 项目表
+    'project': '''
+    CREATE TABLE IF NOT EXISTS project (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        start_date TEXT,
+        end_date TEXT,
+        members TEXT,  -- 存储人员id，以逗号分隔
+        leader_id INTEGER,
+        outcome TEXT,
+        status TEXT DEFAULT "进行中",
+        FOREIGN KEY (leader_id) REFERENCES person (id)
+    )
+    ''',
+    # 标准表
+    'standard': '''
+    CREATE TABLE IF NOT EXISTS standard (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,          -- 标准名称
+        type TEXT NOT NULL,          -- 标准性质（国标、行标等）
+        code TEXT NOT NULL,          -- 标准号
+        release_date TEXT,           -- 发布日期
+        implementation_date TEXT,    -- 实施日期
+        company TEXT,                -- 参与单位
+        participant_id INTEGER,      -- 参与人员ID
+        FOREIGN KEY (participant_id) REFERENCES person (id)
+    )
+    ''',
+    # 专利表
+    'patent': '''
+    CREATE TABLE IF NOT EXISTS patent (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,          -- 专利名称
+        type TEXT NOT NULL,          -- 专利类型（发明、实用新型、外观设计）
+        application_date TEXT,       -- 申请日期
+        grant_date TEXT,             -- 授权日期
+        owner_id INTEGER,            -- 专利所有人（人员ID）
+        participants TEXT,           -- 其他参与人员（以逗号分隔的ID）
+        company TEXT,                -- 申请单位
+        patent_number TEXT,          -- 专利号
+        certificate TEXT DEFAULT "无", -- 证书状态
+        FOREIGN KEY (owner_id) REFERENCES person (id)
+    )
+    ''',
+    # 论文表
+    'paper': '''
+    CREATE TABLE IF NOT EXISTS paper (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,          -- 论文标题
+        journal TEXT NOT NULL,        -- 期刊名称
+        journal_type TEXT NOT NULL,   -- 期刊类型（核心期刊、SCI等）
+        publish_date TEXT,            -- 发表日期
+        first_author_id INTEGER,      -- 第一作者ID
+        co_authors TEXT,              -- 合作作者ID（以逗号分隔）
+        organization TEXT,            -- 作者单位
+        volume_info TEXT,             -- 期次信息
+        FOREIGN KEY (first_author_id) REFERENCES person (id)
+    )
+    ''',
+}
+
+# 二级索引：覆盖外键关联、下拉筛选、分组统计、日期范围筛选和排序字段
+SECONDARY_INDEXES = {
+    'person': ['name', 'department', 'skill_level', 'education', 'gender', 'birth_date', 'graduation_date'],
+    'project': ['leader_id', 'status', 'start_date', 'end_date', 'name'],
+    'standard': ['participant_id', 'type', 'release_date', 'implementation_date', 'code', 'name'],
+    'patent': ['owner_id', 'type', 'certificate', 'application_date', 'grant_date', 'patent_number', 'name'],
+    'paper': ['first_author_id', 'journal_type', 'journal', 'publish_date', 'title'],
+}
+
+def create_schema(conn):
+    """
+    创建所有数据表和人员关联表（已存在的表不受影响）
+
+    参数:
+    - conn: 数据库连接
+    """
+    cursor = conn.cursor()
+    for definition in TABLE_DEFINITIONS.values():
+        cursor.execute(definition)
+    conn.commit()
+
+    # 人员关联表（旧数据库会在此处完成迁移）
+    create_relation_tables(conn)
+    conn.commit()
+
+def _migration_secondary_indexes(conn):
+    # 迁移1：为常用筛选、关联和排序字段创建索引
+    for table, columns in SECONDARY_INDEXES.items():
+        for column in columns:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+    # 收集统计信息，帮助查询优化器选择索引
+    conn.execute("ANALYZE")
+
+# 全文索引字段：FTS5 trigram 分词器按三字符切分，无需中文分词即可做子串匹配
+FTS_COLUMNS = {
+    'person': ['name', 'title', 'department', 'position', 'major', 'school', 'phone', 'id_card'],
+    'project': ['name', 'outcome'],
+    'standard': ['name', 'code', 'company'],
+    'patent': ['name', 'company', 'patent_number'],
+    'paper': ['title', 'journal', 'organization', 'volume_info'],
+}
+
+# trigram 索引能匹配的最短关键词长度，更短的关键词退回 LIKE 查询
+FTS_MIN_KEYWORD_LENGTH = 3
+
+def _migration_fulltext_index(conn):
+    # 迁移2：创建外部内容模式的FTS5全文索引表，并用触发器与主表保持同步
+    for table, columns in FTS_COLUMNS.items():
+        fts_table = f"{table}_fts"
+        column_list = ', '.join(columns)
+        new_values = ', '.join(f"NEW.{column}" for column in columns)
+        old_values = ', '.join(f"OLD.{column}" for column in columns)
+
+        conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table}
+        USING fts5({column_list}, content='{table}', content_rowid='id', tokenize='trigram')
         ''')
-        
-        # 创建项目表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS project (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            start_date TEXT,
-            end_date TEXT,
-            members TEXT,  -- 存储人员id，以逗号分隔
-            leader_id INTEGER,
-            outcome TEXT,
-            status TEXT DEFAULT "进行中",
-            FOREIGN KEY (leader_id) REFERENCES person (id)
-        )
+
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        END
+        ''')
+
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+        END
         ''')
-        
-        # 创建标准表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS standard (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,          -- 标准名称
-            type TEXT NOT NULL,          -- 标准性质（国标、行标等）
-            code TEXT NOT NULL,          -- 标准号
-            release_date TEXT,           -- 发布日期
-            implementation_date TEXT,    -- 实施日期
-            company TEXT,                -- 参与单位
-            participant_id INTEGER,      -- 参与人员ID
-            FOREIGN KEY (participant_id) REFERENCES person (id)
-        )
+
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_update AFTER UPDATE OF {column_list} ON {table}
+        BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});
+            INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.id, {new_values});
+        END
         ''')
-        
-        # 创建专利表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS patent (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,          -- 专利名称
-            type TEXT NOT NULL,          -- 专利类型（发明、实用新型、外观设计）
-            application_date TEXT,       -- 申请日期
-            grant_date TEXT,             -- 授权日期
-            owner_id INTEGER,            -- 专利所有人（人员ID）
-            participants TEXT,           -- 其他参与人员（以逗号分隔的ID）
-            company TEXT,                -- 申请单位
-            patent_number TEXT,          -- 专利号
-            certificate TEXT DEFAULT "无", -- 证书状态
-            FOREIGN KEY (owner_id) REFERENCES person (id)
-        )
+
+        # 根据主表现有数据重建索引
+        conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+def keyword_condition(table, columns, keyword):
+    """
+    构建在指定字段中模糊搜索关键词的查询条件，优先使用全文索引
+
+    参数:
+    - table: 表名
+    - columns: 要搜索的字段列表
+    - keyword: 搜索关键词
+
+    返回:
+    - (str, list): 条件SQL和对应的参数
+    """
+    indexed = [column for column in columns if column in FTS_COLUMNS.get(table, [])]
+    others = [column for column in columns if column not in indexed]
+
+    conditions = []
+    params = []
+    if indexed and len(keyword) >= FTS_MIN_KEYWORD_LENGTH:
+        # 限定列并按短语匹配，双引号需要转义
+        phrase = '"' + keyword.replace('"', '""') + '"'
+        conditions.append(f"id IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH ?)")
+        params.append(f"{{{' '.join(indexed)}}} : {phrase}")
+    else:
+        others = columns
+
+    for column in others:
+        conditions.append(f"{column} LIKE ?")
+        params.append(f"%{keyword}%")
+
+    return "(" + " OR ".join(conditions) + ")", params
+
+# 人员列表字段对应的关联表查询条件，{person_ids} 为返回人员ID的子查询
+PERSON_LIST_FIELDS = {
+    'project': {'members': "id IN (SELECT project_id FROM project_member WHERE person_id IN ({person_ids}))"},
+    'patent': {'participants': "id IN (SELECT patent_id FROM patent_participant WHERE person_id IN ({person_ids}))"},
+    'paper': {'co_authors': "id IN (SELECT paper_id FROM paper_coauthor WHERE person_id IN ({person_ids}))"}
+}
+
+# 关键词按人名搜索时，各实体类型需要匹配的人员字段条件
+PERSON_RELATION_CONDITIONS = {
+    'project': ["leader_id IN ({person_ids})", PERSON_LIST_FIELDS['project']['members']],
+    'standard': ["participant_id IN ({person_ids})"],
+    'patent': ["owner_id IN ({person_ids})", PERSON_LIST_FIELDS['patent']['participants']],
+    'paper': ["first_author_id IN ({person_ids})", PERSON_LIST_FIELDS['paper']['co_authors']]
+}
+
+def person_keyword_conditions(entity_type, keyword):
+    """
+    构建按人名关键词匹配负责人、成员、作者等人员字段的查询条件
+
+    参数:
+    - entity_type: 实体类型
+    - keyword: 搜索关键词
+
+    返回:
+    - (list, list): 条件SQL列表和对应的参数
+    """
+    name_condition, name_params = keyword_condition('person', ['name'], keyword)
+    person_ids = f"SELECT id FROM person WHERE {name_condition}"
+
+    conditions = []
+    params = []
+    for condition in PERSON_RELATION_CONDITIONS.get(entity_type, []):
+        conditions.append(condition.format(person_ids=person_ids))
+        params.extend(name_params)
+    return conditions, params
+
+def _migration_change_counter(conn):
+    # 迁移3：每张主表一个修改计数器，任意新增、修改、删除都会使计数加一，供缓存判断数据是否变化
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS data_change (
+        table_name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    ''')
+
+    for table in TABLE_DEFINITIONS:
+        conn.execute("INSERT OR IGNORE INTO data_change (table_name, version) VALUES (?, 0)", (table,))
+        for event in ('INSERT', 'UPDATE', 'DELETE'):
+            conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_change_{event.lower()} AFTER {event} ON {table}
+            BEGIN
+                UPDATE data_change SET version = version + 1 WHERE table_name = '{table}';
+            END
+            ''')
+
+def get_data_version(conn, tables=None):
+    """
+    获取数据表的修改计数，计数变化说明表中数据发生过写入
+
+    参数:
+    - conn: 数据库连接
+    - tables: 表名列表，为None时返回所有表计数之和
+
+    返回:
+    - int: 修改计数
+    """
+    if tables is None:
+        row = conn.execute("SELECT COALESCE(SUM(version), 0) FROM data_change").fetchone()
+    else:
+        placeholders = ', '.join('?' for _ in tables)
+        row = conn.execute(
+            f"SELECT COALESCE(SUM(version), 0) FROM data_change WHERE table_name IN ({placeholders})",
+            list(tables)
+        ).fetchone()
+    return row[0]
+
+# 人员贡献统计字段及其计算方式，{person_id} 为人员ID表达式，均可通过索引完成
+CONTRIBUTION_COLUMNS = {
+    'project_count': '''(SELECT COUNT(*) FROM (
+        SELECT project_id FROM project_member WHERE person_id = {person_id}
+        UNION
+        SELECT id FROM project WHERE leader_id = {person_id}))''',
+    'standard_count': "(SELECT COUNT(*) FROM standard WHERE participant_id = {person_id})",
+    'patent_owner_count': "(SELECT COUNT(*) FROM patent WHERE owner_id = {person_id})",
+    'patent_participant_count': "(SELECT COUNT(*) FROM patent_participant WHERE person_id = {person_id})",
+    'paper_first_author_count': "(SELECT COUNT(*) FROM paper WHERE first_author_id = {person_id})",
+    'paper_co_author_count': "(SELECT COUNT(*) FROM paper_coauthor WHERE person_id = {person_id})",
+}
+
+# 引用人员的字段：表名 -> 人员ID列，这些字段变化时需要重新计算相关人员的贡献统计
+CONTRIBUTION_SOURCES = {
+    'project': 'leader_id',
+    'standard': 'participant_id',
+    'patent': 'owner_id',
+    'paper': 'first_author_id',
+    'project_member': 'person_id',
+    'patent_participant': 'person_id',
+    'paper_coauthor': 'person_id',
+}
+
+def _refresh_contribution_sql(person_id_expr=None):
+    # 重新计算人员贡献统计的语句：指定人员ID表达式时只计算该人员（人员不存在时不写入），否则计算全部人员
+    # 使用 UPSERT 而非 INSERT OR REPLACE：触发器内的冲突处理方式会被外层语句（如 INSERT OR IGNORE）覆盖
+    columns = ', '.join(CONTRIBUTION_COLUMNS)
+    values = ', '.join(expr.format(person_id='p.id') for expr in CONTRIBUTION_COLUMNS.values())
+    updates = ', '.join(f"{column} = excluded.{column}" for column in CONTRIBUTION_COLUMNS)
+    where = f"p.id = {person_id_expr}" if person_id_expr else "1"
+    return f'''
+            INSERT INTO person_contribution (person_id, {columns})
+            SELECT p.id, {values} FROM person p WHERE {where}
+            ON CONFLICT (person_id) DO UPDATE SET {updates};'''
+
+def _contribution_update_trigger_sql(table, column):
+    # 引用人员的字段修改时重新计算原人员和新人员，字段值未变化时（如批量修改中未涉及的行）跳过
+    return f'''
+        CREATE TRIGGER IF NOT EXISTS trg_person_contribution_{table}_update AFTER UPDATE OF {column} ON {table}
+        WHEN OLD.{column} IS NOT NEW.{column}
+        BEGIN{_refresh_contribution_sql(f"OLD.{column}")}{_refresh_contribution_sql(f"NEW.{column}")}
+        END
+        '''
+
+def _migration_person_contribution(conn):
+    # 迁移4：人员贡献统计汇总表，由触发器在相关数据变化时增量维护
+    count_columns = ',\n        '.join(f"{column} INTEGER NOT NULL DEFAULT 0" for column in CONTRIBUTION_COLUMNS)
+    total_expr = ' + '.join(CONTRIBUTION_COLUMNS)
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS person_contribution (
+        person_id INTEGER PRIMARY KEY,
+        {count_columns},
+        total_count INTEGER GENERATED ALWAYS AS ({total_expr}) VIRTUAL
+    )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_person_contribution_total ON person_contribution (total_count)")
+
+    # 人员新增、删除时同步汇总表
+    conn.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS trg_person_contribution_person_insert AFTER INSERT ON person
+    BEGIN{_refresh_contribution_sql("NEW.id")}
+    END
+    ''')
+    conn.execute('''
+    CREATE TRIGGER IF NOT EXISTS trg_person_contribution_person_delete AFTER DELETE ON person
+    BEGIN
+        DELETE FROM person_contribution WHERE person_id = OLD.id;
+    END
+    ''')
+
+    # 各引用字段新增、修改、删除时重新计算涉及的人员
+    for table, column in CONTRIBUTION_SOURCES.items():
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_person_contribution_{table}_insert AFTER INSERT ON {table}
+        BEGIN{_refresh_contribution_sql(f"NEW.{column}")}
+        END
         ''')
-        
-        # 创建论文表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS paper (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            title TEXT NOT NULL,          -- 论文标题
-            journal TEXT NOT NULL,        -- 期刊名称
-            journal_type TEXT NOT NULL,   -- 期刊类型（核心期刊、SCI等）
-            publish_date TEXT,            -- 发表日期
-            first_author_id INTEGER,      -- 第一作者ID
-            co_authors TEXT,              -- 合作作者ID（以逗号分隔）
-            organization TEXT,            -- 作者单位
-            volume_info TEXT,             -- 期次信息
-            FOREIGN KEY (first_author_id) REFERENCES person (id)
-        )
+        conn.execute(_contribution_update_trigger_sql(table, column))
+        conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_person_contribution_{table}_delete AFTER DELETE ON {table}
+        BEGIN{_refresh_contribution_sql(f"OLD.{column}")}
+        END
         ''')
-        
+
+    # 根据现有数据计算所有人员的统计
+    conn.execute(_refresh_contribution_sql())
+
+def _migration_query_log(conn):
+    # 迁移5：慢查询日志表，由 components/query_log.py 的后台线程写入
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS query_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        logged_at TEXT NOT NULL,
+        sql TEXT NOT NULL,
+        params TEXT,
+        duration_ms REAL NOT NULL,
+        rows INTEGER,
+        caller TEXT,
+        page TEXT
+    )
+    ''')
+
+def _migration_row_version(conn):
+    # 迁移6：行版本号，每次通过编辑表单或导入更新一行时加一，编辑表单保存时据此发现并发修改。
+    # 带常量默认值的 ADD COLUMN 只修改表结构，不重写已有数据
+    for table in TABLE_DEFINITIONS:
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+        if 'version' not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+def _migration_incremental_triggers(conn):
+    # 迁移7：人员列表和人员字段的更新触发器改为只处理实际变化的人员，
+    # 批量修改或替换人员时不再删除重建未变化的关联行、逐个重新计算所有成员的贡献统计
+    for relation in RELATION_TABLES:
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (relation,)).fetchone()
+        if exists:
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{relation}_update")
+            conn.execute(_relation_update_trigger_sql(relation))
+    for table, column in CONTRIBUTION_SOURCES.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_person_contribution_{table}_update")
+        conn.execute(_contribution_update_trigger_sql(table, column))
+
+def _migration_uppercase_id_card(conn):
+    # 迁移8：身份证号末位的校验码 x 统一存储为大写 X，与导入和编辑表单的写入方式一致。
+    # 大写形式已存在的记录（同一人被录入两次）不修改，以免违反唯一索引，需人工合并
+    conn.execute('''
+        UPDATE person SET id_card = UPPER(id_card)
+        WHERE id_card GLOB '*x'
+          AND NOT EXISTS (SELECT 1 FROM person other WHERE other.id_card = UPPER(person.id_card))
+    ''')
+
+# 按顺序编号的迁移列表：第N项执行后 user_version 变为N，新增迁移只能追加到末尾
+MIGRATIONS = [
+    _migration_secondary_indexes,
+    _migration_fulltext_index,
+    _migration_change_counter,
+    _migration_person_contribution,
+    _migration_query_log,
+    _migration_row_version,
+    _migration_incremental_triggers,
+    _migration_uppercase_id_card,
+]
+
+def run_migrations(conn):
+    """
+    依次执行尚未应用的迁移，已应用的版本号记录在 PRAGMA user_version 中
+
+    参数:
+    - conn: 数据库连接
+
+    返回:
+    - int: 迁移后的数据库版本号
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for number, migration in enumerate(MIGRATIONS, start=1):
+        if number <= version:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            migration(conn)
+            # user_version 不能使用参数绑定
+            conn.execute(f"PRAGMA user_version = {number}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = number
+    return version
+
+def migrate(conn):
+    """
+    创建表结构并执行全部迁移
+
+    参数:
+    - conn: 数据库连接
+    """
+    create_schema(conn)
+    run_migrations(conn)
+
+@contextmanager
+def bulk_load(conn):
+    """
+    批量写入上下文：在一个事务中临时删除所有触发器和二级索引，写入完成后重建，
+    并一次性刷新关联表、全文索引、人员贡献统计和修改计数，避免逐行维护派生数据
+
+    用法:
+    with bulk_load(conn):
+        conn.executemany("INSERT INTO person ...", rows)
+
+    参数:
+    - conn: 已完成迁移的数据库连接，期间不应有其他连接写入
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        derived = conn.execute('''
+            SELECT type, name FROM sqlite_master
+            WHERE type = 'trigger' OR (type = 'index' AND sql IS NOT NULL)
+        ''').fetchall()
+        for object_type, name in derived:
+            conn.execute(f"DROP {object_type.upper()} IF EXISTS {name}")
+
+        yield conn
+
+        # 关联表按主表中的逗号分隔列整体重建
+        for relation in RELATION_TABLES:
+            conn.execute(f"DELETE FROM {relation}")
+            conn.execute(_fill_relation_sql(relation))
+        conn.execute("DELETE FROM person_contribution WHERE person_id NOT IN (SELECT id FROM person)")
+
+        # 迁移均可重复执行：重新创建触发器和索引，重建全文索引并重新计算贡献统计
+        create_relation_tables(conn)
+        for migration in MIGRATIONS:
+            migration(conn)
+
+        # 期间触发器未生效，所有表的修改计数加一使缓存失效
+        conn.execute("UPDATE data_change SET version = version + 1")
         conn.commit()
-        conn.close()
+    except BaseException:
+        conn.rollback()
+        raise
+
+# 检查数据库是否存在并初始化
+def init_db():
+    # 检查数据库文件是否存在
+    if not os.path.exists(DB_FILE):
+        print("数据库文件不存在，请先运行 generate_data.py 生成数据")
+
+    # 首次获取连接时会创建缺失的表并执行数据库迁移
+    conn = get_connection()
+    conn.close()
     
     # 验证表是否存在
     conn = get_connection()
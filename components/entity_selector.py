@@ -0,0 +1,161 @@
+import streamlit as st
+from components.db_utils import get_connection, keyword_condition
+from components.lookup import ENTITY_LABEL_COLUMNS, get_entity_labels
+
+# 下拉框中最多显示的匹配记录数
+SELECTOR_TOP_K = 50
+
+# 前缀范围查询的上界后缀：大于任何实际出现的字符
+_PREFIX_UPPER = '\U0010ffff'
+
+def search_entities(conn, entity_type, keyword, limit=SELECTOR_TOP_K):
+    """
+    在数据库中按名称搜索实体，只返回前 limit 条匹配记录
+
+    依次匹配：关键词为数字时的ID、名称前缀（通过名称索引的范围查询）、
+    前缀结果不足时再按名称包含关键词补足（全文索引或LIKE）；关键词为空时返回ID最小的记录
+
+    参数:
+    - conn: 数据库连接
+    - entity_type: 实体类型
+    - keyword: 搜索关键词
+    - limit: 最多返回的记录数
+
+    返回:
+    - list: 匹配的实体ID，按匹配程度和名称排序
+    """
+    column = ENTITY_LABEL_COLUMNS[entity_type]
+    keyword = keyword.strip()
+    if not keyword:
+        return [row[0] for row in conn.execute(f"SELECT id FROM {entity_type} ORDER BY id LIMIT ?", (limit,))]
+
+    ids = []
+    if keyword.isdigit():
+        ids.extend(row[0] for row in conn.execute(f"SELECT id FROM {entity_type} WHERE id = ?", (int(keyword),)))
+
+    ids.extend(row[0] for row in conn.execute(
+        f"SELECT id FROM {entity_type} WHERE {column} >= ? AND {column} < ? ORDER BY {column}, id LIMIT ?",
+        (keyword, keyword + _PREFIX_UPPER, limit)
+    ))
+
+    if len(ids) < limit:
+        condition, params = keyword_condition(entity_type, [column], keyword)
+        ids.extend(row[0] for row in conn.execute(
+            f"SELECT id FROM {entity_type} WHERE {condition} ORDER BY {column}, id LIMIT ?",
+            params + [limit * 2]
+        ))
+
+    # 去掉重复的ID，保留先出现的匹配
+    return list(dict.fromkeys(ids))[:limit]
+
+def _search_options(entity_type, key, label, limit):
+    # 显示搜索框并返回前 limit 条匹配记录的ID，结果被截断时显示提示
+    keyword = st.text_input(f"搜索{label.removeprefix('选择')}", key=f"{key}_search",
+                            placeholder="输入名称开头的文字或ID")
+    conn = get_connection()
+    try:
+        options = search_entities(conn, entity_type, keyword, limit + 1)
+    finally:
+        conn.close()
+    if len(options) > limit:
+        st.caption(f"仅显示前 {limit} 条匹配记录，请输入更多文字缩小范围")
+    return options[:limit]
+
+def entity_selectbox(label, entity_type, key, on_change=None, limit=SELECTOR_TOP_K):
+    """
+    可搜索的实体下拉选择：输入名称前缀或ID后在数据库中搜索，
+    下拉框只包含前 limit 条匹配记录和当前选中的记录，选项显示名称通过ID到名称的映射获取
+
+    参数:
+    - label: 下拉框标签
+    - entity_type: 实体类型
+    - key: 下拉框的会话状态键，搜索框使用 f"{key}_search"
+    - on_change: 选择变化时的回调函数
+    - limit: 最多显示的匹配记录数
+
+    返回:
+    - int: 选中的实体ID，没有任何记录时为None
+    """
+    labels = get_entity_labels(entity_type)
+    if not labels:
+        return None
+
+    options = _search_options(entity_type, key, label, limit)
+
+    # 保留当前选中的记录，搜索结果变化时选择不会丢失
+    selected = st.session_state.get(key)
+    if selected in labels and selected not in options:
+        options.insert(0, selected)
+
+    if not options:
+        st.caption("没有匹配的记录")
+        return None
+
+    return st.selectbox(label, options, key=key, on_change=on_change,
+                        format_func=lambda x: labels.get(x, f"ID:{x}"))
+
+def _reset_on_scope(key, scope, value):
+    # 编辑的记录变化（scope 不同）或组件状态已被清除时，以初始值重置组件的选择
+    scope_key = f"{key}_scope"
+    if key not in st.session_state or st.session_state.get(scope_key) != scope:
+        st.session_state[scope_key] = scope
+        st.session_state[key] = value
+
+def entity_multiselect(label, entity_type, key, initial, scope, exclude=(), limit=SELECTOR_TOP_K):
+    """
+    可搜索的实体多选：下拉框只包含已选中的记录和前 limit 条匹配记录，
+    选中的ID保存在组件的会话状态中，搜索条件变化时不会丢失。
+    因为搜索需要刷新页面，需放在 st.form 之外使用
+
+    参数:
+    - label: 多选框标签
+    - entity_type: 实体类型
+    - key: 多选框的会话状态键，搜索框使用 f"{key}_search"
+    - initial: 初始选中的ID列表
+    - scope: 初始值所属的记录（如正在编辑的记录ID），变化时重新载入 initial
+    - exclude: 不允许选择的ID
+    - limit: 最多显示的匹配记录数
+
+    返回:
+    - list: 选中的实体ID
+    """
+    labels = get_entity_labels(entity_type)
+    _reset_on_scope(key, scope, [x for x in initial if x in labels])
+    options = _search_options(entity_type, key, label, limit)
+
+    selected = [x for x in st.session_state[key] if x not in exclude]
+    st.session_state[key] = selected
+    options = selected + [x for x in options if x not in selected and x not in exclude]
+
+    return st.multiselect(label, options, key=key, format_func=lambda x: labels.get(x, f"ID:{x}"))
+
+def optional_entity_selectbox(label, entity_type, key, initial, scope, exclude=(), limit=SELECTOR_TOP_K):
+    """
+    可搜索的实体单选，第一个选项“无”表示不选择，选中的ID保存在组件的会话状态中。
+    因为搜索需要刷新页面，需放在 st.form 之外使用
+
+    参数:
+    - label: 下拉框标签
+    - entity_type: 实体类型
+    - key: 下拉框的会话状态键，搜索框使用 f"{key}_search"
+    - initial: 初始选中的ID，None 表示无
+    - scope: 初始值所属的记录（如正在编辑的记录ID），变化时重新载入 initial
+    - exclude: 不允许选择的ID
+    - limit: 最多显示的匹配记录数
+
+    返回:
+    - int: 选中的实体ID，选择“无”时为None
+    """
+    labels = get_entity_labels(entity_type)
+    # 0 表示"无"选项
+    _reset_on_scope(key, scope, initial if initial in labels else 0)
+    options = _search_options(entity_type, key, label, limit)
+
+    selected = st.session_state[key]
+    if selected in exclude:
+        selected = st.session_state[key] = 0
+    options = [0] + ([selected] if selected else []) + [x for x in options if x != selected and x not in exclude]
+
+    choice = st.selectbox(label, options, key=key,
+                          format_func=lambda x: "无" if x == 0 else labels.get(x, f"ID:{x}"))
+    return choice or None
@@ -0,0 +1,221 @@
+import os
+import time
+import tempfile
+import streamlit as st
+import pandas as pd
+import xlsxwriter
+from components.db_utils import get_connection
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# 每次从数据库读取并写入Excel的行数
+EXPORT_CHUNK_SIZE = 5000
+
+# 生成的Excel文件存放目录，可通过环境变量 PROJECT_MANAGER_EXPORT_DIR 指定
+EXPORT_DIR = os.environ.get('PROJECT_MANAGER_EXPORT_DIR',
+                            os.path.join(tempfile.gettempdir(), 'project_manager_exports'))
+
+# 生成的Excel文件保留时间（秒），超时后删除（会话关闭后其文件不会再被主动删除，由此清理）
+EXPORT_MAX_AGE = int(os.environ.get('PROJECT_MANAGER_EXPORT_MAX_AGE', '7200'))
+
+def dataframe_chunks(df, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    将已在内存中的DataFrame按块输出，供 write_excel 使用
+
+    参数:
+    - df: 数据
+    - chunk_size: 每块行数
+    """
+    if df.empty:
+        yield df
+        return
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+def query_chunks(query, params=None, chunk_size=EXPORT_CHUNK_SIZE, transform=None):
+    """
+    通过游标分块读取查询结果，内存占用与结果总行数无关
+
+    参数:
+    - query: SQL查询
+    - params: 查询参数
+    - chunk_size: 每块行数
+    - transform: 对每块DataFrame进行格式化的函数（如将人员ID转换为姓名）
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.execute(query, params or [])
+        columns = [description[0] for description in cursor.description]
+        # 第一块即使为空也输出，保证写入表头
+        rows = cursor.fetchmany(chunk_size)
+        while True:
+            chunk = pd.DataFrame.from_records(rows, columns=columns)
+            yield transform(chunk) if transform else chunk
+            if len(rows) < chunk_size:
+                break
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+    finally:
+        conn.close()
+
+def _cell_value(value):
+    # 转换为xlsxwriter可写入的值：空值写为空单元格，numpy标量转换为Python类型
+    if value is None:
+        return None
+    if not isinstance(value, str) and pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return str(value)
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def write_excel(path, sheets):
+    """
+    以 constant_memory 模式逐行写入Excel文件，已写出的行不会保留在内存中
+
+    参数:
+    - path: 输出文件路径
+    - sheets: [(工作表名, DataFrame块的可迭代对象), ...]
+    """
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        header_format = workbook.add_format({'bold': True})
+        for sheet_name, chunks in sheets:
+            # Excel限制工作表名不超过31个字符
+            worksheet = workbook.add_worksheet(str(sheet_name)[:31])
+            row = 0
+            for chunk in chunks:
+                if row == 0:
+                    worksheet.write_row(0, 0, [str(column) for column in chunk.columns], header_format)
+                    row = 1
+                for values in chunk.itertuples(index=False, name=None):
+                    worksheet.write_row(row, 0, [_cell_value(value) for value in values])
+                    row += 1
+    finally:
+        workbook.close()
+
+def sweep_exports(max_age=EXPORT_MAX_AGE, export_dir=EXPORT_DIR):
+    """
+    删除超过保留时间的导出文件
+
+    参数:
+    - max_age: 保留时间（秒）
+    - export_dir: 导出文件目录
+
+    返回:
+    - list: 被删除的文件路径
+    """
+    if not os.path.isdir(export_dir):
+        return []
+    cutoff = time.time() - max_age
+    removed = []
+    for name in os.listdir(export_dir):
+        if not (name.startswith("export_") and name.endswith(".xlsx")):
+            continue
+        path = os.path.join(export_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed.append(path)
+        except FileNotFoundError:
+            # 其他会话同时删除了该文件
+            continue
+    return removed
+
+def _write_temp_excel(sheets):
+    # 写入临时文件并返回路径，同时清理过期的导出文件
+    sweep_exports()
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    handle, path = tempfile.mkstemp(prefix="export_", suffix=".xlsx", dir=EXPORT_DIR)
+    os.close(handle)
+    try:
+        write_excel(path, sheets)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+def excel_export_button(build_sheets, filename, key, label="生成Excel文件"):
+    """
+    两步导出：点击生成按钮后才查询并写入Excel文件，再通过下载按钮提供下载
+
+    参数:
+    - build_sheets: 返回 [(工作表名, DataFrame块的可迭代对象), ...] 的函数
+    - filename: 下载文件名
+    - key: 组件唯一标识
+    - label: 生成按钮文字
+    """
+    state_key = f"excel_export_{key}"
+
+    if st.button(label, key=f"{state_key}_build"):
+        with st.spinner("正在生成Excel文件..."):
+            path = _write_temp_excel(build_sheets())
+
+        # 删除之前生成的文件
+        previous = st.session_state.get(state_key)
+        if previous and os.path.exists(previous['path']):
+            os.remove(previous['path'])
+        st.session_state[state_key] = {'path': path, 'filename': filename}
+
+    export = st.session_state.get(state_key)
+    if export and os.path.exists(export['path']):
+        with open(export['path'], 'rb') as f:
+            st.download_button("下载Excel文件", data=f, file_name=export['filename'],
+                               mime=EXCEL_MIME, key=f"{state_key}_download")
+
+def discard_export(key):
+    """
+    删除 excel_export_button 已生成的文件和下载按钮（生成时使用的数据已失效时调用）
+
+    参数:
+    - key: 与 excel_export_button 相同的组件唯一标识
+    """
+    export = st.session_state.pop(f"excel_export_{key}", None)
+    if export and os.path.exists(export['path']):
+        os.remove(export['path'])
+
+def save_query_results(results, filename_base, key):
+    """
+    保存查询结果，供 excel_results_export 在之后的页面刷新中按需导出
+    （查询按钮只在点击的那次刷新中为True，点击导出按钮时查询结果已不在页面上）
+
+    参数:
+    - results: {结果名称: DataFrame}，为空时清除之前保存的结果
+    - filename_base: 文件名前缀
+    - key: 组件唯一标识前缀
+    """
+    state_key = f"excel_results_{key}"
+    # 上一次查询生成的文件不再对应当前结果
+    previous = st.session_state.pop(state_key, None)
+    if previous:
+        for name in list(previous['results']) + ['all']:
+            discard_export(f"{key}_{name}")
+    if results:
+        st.session_state[state_key] = {'results': results, 'filename_base': filename_base}
+
+def excel_results_export(key):
+    """
+    为最近一次查询的结果提供两步导出：每个结果一个生成按钮，多于一个结果时额外提供包含全部结果的文件，
+    点击生成按钮后才写入对应的Excel文件
+
+    参数:
+    - key: 组件唯一标识前缀，与 save_query_results 一致
+    """
+    saved = st.session_state.get(f"excel_results_{key}")
+    if not saved:
+        return
+
+    results = saved['results']
+    filename_base = saved['filename_base']
+    st.subheader("导出查询结果")
+    st.caption(f"最近一次查询：{filename_base}")
+
+    for name, df in results.items():
+        excel_export_button(lambda name=name, df=df: [(name, dataframe_chunks(df))],
+                            f"{filename_base}_{name}.xlsx", key=f"{key}_{name}", label=f"生成{name}的Excel文件")
+
+    if len(results) > 1:
+        excel_export_button(lambda: [(name, dataframe_chunks(df)) for name, df in results.items()],
+                            f"{filename_base}_全部数据.xlsx", key=f"{key}_all", label="生成包含所有查询结果的Excel文件")
@@ -0,0 +1,594 @@
+import os
+import re
+import json
+import codecs
+import datetime
+from itertools import islice
+import pandas as pd
+import openpyxl
+from components.db_utils import get_connection, transaction
+from components.repository import (
+    ENTITY_LABELS, CHOICE_COLUMNS, PERSON_COLUMNS, PERSON_LIST_COLUMNS, column_label
+)
+from components.table_utils import COLUMN_TRANSLATIONS
+from components.validation import validate_id_cards, validate_phones, ID_CARD_ERRORS, PHONE_ERRORS
+
+# 每块读取、校验并写入的行数，每块在一个事务中写入
+IMPORT_CHUNK_SIZE = 5000
+
+# 各实体可导入的字段：COLUMN_TRANSLATIONS 中的键 -> 数据库列
+# 负责人、参与人员等人员字段可填写姓名或人员ID，多人以逗号分隔；同时提供ID列时优先使用ID列
+IMPORT_FIELDS = {
+    'person': {
+        'name': 'name', 'gender': 'gender', 'birth_date': 'birth_date', 'id_card': 'id_card',
+        'education': 'education', 'school': 'school', 'graduation_date': 'graduation_date',
+        'major': 'major', 'title': 'title', 'phone': 'phone', 'department': 'department',
+        'position': 'position', 'skill_level': 'skill_level',
+    },
+    'project': {
+        'project_name': 'name', 'start_date': 'start_date', 'end_date': 'end_date',
+        'leader_id': 'leader_id', 'leader': 'leader_id', 'members': 'members',
+        'status': 'status', 'outcome': 'outcome',
+    },
+    'standard': {
+        'standard_name': 'name', 'type': 'type', 'code': 'code', 'release_date': 'release_date',
+        'implementation_date': 'implementation_date', 'company': 'company',
+        'participant_id': 'participant_id', 'participant': 'participant_id',
+    },
+    'patent': {
+        'patent_name': 'name', 'type': 'type', 'application_date': 'application_date',
+        'grant_date': 'grant_date', 'owner_id': 'owner_id', 'owner': 'owner_id',
+        'participants': 'participants', 'company': 'company', 'patent_number': 'patent_number',
+        'certificate': 'certificate',
+    },
+    'paper': {
+        'title': 'title', 'journal': 'journal', 'journal_type': 'journal_type',
+        'publish_date': 'publish_date', 'first_author_id': 'first_author_id', 'first_author': 'first_author_id',
+        'co_authors': 'co_authors', 'organization': 'organization', 'volume_info': 'volume_info',
+    },
+}
+
+# 导入时额外接受的表头：本应用其他页面导出的列名（关联查询导出、编辑表单标签）-> IMPORT_FIELDS 中的字段键，
+# 使导出的文件可以直接导入
+IMPORT_ALIASES = {
+    'person': {'手机号码': 'phone'},
+    'project': {'项目负责人': 'leader', '项目成员': 'members', '项目状态': 'status', '项目成果': 'outcome'},
+    'standard': {'标准类型': 'type', '标准性质': 'type', '参与单位': 'company'},
+    'patent': {'专利类型': 'type', '申请单位': 'company'},
+    'paper': {'论文标题': 'title', '期刊名称': 'journal', '作者单位': 'organization'},
+}
+
+# 必填字段（数据库列）
+REQUIRED_COLUMNS = {
+    'person': ['name', 'id_card'],
+    'project': ['name', 'leader_id'],
+    'standard': ['name', 'type', 'code'],
+    'patent': ['name', 'type', 'patent_number'],
+    'paper': ['title', 'journal', 'journal_type'],
+}
+
+# 差异导入时用于匹配已有记录的自然键（必须都是必填列）
+NATURAL_KEYS = {
+    'person': ['id_card'],
+    'standard': ['code'],
+    'patent': ['patent_number'],
+    'paper': ['title', 'journal'],
+}
+
+# 未填写时使用的默认值（与表结构中的默认值一致）
+DEFAULT_VALUES = {
+    'project': {'status': "进行中"},
+    'patent': {'certificate': "无"},
+}
+
+DATE_COLUMNS = {
+    'birth_date', 'graduation_date', 'start_date', 'end_date', 'release_date', 'implementation_date',
+    'application_date', 'grant_date', 'publish_date',
+}
+
+# (开始日期列, 结束日期列)：结束日期不能早于开始日期
+DATE_ORDER = {
+    'project': ('start_date', 'end_date'),
+    'standard': ('release_date', 'implementation_date'),
+    'patent': ('application_date', 'grant_date'),
+}
+
+# 至少需要填写其中一项的人员字段
+ONE_OF_PERSON_COLUMNS = {
+    'patent': ('owner_id', 'participants'),
+    'paper': ('first_author_id', 'co_authors'),
+}
+
+# 多个人员之间允许的分隔符
+_PERSON_SEPARATOR = re.compile(r"[,，、;；\s]+")
+
+def field_label(entity_type, key):
+    """
+    获取导入字段的中文列名
+
+    参数:
+    - entity_type: 实体类型
+    - key: IMPORT_FIELDS 中的字段键
+
+    返回:
+    - str: 中文列名
+    """
+    # 与 translate_columns 一致，人员表中的title为职称
+    if entity_type == 'person' and key == 'title':
+        return '职称'
+    return COLUMN_TRANSLATIONS.get(key, key)
+
+def import_template(entity_type):
+    """
+    获取导入模板（只有表头的DataFrame），列名与导出文件一致
+
+    参数:
+    - entity_type: 实体类型
+
+    返回:
+    - DataFrame: 空的导入模板
+    """
+    fields = IMPORT_FIELDS[entity_type]
+    columns = []
+    for key, column in fields.items():
+        # 人员字段有ID列和姓名列两种写法，模板中只保留姓名列
+        if key.endswith('_id') and list(fields.values()).count(column) > 1:
+            continue
+        columns.append(field_label(entity_type, key))
+    return pd.DataFrame(columns=columns)
+
+def map_columns(entity_type, headers):
+    """
+    按 COLUMN_TRANSLATIONS 反向匹配文件表头，也接受英文字段名和 IMPORT_ALIASES 中的导出列名
+
+    参数:
+    - entity_type: 实体类型
+    - headers: 文件表头列表
+
+    返回:
+    - tuple: ({数据库列: [表头位置, ...]}, 未识别的表头列表)，ID列排在姓名列之前
+    """
+    lookup = {}
+    for key, column in IMPORT_FIELDS[entity_type].items():
+        for name in (field_label(entity_type, key), key, column):
+            lookup.setdefault(name, (key, column))
+    fields = IMPORT_FIELDS[entity_type]
+    for name, key in IMPORT_ALIASES[entity_type].items():
+        lookup.setdefault(name, (key, fields[key]))
+
+    sources = {}
+    ignored = []
+    seen = set()
+    for position, header in enumerate(headers):
+        header = str(header).strip()
+        match = lookup.get(header)
+        if match is None or match[0] in seen:
+            if header:
+                ignored.append(header)
+            continue
+        seen.add(match[0])
+        key, column = match
+        positions = sources.setdefault(column, [])
+        if key.endswith('_id'):
+            positions.insert(0, position)
+        else:
+            positions.append(position)
+
+    missing = [column_label(entity_type, column) for column in REQUIRED_COLUMNS[entity_type]
+               if column not in sources]
+    if missing:
+        raise ValueError(f"缺少必填列: {'、'.join(missing)}")
+    return sources, ignored
+
+def _cell_text(value):
+    # 将Excel单元格的值转换为文本，日期统一为 YYYY-MM-DD
+    if value is None:
+        return ''
+    if isinstance(value, datetime.datetime):
+        if value.time() == datetime.time():
+            return value.strftime("%Y-%m-%d")
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, datetime.date):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def _detect_encoding(stream):
+    # 根据文件开头判断CSV编码：UTF-8（含BOM）或Excel另存的GB18030
+    sample = stream.read(65536)
+    stream.seek(0)
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8-sig'
+    except UnicodeDecodeError:
+        return 'gb18030'
+
+def _csv_chunks(stream, chunk_size):
+    reader = pd.read_csv(stream, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                         encoding=_detect_encoding(stream))
+    # 表头为第1行，数据从第2行开始
+    row_number = 2
+    with reader:
+        for chunk in reader:
+            chunk.index = pd.RangeIndex(row_number, row_number + len(chunk))
+            row_number += len(chunk)
+            yield chunk
+
+def _excel_chunks(stream, chunk_size):
+    # 只读模式逐行解析，不会一次载入整个工作表
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [_cell_text(value) for value in header]
+        width = len(columns)
+        row_number = 1
+        while True:
+            batch = list(islice(rows, chunk_size))
+            if not batch:
+                break
+            records = []
+            index = []
+            for values in batch:
+                row_number += 1
+                texts = [_cell_text(value) for value in values[:width]]
+                # 跳过空行（Excel中常见的格式残留行）
+                if any(texts):
+                    records.append(texts + [''] * (width - len(texts)))
+                    index.append(row_number)
+            yield pd.DataFrame(records, columns=columns, index=index)
+    finally:
+        workbook.close()
+
+def read_chunks(stream, filename, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    按块读取CSV或Excel文件，所有值读取为文本
+
+    参数:
+    - stream: 二进制文件对象（如上传的文件）
+    - filename: 文件名，用于判断文件类型
+    - chunk_size: 每块行数
+
+    返回:
+    - 生成器: DataFrame块，索引为文件中的行号（表头为第1行）
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.csv':
+        return _csv_chunks(stream, chunk_size)
+    if extension in ('.xlsx', '.xlsm'):
+        return _excel_chunks(stream, chunk_size)
+    raise ValueError(f"不支持的文件类型: {extension or filename}，请使用CSV或Excel (.xlsx) 文件")
+
+def _resolve_persons(conn, tokens):
+    """
+    将人员ID或姓名解析为人员ID
+
+    参数:
+    - conn: 数据库连接
+    - tokens: 填写的人员ID或姓名集合
+
+    返回:
+    - dict: {填写内容: 人员ID 或 错误信息(str)}
+    """
+    ids = {token for token in tokens if token.isdigit()}
+    names = tokens - ids
+    resolved = {}
+
+    if ids:
+        existing = {row[0] for row in conn.execute(
+            "SELECT id FROM person WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps([int(token) for token in ids]),))}
+        for token in ids:
+            resolved[token] = int(token) if int(token) in existing else f"人员ID不存在: {token}"
+
+    if names:
+        matches = {name: (person_id, count) for name, person_id, count in conn.execute('''
+            SELECT name, MIN(id), COUNT(*) FROM person
+            WHERE name IN (SELECT value FROM json_each(?)) GROUP BY name
+        ''', (json.dumps(sorted(names)),))}
+        for token in names:
+            person_id, count = matches.get(token, (None, 0))
+            if count == 0:
+                resolved[token] = f"人员不存在: {token}"
+            elif count > 1:
+                resolved[token] = f"存在多名同名人员，请填写人员ID: {token}"
+            else:
+                resolved[token] = person_id
+    return resolved
+
+def _flag(errors, df, mask, column, label, message):
+    # 记录错误行：(行号, 列名, 内容, 错误信息)，message 可以是字符串或逐行的错误信息Series
+    for row in df.index[mask]:
+        errors.append((row, label, df.at[row, column],
+                       message if isinstance(message, str) else message[row]))
+
+def _validate_persons(conn, entity_type, df, errors):
+    # 解析并校验人员字段，将姓名替换为人员ID
+    columns = [column for column in df.columns if column in PERSON_COLUMNS | PERSON_LIST_COLUMNS]
+    token_lists = {column: df[column].map(lambda value: [token for token in _PERSON_SEPARATOR.split(value) if token])
+                   for column in columns}
+
+    tokens = set()
+    for lists in token_lists.values():
+        for values in lists:
+            tokens.update(values)
+    resolved = _resolve_persons(conn, tokens) if tokens else {}
+
+    for column in columns:
+        label = column_label(entity_type, column)
+        lists = token_lists[column]
+        if column in PERSON_COLUMNS:
+            too_many = lists.map(len) > 1
+            _flag(errors, df, too_many, column, label, "只能填写一名人员")
+            lists = lists.where(~too_many, lists.map(lambda values: values[:1]))
+
+        problems = lists.map(lambda values: '；'.join(
+            resolved[token] for token in values if isinstance(resolved[token], str)))
+        _flag(errors, df, problems != '', column, label, problems)
+
+        # 去重并保持填写顺序
+        ids = lists.map(lambda values: list(dict.fromkeys(
+            resolved[token] for token in values if not isinstance(resolved[token], str))))
+        df[column] = ids.map(lambda values: ','.join(str(person_id) for person_id in values))
+
+    # 项目成员必须包含主负责人
+    if entity_type == 'project' and 'leader_id' in df.columns:
+        members = df['members'] if 'members' in df.columns else pd.Series('', index=df.index)
+        missing = pd.Series([leader != '' and leader not in value.split(',')
+                             for leader, value in zip(df['leader_id'], members)], index=df.index, dtype=bool)
+        df['members'] = members.where(~missing, (df['leader_id'] + ',' + members).str.rstrip(','))
+
+    if entity_type in ONE_OF_PERSON_COLUMNS:
+        first, second = ONE_OF_PERSON_COLUMNS[entity_type]
+        empty = pd.Series(True, index=df.index)
+        for column in (first, second):
+            if column in df.columns:
+                empty &= df[column] == ''
+        message = f"{column_label(entity_type, first)}和{column_label(entity_type, second)}至少需要填写一项"
+        if first not in df.columns:
+            df[first] = ''
+        _flag(errors, df, empty, first, column_label(entity_type, first), message)
+
+def validate_chunk(conn, entity_type, df, check_existing=True, apply_defaults=True):
+    """
+    批量校验一块数据，并将数据规范化为可直接写入数据库的格式
+
+    参数:
+    - conn: 数据库连接（用于检查人员引用和身份证号是否已存在）
+    - entity_type: 实体类型
+    - df: 以数据库列为列名的文本数据，索引为文件行号
+    - check_existing: 是否将数据库中已存在的身份证号视为错误（差异导入时不检查）
+    - apply_defaults: 是否为空白的字段填入默认值（差异导入时只对新记录填入，见 _upsert_staged）
+
+    返回:
+    - tuple: (校验通过的DataFrame, 错误列表[(行号, 列名, 内容, 错误信息), ...])
+    """
+    errors = []
+
+    if apply_defaults:
+        for column, value in DEFAULT_VALUES.get(entity_type, {}).items():
+            df[column] = df[column].mask(df[column] == '', value) if column in df.columns else value
+
+    for column in REQUIRED_COLUMNS[entity_type]:
+        label = column_label(entity_type, column)
+        _flag(errors, df, df[column] == '', column, label, f"{label}不能为空")
+
+    for column, choices in CHOICE_COLUMNS[entity_type].items():
+        if column in df.columns:
+            invalid = (df[column] != '') & ~df[column].isin(choices)
+            _flag(errors, df, invalid, column, column_label(entity_type, column),
+                  f"应为以下之一: {'、'.join(choices)}")
+
+    for column in DATE_COLUMNS & set(df.columns):
+        # 兼容 2024/1/5 等写法，统一保存为 YYYY-MM-DD
+        parsed = pd.to_datetime(df[column].str.replace('/', '-'), format="%Y-%m-%d", errors='coerce')
+        _flag(errors, df, (df[column] != '') & parsed.isna(), column, column_label(entity_type, column),
+              "日期格式应为YYYY-MM-DD")
+        df[column] = parsed.dt.strftime("%Y-%m-%d").fillna('')
+
+    if entity_type in DATE_ORDER:
+        start, end = DATE_ORDER[entity_type]
+        if start in df.columns and end in df.columns:
+            reversed_dates = (df[start] != '') & (df[end] != '') & (df[end] < df[start])
+            _flag(errors, df, reversed_dates, end, column_label(entity_type, end),
+                  f"{column_label(entity_type, end)}不能早于{column_label(entity_type, start)}")
+
+    if entity_type == 'person':
+        valid, codes = validate_id_cards(df['id_card'])
+        _flag(errors, df, (df['id_card'] != '') & ~valid, 'id_card', '身份证号',
+              pd.Series(ID_CARD_ERRORS, dtype=object).take(codes).set_axis(df.index))
+
+        # 身份证号唯一：文件内重复和数据库中已存在的都视为错误
+        df['id_card'] = df['id_card'].str.upper()
+        filled = df['id_card'] != ''
+        _flag(errors, df, filled & df['id_card'].duplicated(), 'id_card', '身份证号', "身份证号在文件中重复")
+        if check_existing:
+            existing = {row[0] for row in conn.execute(
+                "SELECT id_card FROM person WHERE id_card IN (SELECT value FROM json_each(?))",
+                (json.dumps(df.loc[filled, 'id_card'].unique().tolist()),))}
+            _flag(errors, df, df['id_card'].isin(existing), 'id_card', '身份证号', "身份证号已存在")
+
+        if 'phone' in df.columns:
+            valid, codes = validate_phones(df['phone'])
+            _flag(errors, df, ~valid, 'phone', '电话',
+                  pd.Series(PHONE_ERRORS, dtype=object).take(codes).set_axis(df.index))
+
+    _validate_persons(conn, entity_type, df, errors)
+
+    invalid_rows = {error[0] for error in errors}
+    return df[~df.index.isin(invalid_rows)], errors
+
+def _rows(df):
+    # 转换为 executemany 的参数，空文本写入为NULL
+    return list(df.astype(object).where(df != '', None).itertuples(index=False, name=None))
+
+def _create_staging(conn, entity_type):
+    # 临时暂存表与目标表列类型一致（保证比较时类型相同），id 列存放匹配到的已有记录ID
+    conn.execute("DROP TABLE IF EXISTS temp.import_staging")
+    conn.execute(f"CREATE TEMP TABLE import_staging AS SELECT * FROM main.{entity_type} WHERE 0")
+    conn.execute("ALTER TABLE temp.import_staging ADD COLUMN row_number INTEGER")
+
+def _upsert_staged(conn, entity_type, update_columns, errors):
+    """
+    将暂存表中的数据按自然键合并到目标表：新记录插入，已有记录只更新发生变化的行。
+    空白单元格（暂存为NULL）表示保持原值，不会清空已有记录的字段，
+    因此表单保存的空文本与文件中的空白单元格不视为变化
+
+    参数:
+    - conn: 持有暂存表的数据库连接
+    - entity_type: 实体类型
+    - update_columns: 文件中提供的、需要更新的列（不含自然键）
+    - errors: 错误列表，文件内自然键重复的行追加到其中
+
+    返回:
+    - tuple: (新增行数, 更新行数, 未变化行数)
+    """
+    keys = NATURAL_KEYS[entity_type]
+    key_match = " AND ".join(f"t.{key} = s.{key}" for key in keys)
+    key_label = "+".join(column_label(entity_type, key) for key in keys)
+
+    # 同一自然键在文件中出现多次时保留第一次出现的行
+    duplicates = conn.execute(f'''
+        SELECT row_number, {" || '/' || ".join(keys)} FROM temp.import_staging
+        WHERE rowid NOT IN (SELECT MIN(rowid) FROM temp.import_staging GROUP BY {", ".join(keys)})
+    ''').fetchall()
+    errors.extend((row_number, key_label, value, f"{key_label}在文件中重复") for row_number, value in duplicates)
+    conn.execute(f'''
+        DELETE FROM temp.import_staging
+        WHERE rowid NOT IN (SELECT MIN(rowid) FROM temp.import_staging GROUP BY {", ".join(keys)})
+    ''')
+
+    conn.execute(f"CREATE INDEX temp.idx_import_staging_key ON import_staging ({', '.join(keys)})")
+    conn.execute(f'''
+        UPDATE temp.import_staging AS s
+        SET id = (SELECT MIN(t.id) FROM main.{entity_type} t WHERE {key_match})
+    ''')
+    staged, inserted = conn.execute(
+        "SELECT COUNT(*), COUNT(*) - COUNT(id) FROM temp.import_staging").fetchone()
+
+    # 默认值只填入新记录，已有记录的空白字段保持原值
+    for column, value in DEFAULT_VALUES.get(entity_type, {}).items():
+        conn.execute(f"UPDATE temp.import_staging SET {column} = ? WHERE id IS NULL AND {column} IS NULL",
+                     (value,))
+
+    # 版本号由数据库维护：新记录使用默认值，更新的记录版本号加一
+    columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({entity_type})") if row[1] != 'version']
+    if update_columns:
+        assignments = ', '.join(f"{column} = COALESCE(excluded.{column}, {entity_type}.{column})"
+                                for column in update_columns)
+        changed = ' OR '.join(f"(excluded.{column} IS NOT NULL AND excluded.{column} IS NOT {entity_type}.{column})"
+                              for column in update_columns)
+        conflict = f"DO UPDATE SET {assignments}, version = {entity_type}.version + 1 WHERE {changed}"
+    else:
+        conflict = "DO NOTHING"
+
+    # 匹配到已有记录的行带有其id，与主键冲突后转为更新；未匹配的行id为NULL，作为新记录插入
+    # SELECT 中的 WHERE true 用于消除 ON CONFLICT 与 JOIN 语法的歧义
+    cursor = conn.execute(f'''
+        INSERT INTO main.{entity_type} ({', '.join(columns)})
+        SELECT {', '.join(columns)} FROM temp.import_staging WHERE true
+        ON CONFLICT (id) {conflict}
+    ''')
+    updated = cursor.rowcount - inserted
+    return inserted, updated, staged - inserted - updated
+
+def import_file(stream, filename, entity_type, mode='insert', chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    分块导入CSV或Excel文件，校验失败的行不写入，并在错误报告中列出
+
+    - insert（新增）模式：每块批量校验后在一个事务中通过 executemany 写入
+    - upsert（差异导入）模式：校验通过的行先写入临时暂存表，全部读取后按自然键
+      （见 NATURAL_KEYS）一次性合并：新记录插入，已有记录只改写文件中提供且发生变化的列，
+      空白单元格保持原值
+
+    参数:
+    - stream: 二进制文件对象
+    - filename: 文件名，用于判断文件类型
+    - entity_type: 实体类型
+    - mode: 'insert' 或 'upsert'
+    - chunk_size: 每块行数
+    - progress: 每块处理完成后调用的函数，参数为 (已读取行数, 校验通过行数)
+
+    返回:
+    - dict: total 读取行数, inserted 新增行数, updated 更新行数, unchanged 未变化行数,
+            ignored_columns 未识别的列, errors 错误报告 (DataFrame: 行号, 列, 内容, 错误)
+    """
+    if mode == 'upsert' and entity_type not in NATURAL_KEYS:
+        raise ValueError(f"{ENTITY_LABELS[entity_type]}数据没有可用于匹配已有记录的字段，不支持差异导入")
+
+    total = 0
+    passed = 0
+    inserted = updated = unchanged = 0
+    errors = []
+    sources = None
+    ignored = []
+
+    staging_conn = None
+    if mode == 'upsert':
+        staging_conn = get_connection()
+        _create_staging(staging_conn, entity_type)
+
+    try:
+        for chunk in read_chunks(stream, filename, chunk_size):
+            if sources is None:
+                sources, ignored = map_columns(entity_type, chunk.columns)
+            total += len(chunk)
+            if chunk.empty:
+                continue
+
+            # 按数据库列取值，同一列有多个来源时取第一个非空值（ID列优先）
+            df = pd.DataFrame(index=chunk.index)
+            for column, positions in sources.items():
+                values = chunk.iloc[:, positions[0]].str.strip()
+                for position in positions[1:]:
+                    values = values.mask(values == '', chunk.iloc[:, position].str.strip())
+                df[column] = values
+
+            if staging_conn is None:
+                with transaction() as conn:
+                    valid, chunk_errors = validate_chunk(conn, entity_type, df)
+                    if not valid.empty:
+                        columns = list(valid.columns)
+                        conn.executemany(
+                            f"INSERT INTO {entity_type} ({', '.join(columns)}) "
+                            f"VALUES ({', '.join('?' * len(columns))})",
+                            _rows(valid))
+                        inserted += len(valid)
+            else:
+                valid, chunk_errors = validate_chunk(staging_conn, entity_type, df,
+                                                     check_existing=False, apply_defaults=False)
+                if not valid.empty:
+                    columns = list(valid.columns) + ['row_number']
+                    staging_conn.executemany(
+                        f"INSERT INTO temp.import_staging ({', '.join(columns)}) "
+                        f"VALUES ({', '.join('?' * len(columns))})",
+                        _rows(valid.assign(row_number=valid.index)))
+                    # 暂存表只在本连接可见，提交不影响其他会话
+                    staging_conn.commit()
+
+            errors.extend(chunk_errors)
+            passed += len(valid)
+            if progress:
+                progress(total, passed)
+
+        if staging_conn is not None and sources is not None:
+            update_columns = [column for column in sources if column not in NATURAL_KEYS[entity_type]]
+            staging_conn.execute("BEGIN IMMEDIATE")
+            try:
+                inserted, updated, unchanged = _upsert_staged(staging_conn, entity_type, update_columns, errors)
+                staging_conn.commit()
+            except BaseException:
+                staging_conn.rollback()
+                raise
+    finally:
+        if staging_conn is not None:
+            staging_conn.execute("DROP TABLE IF EXISTS temp.import_staging")
+            staging_conn.close()
+
+    report = pd.DataFrame(errors, columns=['行号', '列', '内容', '错误'])
+    report = report.sort_values('行号', kind='stable').reset_index(drop=True)
+    return {'total': total, 'inserted': inserted, 'updated': updated, 'unchanged': unchanged,
+            'ignored_columns': ignored, 'errors': report}
@@ -0,0 +1,198 @@
+import threading
+from collections import OrderedDict
+import streamlit as st
+from components.db_utils import get_connection, get_data_version, keyword_condition, person_keyword_conditions, FTS_COLUMNS
+from components.pagination import row_key
+from components.repository import get_repository, column_label
+
+# 各管理页面列表的可排序字段（均有索引）和下拉筛选字段，查询的列为仓储的 list 投影
+LIST_VIEWS = {
+    'person': {
+        'sort': ['name', 'department', 'education', 'birth_date', 'graduation_date'],
+        'filter': 'department',
+    },
+    'project': {
+        'sort': ['name', 'status', 'start_date', 'end_date'],
+        'filter': 'status',
+    },
+    'standard': {
+        'sort': ['name', 'code', 'type', 'release_date', 'implementation_date'],
+        'filter': 'type',
+    },
+    'patent': {
+        'sort': ['name', 'type', 'certificate', 'application_date', 'grant_date', 'patent_number'],
+        'filter': 'type',
+    },
+    'paper': {
+        'sort': ['title', 'journal', 'journal_type', 'publish_date'],
+        'filter': 'journal_type',
+    },
+}
+
+# 每页记录数选项
+LIST_PAGE_SIZES = [20, 50, 100, 200]
+
+# 筛选选项缓存：(表名, 字段, 数据版本) -> 取值列表，所有会话共用
+_options_cache = OrderedDict()
+_options_cache_lock = threading.Lock()
+_OPTIONS_CACHE_SIZE = 32
+
+def _filter_options(conn, table, column):
+    # 下拉筛选的可选值，数据未变化前只查询一次
+    key = (table, column, get_data_version(conn, [table]))
+    with _options_cache_lock:
+        if key in _options_cache:
+            _options_cache.move_to_end(key)
+            return _options_cache[key]
+
+    options = [row[0] for row in conn.execute(
+        f"SELECT DISTINCT {column} FROM {table} WHERE {column} IS NOT NULL AND {column} != '' ORDER BY {column}"
+    )]
+
+    with _options_cache_lock:
+        _options_cache[key] = options
+        if len(_options_cache) > _OPTIONS_CACHE_SIZE:
+            _options_cache.popitem(last=False)
+    return options
+
+def paged_list(entity_type):
+    """
+    管理页面的分页列表：显示关键词、筛选、排序和每页条数控件，
+    在数据库中完成筛选、排序和分页，只查询当前页和列表显示的列
+
+    参数:
+    - entity_type: 实体类型
+
+    返回:
+    - DataFrame: 当前页数据（仓储 list 投影的列），没有符合条件的记录时为空
+    """
+    view = LIST_VIEWS[entity_type]
+    filter_column = view['filter']
+
+    conn = get_connection()
+    try:
+        control_cols = st.columns([3, 2, 2, 1, 1])
+        with control_cols[0]:
+            keyword = st.text_input("关键词", key=f"list_keyword_{entity_type}",
+                                    placeholder="名称、编号、单位或人员姓名").strip()
+        with control_cols[1]:
+            filter_value = st.selectbox(column_label(entity_type, filter_column),
+                                        ["全部"] + _filter_options(conn, entity_type, filter_column),
+                                        key=f"list_filter_{entity_type}")
+        with control_cols[2]:
+            sort_column = st.selectbox("排序字段", [None] + view['sort'], key=f"list_sort_{entity_type}",
+                                       format_func=lambda x: "默认" if x is None else column_label(entity_type, x))
+        with control_cols[3]:
+            descending = st.selectbox("排序方式", ["升序", "降序"], key=f"list_order_{entity_type}") == "降序"
+        with control_cols[4]:
+            page_size = st.selectbox("每页", LIST_PAGE_SIZES, key=f"list_page_size_{entity_type}")
+
+        # 构建查询条件
+        conditions = []
+        params = []
+        if keyword:
+            keyword_conditions = []
+            condition, condition_params = keyword_condition(entity_type, FTS_COLUMNS[entity_type], keyword)
+            keyword_conditions.append(condition)
+            params.extend(condition_params)
+            # 按人名匹配负责人、成员、作者等人员字段
+            person_conditions, person_params = person_keyword_conditions(entity_type, keyword)
+            keyword_conditions.extend(person_conditions)
+            params.extend(person_params)
+            conditions.append(f"({' OR '.join(keyword_conditions)})")
+        if filter_value != "全部":
+            conditions.append(f"{filter_column} = ?")
+            params.append(filter_value)
+    finally:
+        conn.close()
+
+    repository = get_repository(entity_type)
+    total_records = repository.count(conditions, params)
+    total_pages = max((total_records + page_size - 1) // page_size, 1)
+
+    # 分页状态：筛选条件、排序或每页条数变化时回到第一页
+    state_key = f'list_page_state_{entity_type}'
+    signature = (tuple(conditions), tuple(params), sort_column, descending, page_size)
+    page_state = st.session_state.get(state_key)
+    if page_state is None or page_state['signature'] != signature or page_state['page'] > total_pages:
+        page_state = {'signature': signature, 'page': 1, 'anchor': None}
+        st.session_state[state_key] = page_state
+    page_state['total'] = total_records
+
+    df = repository.page(conditions, params, sort_column, descending, page_state['anchor'], page_size)
+    if df.empty and page_state['page'] > 1:
+        # 数据已变化导致当前页为空时回到第一页
+        page_state.update(page=1, anchor=None)
+        df = repository.page(conditions, params, sort_column, descending, None, page_size)
+
+    if df.empty:
+        return df
+
+    current_page = page_state['page']
+    page_state['first_key'] = row_key(df, 0, sort_column)
+    page_state['last_key'] = row_key(df, -1, sort_column)
+
+    # 分页控制
+    page_cols = st.columns([1, 1, 3, 1, 1])
+    with page_cols[0]:
+        if st.button("首页", key=f"list_first_{entity_type}", disabled=current_page <= 1):
+            page_state.update(page=1, anchor=None)
+            st.rerun()
+    with page_cols[1]:
+        if st.button("上一页", key=f"list_prev_{entity_type}", disabled=current_page <= 1):
+            page_state.update(page=current_page - 1,
+                              anchor=('before', page_state['first_key']) if current_page > 2 else None)
+            st.rerun()
+    with page_cols[2]:
+        st.markdown(f"共 {total_records} 条记录，第 {current_page}/{total_pages} 页")
+    with page_cols[3]:
+        if st.button("下一页", key=f"list_next_{entity_type}", disabled=current_page >= total_pages):
+            page_state.update(page=current_page + 1, anchor=('after', page_state['last_key']))
+            st.rerun()
+    with page_cols[4]:
+        if st.button("末页", key=f"list_last_{entity_type}", disabled=current_page >= total_pages):
+            # 末页只包含剩余的记录，保证页码边界与顺序翻页一致
+            page_state.update(page=total_pages,
+                              anchor=('last', total_records - (total_pages - 1) * page_size))
+            st.rerun()
+
+    return df
+
+def list_scope(entity_type):
+    """
+    获取分页列表当前的筛选条件和记录数，用于对全部符合条件的记录执行批量操作（在 paged_list 之后调用）
+
+    参数:
+    - entity_type: 实体类型
+
+    返回:
+    - tuple: (条件列表, 参数列表, 记录数)
+    """
+    page_state = st.session_state[f'list_page_state_{entity_type}']
+    conditions, params = page_state['signature'][:2]
+    return list(conditions), list(params), page_state['total']
+
+def list_selection_key(entity_type):
+    """
+    列表多选的会话状态键：翻页、筛选条件变化或批量操作完成后使用新的键，之前选中的行不会带到其他数据上
+
+    参数:
+    - entity_type: 实体类型
+
+    返回:
+    - str: 会话状态键
+    """
+    page_state = st.session_state[f'list_page_state_{entity_type}']
+    position = (page_state['signature'], page_state['page'], page_state['anchor'],
+                st.session_state.get(f'list_selection_round_{entity_type}', 0))
+    return f"list_selection_{entity_type}_{hash(position) & 0xffffffff:08x}"
+
+def clear_list_selection(entity_type):
+    """
+    清除列表中选中的行（批量操作完成后调用）
+
+    参数:
+    - entity_type: 实体类型
+    """
+    round_key = f'list_selection_round_{entity_type}'
+    st.session_state[round_key] = st.session_state.get(round_key, 0) + 1
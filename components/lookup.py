@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+from components.db_utils import get_connection, get_data_version
+
+# 人员查找表缓存，所有会话共用，人员表修改计数变化时重新加载
+_person_cache = None
+_person_cache_lock = threading.Lock()
+
+# 各实体的名称字段，用于下拉选择显示
+ENTITY_LABEL_COLUMNS = {
+    'person': 'name',
+    'project': 'name',
+    'standard': 'name',
+    'patent': 'name',
+    'paper': 'title',
+}
+
+# 实体ID到名称的映射缓存：实体类型 -> {version, labels}，所有会话共用，表修改计数变化时重新加载
+_label_cache = {}
+_label_cache_lock = threading.Lock()
+
+# 人员档案缓存：(人员ID, 数据版本) -> 档案，所有会话共用
+_dossier_cache = OrderedDict()
+_dossier_cache_lock = threading.Lock()
+_DOSSIER_CACHE_SIZE = 256
+
+# 人员档案查询：一条语句取出此人关联的全部项目、专利、标准和论文，每个分支都通过索引定位。
+# 各分支统一为 entity、role、id、name、category、number、date、end_date、status、volume_info 列
+DOSSIER_QUERY = '''
+SELECT 'project' AS entity, 'leader' AS role, id, name, NULL AS category, NULL AS number,
+       start_date AS date, end_date, status, NULL AS volume_info
+FROM project WHERE leader_id = :person_id
+UNION ALL
+SELECT 'project', 'member', id, name, NULL, NULL, start_date, end_date, status, NULL
+FROM project
+WHERE id IN (SELECT project_id FROM project_member WHERE person_id = :person_id)
+  AND leader_id IS NOT :person_id
+UNION ALL
+SELECT 'patent', 'owner', id, name, type, patent_number, application_date, NULL, certificate, NULL
+FROM patent WHERE owner_id = :person_id
+UNION ALL
+SELECT 'patent', 'participant', id, name, type, patent_number, application_date, NULL, certificate, NULL
+FROM patent WHERE id IN (SELECT patent_id FROM patent_participant WHERE person_id = :person_id)
+UNION ALL
+SELECT 'standard', 'participant', id, name, type, code, release_date, NULL, NULL, NULL
+FROM standard WHERE participant_id = :person_id
+UNION ALL
+SELECT 'paper', 'first_author', id, title, journal_type, journal, publish_date, NULL, NULL, volume_info
+FROM paper WHERE first_author_id = :person_id
+UNION ALL
+SELECT 'paper', 'co_author', id, title, journal_type, journal, publish_date, NULL, NULL, volume_info
+FROM paper WHERE id IN (SELECT paper_id FROM paper_coauthor WHERE person_id = :person_id)
+'''
+
+def _get_person_cache():
+    """
+    获取人员查找表缓存，人员表发生写入后自动重新加载
+
+    返回:
+    - dict: 包含 version、ids、names、departments 的缓存内容
+    """
+    global _person_cache
+
+    conn = get_connection()
+    try:
+        version = get_data_version(conn, ['person'])
+        cache = _person_cache
+        if cache is not None and cache['version'] == version:
+            return cache
+
+        with _person_cache_lock:
+            # 其他线程可能已经完成加载
+            cache = _person_cache
+            if cache is not None and cache['version'] == version:
+                return cache
+
+            rows = conn.execute("SELECT id, name, department FROM person ORDER BY id").fetchall()
+            cache = {
+                'version': version,
+                'ids': [row[0] for row in rows],
+                'names': {row[0]: row[1] for row in rows},
+                'departments': {row[0]: row[2] for row in rows},
+            }
+            _person_cache = cache
+            return cache
+    finally:
+        conn.close()
+
+def get_person_ids():
+    """
+    获取所有人员ID（按ID排序），用于下拉选择
+
+    返回:
+    - list: 人员ID列表（共享缓存，请勿修改）
+    """
+    return _get_person_cache()['ids']
+
+def get_person_names():
+    """
+    获取人员ID到姓名的映射
+
+    返回:
+    - dict: {人员ID: 姓名}（共享缓存，请勿修改）
+    """
+    return _get_person_cache()['names']
+
+def get_person_departments():
+    """
+    获取人员ID到部门的映射
+
+    返回:
+    - dict: {人员ID: 部门}（共享缓存，请勿修改）
+    """
+    return _get_person_cache()['departments']
+
+def get_entity_labels(entity_type):
+    """
+    获取实体ID到名称的映射，表发生写入后自动重新加载；人员使用人员查找表缓存
+
+    参数:
+    - entity_type: 实体类型
+
+    返回:
+    - dict: {ID: 名称}（共享缓存，请勿修改）
+    """
+    if entity_type == 'person':
+        return get_person_names()
+
+    conn = get_connection()
+    try:
+        version = get_data_version(conn, [entity_type])
+        cache = _label_cache.get(entity_type)
+        if cache is not None and cache['version'] == version:
+            return cache['labels']
+
+        with _label_cache_lock:
+            cache = _label_cache.get(entity_type)
+            if cache is not None and cache['version'] == version:
+                return cache['labels']
+
+            column = ENTITY_LABEL_COLUMNS[entity_type]
+            labels = dict(conn.execute(f"SELECT id, {column} FROM {entity_type} ORDER BY id").fetchall())
+            _label_cache[entity_type] = {'version': version, 'labels': labels}
+            return labels
+    finally:
+        conn.close()
+
+def get_person_dossier(person_id):
+    """
+    获取人员档案：此人以各种角色关联的项目、专利、标准和论文，
+    一次查询取出，按人员ID和数据版本缓存，相关表未修改前再次查看不访问数据库
+
+    参数:
+    - person_id: 人员ID
+
+    返回:
+    - DataFrame: 每行一条关联记录，entity 为实体类型，role 为角色
+      （leader/member、owner/participant、participant、first_author/co_author）（共享缓存，请勿修改）
+    """
+    person_id = int(person_id)
+    conn = get_connection()
+    try:
+        key = (person_id, get_data_version(conn, ['project', 'patent', 'standard', 'paper']))
+        with _dossier_cache_lock:
+            if key in _dossier_cache:
+                _dossier_cache.move_to_end(key)
+                return _dossier_cache[key]
+
+        dossier = pd.read_sql(DOSSIER_QUERY, conn, params={'person_id': person_id})
+    finally:
+        conn.close()
+
+    with _dossier_cache_lock:
+        _dossier_cache[key] = dossier
+        if len(_dossier_cache) > _DOSSIER_CACHE_SIZE:
+            _dossier_cache.popitem(last=False)
+    return dossier
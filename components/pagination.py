@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+from components.db_utils import get_data_version
+
+# 查询总数缓存：(表名, 条件, 参数, 数据版本) -> 记录数，所有会话共用
+_count_cache = OrderedDict()
+_count_cache_lock = threading.Lock()
+_COUNT_CACHE_SIZE = 256
+
+def _build_where(conditions):
+    return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+def _order_by(sort_column, descending):
+    direction = 'DESC' if descending else 'ASC'
+    return f"{sort_column} {direction}, id {direction}" if sort_column else f"id {direction}"
+
+def ordered_query(table, conditions, sort_column, descending, columns='*'):
+    """
+    构建与分页顺序一致的完整查询（不分页），用于导出全部结果
+
+    参数:
+    - table: 表名
+    - conditions: 查询条件列表（以AND连接）
+    - sort_column: 排序字段，为None时按id排序
+    - descending: 是否降序
+    - columns: 查询的列
+
+    返回:
+    - str: SQL查询
+    """
+    return f"SELECT {columns} FROM {table}{_build_where(conditions)} ORDER BY {_order_by(sort_column, descending)}"
+
+def cached_count(conn, table, conditions, params):
+    """
+    获取满足条件的记录总数，相同条件在数据未变化前只统计一次
+
+    参数:
+    - conn: 数据库连接
+    - table: 表名
+    - conditions: 查询条件列表（以AND连接）
+    - params: 条件参数
+
+    返回:
+    - int: 记录总数
+    """
+    key = (table, tuple(conditions), tuple(params), get_data_version(conn))
+    with _count_cache_lock:
+        if key in _count_cache:
+            _count_cache.move_to_end(key)
+            return _count_cache[key]
+
+    total = conn.execute(f"SELECT COUNT(*) FROM {table}{_build_where(conditions)}", list(params)).fetchone()[0]
+
+    with _count_cache_lock:
+        _count_cache[key] = total
+        if len(_count_cache) > _COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return total
+
+def _seek_condition(sort_column, descending, key):
+    """
+    构建"排在指定行之后"的条件，排序为 sort_column、id 同方向
+
+    SQLite 中 NULL 在升序时排最前、降序时排最后
+    """
+    value, row_id = key
+    id_op = '<' if descending else '>'
+    if sort_column is None:
+        return f"id {id_op} ?", [row_id]
+
+    if value is None:
+        if descending:
+            return f"({sort_column} IS NULL AND id < ?)", [row_id]
+        return f"(({sort_column} IS NULL AND id > ?) OR {sort_column} IS NOT NULL)", [row_id]
+
+    # 行值比较可直接利用 (sort_column, rowid) 索引
+    condition = f"({sort_column}, id) {id_op} (?, ?)"
+    if descending:
+        condition = f"({condition} OR {sort_column} IS NULL)"
+    return condition, [value, row_id]
+
+def _to_param(value):
+    # 将pandas/numpy取值转换为sqlite3可绑定的Python类型
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return value.item() if hasattr(value, 'item') else value
+
+def row_key(df, position, sort_column):
+    """
+    获取结果中某一行的分页键 (排序字段值, id)
+
+    参数:
+    - df: 查询结果
+    - position: 行位置，0为第一行，-1为最后一行
+    - sort_column: 排序字段，为None时按id排序
+
+    返回:
+    - tuple: (排序字段值, id)
+    """
+    value = _to_param(df[sort_column].iloc[position]) if sort_column else None
+    return value, _to_param(df['id'].iloc[position])
+
+def fetch_keyset_page(conn, table, conditions, params, sort_column, descending, anchor, page_size, columns='*'):
+    """
+    按键集（seek）方式分页查询，翻页代价与页码无关
+
+    参数:
+    - conn: 数据库连接
+    - table: 表名
+    - conditions: 查询条件列表（以AND连接）
+    - params: 条件参数
+    - sort_column: 排序字段，为None时按id排序
+    - descending: 是否降序
+    - anchor: 翻页位置
+        None 或 ('first',): 第一页
+        ('after', key): 指定行之后的一页（下一页）
+        ('before', key): 指定行之前的一页（上一页）
+        ('last', count): 最后 count 行（末页）
+    - page_size: 每页记录数
+    - columns: 查询的列，必须包含 id 和排序字段
+
+    返回:
+    - DataFrame: 当前页数据，按显示顺序排列
+    """
+    anchor = anchor or ('first',)
+    conditions = list(conditions)
+    params = list(params)
+    limit = page_size
+
+    # 向前翻页和末页需要反向扫描，取出后再恢复顺序
+    reverse = anchor[0] in ('before', 'last')
+    scan_descending = descending != reverse
+
+    if anchor[0] in ('after', 'before'):
+        seek, seek_params = _seek_condition(sort_column, scan_descending, anchor[1])
+        conditions.append(seek)
+        params.extend(seek_params)
+    elif anchor[0] == 'last':
+        limit = anchor[1]
+
+    query = ordered_query(table, conditions, sort_column, scan_descending, columns) + " LIMIT ?"
+    params.append(limit)
+
+    df = pd.read_sql(query, conn, params=params)
+    if reverse:
+        df = df.iloc[::-1].reset_index(drop=True)
+    return df
@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
-from components.db_utils import get_connection
+from components.analytics_db import get_analytics_connection
+from components.row_version import editing_row, release_editing_row, save_versioned, show_version_conflict
+from components.lookup import get_person_names
+from components.entity_selector import entity_selectbox, entity_multiselect, optional_entity_selectbox
 import datetime
 from components.table_utils import translate_columns, display_dataframe
+from components.list_view import paged_list, list_selection_key
+from components.repository import get_repository
+from components.bulk_edit import bulk_actions
+
+paper_repository = get_repository('paper')
 
 def paper_management():
     #st.title("论文管理")
@@ -30,12 +38,11 @@ def paper_management():
 
     # 使用expander，根据会话状态决定是否展开
     with st.expander("添加/编辑论文信息", expanded=st.session_state.paper_expander_expanded):
-        # 获取所有论文信息用于编辑
-        conn = get_connection()
-        papers_df = pd.read_sql("SELECT * FROM paper", conn)
+        # 编辑选择使用ID到名称的映射，选中后再读取该条记录
+        paper_labels = paper_repository.labels()
 
-        # 获取所有人员信息用于选择论文作者
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+        # 人员ID到姓名的映射，用于判断是否已有人员
+        persons_dict = get_person_names()
 
         # 编辑模式切换回调函数
         def set_add_mode():
@@ -45,6 +52,8 @@ def paper_management():
             st.session_state.paper_success_message = None
             # 保持expander展开
             st.session_state.paper_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('paper')
             if 'paper_selector' in st.session_state:
                 del st.session_state.paper_selector
 
@@ -54,6 +63,8 @@ def paper_management():
             st.session_state.paper_success_message = None
             # 保持expander展开
             st.session_state.paper_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('paper')
 
         # 论文选择回调函数
         def on_paper_select():
@@ -62,6 +73,8 @@ def paper_management():
             st.session_state.paper_success_message = None
             # 保持expander展开
             st.session_state.paper_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('paper')
 
         # 创建两个按钮用于切换模式，使用更紧凑的布局
         button_cols = st.columns([1, 1, 3])  # 两个按钮占用较小空间，右侧留白
@@ -73,23 +86,19 @@ def paper_management():
         # 获取当前模式
         edit_mode = st.session_state.paper_edit_mode
 
-        # 如果是编辑模式，显示论文选择器
-        if edit_mode and not papers_df.empty:
-            paper_id = st.selectbox(
-                "选择要编辑的论文",
-                options=papers_df['id'].tolist(),
-                format_func=lambda x: papers_df[papers_df['id'] == x]['title'].iloc[0],
-                key="paper_selector",
-                on_change=on_paper_select
-            )
-
+        # 如果是编辑模式，显示可搜索的论文选择器
+        paper_id = entity_selectbox("选择要编辑的论文", 'paper', "paper_selector",
+                                    on_change=on_paper_select) if edit_mode else None
+        if paper_id is not None:
             # 获取选中的论文数据
-            if st.session_state.paper_selected_id:
+            if st.session_state.paper_selected_id in paper_labels:
                 paper_id = st.session_state.paper_selected_id
-                paper_data = papers_df[papers_df['id'] == paper_id].iloc[0]
             else:
-                paper_data = papers_df[papers_df['id'] == paper_id].iloc[0]
                 st.session_state.paper_selected_id = paper_id
+            paper_data = paper_repository.get(paper_id)
+
+            # 编辑期间使用开始编辑时载入的数据，保存时据其版本号检查并发修改
+            paper_data = editing_row('paper', paper_id, paper_data)
         else:
             paper_id = None
             paper_data = pd.Series({"title": "", "journal": "", "journal_type": "核心期刊",
@@ -97,6 +106,37 @@ def paper_management():
                                   "co_authors": "", "organization": "", "volume_info": ""})
             st.session_state.paper_selected_id = None
 
+        # 保存时发现并发修改，显示冲突处理界面
+        if edit_mode and show_version_conflict('paper', 'paper'):
+            st.session_state.paper_success_message = "已用您的修改覆盖最新数据"
+            st.session_state.paper_expander_expanded = True
+            st.rerun()
+
+        # 第一作者和参与作者在表单之外选择：搜索人员需要刷新页面，下拉框只包含已选人员和匹配的人员
+        if persons_dict:
+            first_author_id = optional_entity_selectbox("第一作者", 'person', "paper_first_author_picker",
+                                                        paper_data["first_author_id"] or None, scope=paper_id)
+
+            st.subheader("参与作者")
+
+            # 获取当前参与作者
+            current_co_authors = []
+            if paper_data["co_authors"]:
+                try:
+                    current_co_authors = [int(p_id) for p_id in paper_data["co_authors"].split(",")]
+                except:
+                    current_co_authors = []
+
+            # 排除第一作者（一个人不能同时是第一作者和参与作者）
+            all_co_authors = entity_multiselect("选择参与作者", 'person', "paper_co_authors_picker",
+                                                current_co_authors, scope=paper_id, exclude=[first_author_id])
+
+            co_authors_str = ",".join(map(str, all_co_authors)) if all_co_authors else ""
+        else:
+            st.warning("暂无人员信息，请先添加人员")
+            first_author_id = None
+            co_authors_str = ""
+
         # 表单用于添加或编辑论文
         with st.form("paper_form"):
 
@@ -129,53 +169,6 @@ def paper_management():
                 # 期刊期次信息
                 volume_info = st.text_input("期刊期次信息(如: 第13卷第5期)", value=paper_data["volume_info"] if "volume_info" in paper_data else "")
 
-                # 第一作者选择
-                if not persons_df.empty:
-                    persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
-                    # 添加一个"无"选项
-                    persons_dict[0] = "无"
-
-                    # 获取当前第一作者
-                    current_first_author = paper_data["first_author_id"] if paper_data["first_author_id"] else 0
-
-                    first_author_id = st.selectbox("第一作者",
-                                              options=[0] + persons_df['id'].tolist(),
-                                              index=([0] + persons_df['id'].tolist()).index(current_first_author) if current_first_author in [0] + persons_df['id'].tolist() else 0,
-                                              format_func=lambda x: persons_dict.get(x, f"ID:{x}"))
-
-                    if first_author_id == 0:
-                        first_author_id = None
-                else:
-                    st.warning("暂无人员信息，请先添加人员")
-                    first_author_id = None
-
-            # 参与作者选择（多选）
-            if not persons_df.empty:
-                st.subheader("参与作者")
-
-                # 获取当前参与作者
-                current_co_authors = []
-                if paper_data["co_authors"]:
-                    try:
-                        current_co_authors = [int(p_id) for p_id in paper_data["co_authors"].split(",")]
-                    except:
-                        current_co_authors = []
-
-                # 过滤掉第一作者（一个人不能同时是第一作者和参与作者）
-                co_author_options = [p_id for p_id in persons_df['id'].tolist() if p_id != first_author_id]
-
-                # 使用multiselect替代复选框
-                all_co_authors = st.multiselect(
-                    "选择参与作者",
-                    options=co_author_options,
-                    default=current_co_authors,
-                    format_func=lambda x: persons_dict.get(x, f"ID:{x}")
-                )
-
-                co_authors_str = ",".join(map(str, all_co_authors)) if all_co_authors else ""
-            else:
-                co_authors_str = ""
-
             submit_button = st.form_submit_button("保存")
 
             if submit_button:
@@ -188,60 +181,47 @@ def paper_management():
                     st.error("第一作者和参与作者至少需要填写一项")
                 else:
                     try:
-                        conn = get_connection()
-                        cursor = conn.cursor()
-
                         # 格式化日期
                         publish_date_str = publish_date.strftime("%Y-%m-%d")
 
                         if edit_mode and paper_id:
                             # 更新现有记录
-                            cursor.execute('''
-                                UPDATE paper SET title=?, journal=?, journal_type=?, publish_date=?,
-                                first_author_id=?, co_authors=?, organization=?, volume_info=? WHERE id=?
-                            ''', (title, journal, journal_type, publish_date_str,
-                                 first_author_id, co_authors_str, organization, volume_info, paper_id))
+                            save_versioned('paper', 'paper', paper_id, paper_data['version'], {
+                                'title': title, 'journal': journal, 'journal_type': journal_type,
+                                'publish_date': publish_date_str, 'first_author_id': first_author_id,
+                                'co_authors': co_authors_str, 'organization': organization, 'volume_info': volume_info,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.paper_success_message = f"已更新论文 {title} 的信息"
                             # 保持expander展开
                             st.session_state.paper_expander_expanded = True
                         else:
                             # 新增记录
-                            cursor.execute('''
-                                INSERT INTO paper (title, journal, journal_type, publish_date,
-                                first_author_id, co_authors, organization, volume_info)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (title, journal, journal_type, publish_date_str,
-                                 first_author_id, co_authors_str, organization, volume_info))
+                            paper_repository.insert({
+                                'title': title, 'journal': journal, 'journal_type': journal_type,
+                                'publish_date': publish_date_str, 'first_author_id': first_author_id,
+                                'co_authors': co_authors_str, 'organization': organization, 'volume_info': volume_info,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.paper_success_message = f"已添加论文 {title} 的信息"
                             # 保持expander展开
                             st.session_state.paper_expander_expanded = True
 
-                        conn.commit()
-                        conn.close()
-
                         # 刷新页面
                         st.rerun()
                     except Exception as e:
                         st.error(f"保存失败: {str(e)}")
 
-        conn.close()
-
     st.subheader("论文列表")
 
-    # 直接从数据库获取论文数据
-    conn = get_connection()
-    papers_df = pd.read_sql("SELECT * FROM paper", conn)
-
-    # 获取人员信息用于显示
-    persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+    # 在数据库中筛选、排序和分页，只读取当前页
+    papers_df = paged_list('paper')
 
     if papers_df.empty:
-        st.info("暂无论文信息")
+        st.info("没有符合条件的论文信息")
     else:
-        # 格式化作者信息
-        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
+        # 获取人员信息用于格式化作者
+        persons_dict = get_person_names()
 
         # 定义格式化函数
         def format_first_author(author_id):
@@ -277,15 +257,17 @@ def paper_management():
         formatted_df['参与作者'] = display_df['co_authors'].apply(format_co_authors)
         formatted_df['组织/单位'] = display_df['organization']
 
-        # 使用自定义表格显示工具
-        display_dataframe(formatted_df, 'paper')
+        # 使用自定义表格显示工具，可勾选多行进行批量操作
+        selected_rows = display_dataframe(formatted_df, 'paper', selection_key=list_selection_key('paper'))
+        selected_ids = papers_df['id'].iloc[selected_rows].tolist()
 
-        # 详细信息查看和删除选项
+        # 详细信息查看和删除选项，从当前页中选择
+        page_labels = dict(zip(papers_df['id'], papers_df['title']))
         col_view, col_del = st.columns(2)
 
         with col_view:
-            view_id = st.selectbox("选择要查看详细信息的论文", papers_df['id'].tolist(),
-                                 format_func=lambda x: papers_df[papers_df['id'] == x]['title'].iloc[0])
+            view_id = st.selectbox("选择要查看详细信息的论文（当前页）", papers_df['id'].tolist(),
+                                 format_func=page_labels.get)
 
             if st.button("查看详细信息"):
                 paper_data = papers_df[papers_df['id'] == view_id].iloc[0]
@@ -312,16 +294,12 @@ def paper_management():
                     st.markdown(f"**参与作者**: {co_authors}")
 
         with col_del:
-            del_id = st.selectbox("选择要删除的论文", papers_df['id'].tolist(),
-                                format_func=lambda x: papers_df[papers_df['id'] == x]['title'].iloc[0])
+            del_id = st.selectbox("选择要删除的论文（当前页）", papers_df['id'].tolist(),
+                                format_func=page_labels.get)
 
             if st.button("删除论文"):
                 try:
-                    conn = get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM paper WHERE id = ?", (del_id,))
-                    conn.commit()
-                    conn.close()
+                    paper_repository.delete(del_id)
                     # 保存成功消息到会话状态
                     st.session_state.paper_success_message = "已删除论文"
                     # 保持expander展开
@@ -330,11 +308,13 @@ def paper_management():
                 except Exception as e:
                     st.error(f"删除失败: {str(e)}")
 
-    conn.close()
+        # 对勾选的论文或全部符合条件的论文批量修改、删除
+        bulk_actions('paper', selected_ids)
 
 # 辅助函数 - 显示论文统计信息
 def show_paper_statistics():
-    conn = get_connection()
+    # 统计查询读取只读分析副本
+    conn = get_analytics_connection()
 
     # 按期刊类型统计
     type_stats = pd.read_sql("""
@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
-from components.db_utils import get_connection
+from components.analytics_db import get_analytics_connection
+from components.row_version import editing_row, release_editing_row, save_versioned, show_version_conflict
+from components.lookup import get_person_names
+from components.entity_selector import entity_selectbox, entity_multiselect, optional_entity_selectbox
 import datetime
 from components.table_utils import translate_columns, display_dataframe
+from components.list_view import paged_list, list_selection_key
+from components.repository import get_repository
+from components.bulk_edit import bulk_actions
+
+patent_repository = get_repository('patent')
 
 def patent_management():
     #st.title("专利管理")
@@ -30,12 +38,11 @@ def patent_management():
 
     # 使用expander，根据会话状态决定是否展开
     with st.expander("添加/编辑专利信息", expanded=st.session_state.patent_expander_expanded):
-        # 获取所有专利信息用于编辑
-        conn = get_connection()
-        patents_df = pd.read_sql("SELECT * FROM patent", conn)
+        # 编辑选择使用ID到名称的映射，选中后再读取该条记录
+        patent_labels = patent_repository.labels()
 
-        # 获取所有人员信息用于选择专利所有人和参与人员
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+        # 人员ID到姓名的映射，用于判断是否已有人员
+        persons_dict = get_person_names()
 
         # 编辑模式切换回调函数
         def set_add_mode():
@@ -45,6 +52,8 @@ def patent_management():
             st.session_state.patent_success_message = None
             # 保持expander展开
             st.session_state.patent_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('patent')
             if 'patent_selector' in st.session_state:
                 del st.session_state.patent_selector
 
@@ -54,6 +63,8 @@ def patent_management():
             st.session_state.patent_success_message = None
             # 保持expander展开
             st.session_state.patent_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('patent')
 
         # 专利选择回调函数
         def on_patent_select():
@@ -62,6 +73,8 @@ def patent_management():
             st.session_state.patent_success_message = None
             # 保持expander展开
             st.session_state.patent_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('patent')
 
         # 创建两个按钮用于切换模式，使用更紧凑的布局
         button_cols = st.columns([1, 1, 3])  # 两个按钮占用较小空间，右侧留白
@@ -73,23 +86,19 @@ def patent_management():
         # 获取当前模式
         edit_mode = st.session_state.patent_edit_mode
 
-        # 如果是编辑模式，显示专利选择器
-        if edit_mode and not patents_df.empty:
-            patent_id = st.selectbox(
-                "选择要编辑的专利",
-                options=patents_df['id'].tolist(),
-                format_func=lambda x: patents_df[patents_df['id'] == x]['name'].iloc[0],
-                key="patent_selector",
-                on_change=on_patent_select
-            )
-
+        # 如果是编辑模式，显示可搜索的专利选择器
+        patent_id = entity_selectbox("选择要编辑的专利", 'patent', "patent_selector",
+                                     on_change=on_patent_select) if edit_mode else None
+        if patent_id is not None:
             # 获取选中的专利数据
-            if st.session_state.patent_selected_id:
+            if st.session_state.patent_selected_id in patent_labels:
                 patent_id = st.session_state.patent_selected_id
-                patent_data = patents_df[patents_df['id'] == patent_id].iloc[0]
             else:
-                patent_data = patents_df[patents_df['id'] == patent_id].iloc[0]
                 st.session_state.patent_selected_id = patent_id
+            patent_data = patent_repository.get(patent_id)
+
+            # 编辑期间使用开始编辑时载入的数据，保存时据其版本号检查并发修改
+            patent_data = editing_row('patent', patent_id, patent_data)
         else:
             patent_id = None
             patent_data = pd.Series({"name": "", "type": "发明专利", "application_date": None,
@@ -97,6 +106,37 @@ def patent_management():
                                     "company": "", "patent_number": "", "certificate": "无"})
             st.session_state.patent_selected_id = None
 
+        # 保存时发现并发修改，显示冲突处理界面
+        if edit_mode and show_version_conflict('patent', 'patent'):
+            st.session_state.patent_success_message = "已用您的修改覆盖最新数据"
+            st.session_state.patent_expander_expanded = True
+            st.rerun()
+
+        # 所有人和参与人员在表单之外选择：搜索人员需要刷新页面，下拉框只包含已选人员和匹配的人员
+        if persons_dict:
+            owner_id = optional_entity_selectbox("专利所有人", 'person', "patent_owner_picker",
+                                                 patent_data["owner_id"] or None, scope=patent_id)
+
+            st.subheader("参与人员")
+
+            # 获取当前参与人员
+            current_participants = []
+            if patent_data["participants"]:
+                try:
+                    current_participants = [int(p_id) for p_id in patent_data["participants"].split(",")]
+                except:
+                    current_participants = []
+
+            # 排除所有人（一个人不能同时是所有人和参与人）
+            all_participants = entity_multiselect("选择参与人员", 'person', "patent_participants_picker",
+                                                  current_participants, scope=patent_id, exclude=[owner_id])
+
+            participants_str = ",".join(map(str, all_participants)) if all_participants else ""
+        else:
+            st.warning("暂无人员信息，请先添加人员")
+            owner_id = None
+            participants_str = ""
+
         # 表单用于添加或编辑专利
         with st.form("patent_form"):
 
@@ -142,53 +182,6 @@ def patent_management():
                 certificate = st.selectbox("证书状态", ["有", "无"],
                                          index=0 if certificate_value == "有" else 1)
 
-            # 专利所有人选择
-            if not persons_df.empty:
-                persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
-                # 添加一个"无"选项
-                persons_dict[0] = "无"
-
-                # 获取当前所有人
-                current_owner = patent_data["owner_id"] if patent_data["owner_id"] else 0
-
-                owner_id = st.selectbox("专利所有人",
-                                      options=[0] + persons_df['id'].tolist(),
-                                      index=([0] + persons_df['id'].tolist()).index(current_owner) if current_owner in persons_df['id'].tolist() else 0,
-                                      format_func=lambda x: persons_dict.get(x, f"ID:{x}"))
-
-                if owner_id == 0:
-                    owner_id = None
-            else:
-                st.warning("暂无人员信息，请先添加人员")
-                owner_id = None
-
-            # 参与人员选择（多选）
-            if not persons_df.empty:
-                st.subheader("参与人员")
-
-                # 获取当前参与人员
-                current_participants = []
-                if patent_data["participants"]:
-                    try:
-                        current_participants = [int(p_id) for p_id in patent_data["participants"].split(",")]
-                    except:
-                        current_participants = []
-
-                # 过滤掉所有人（一个人不能同时是所有人和参与人）
-                participant_options = [p_id for p_id in persons_df['id'].tolist() if p_id != owner_id]
-
-                # 使用multiselect替代复选框
-                all_participants = st.multiselect(
-                    "选择参与人员",
-                    options=participant_options,
-                    default=current_participants,
-                    format_func=lambda x: persons_dict.get(x, f"ID:{x}")
-                )
-
-                participants_str = ",".join(map(str, all_participants)) if all_participants else ""
-            else:
-                participants_str = ""
-
             submit_button = st.form_submit_button("保存")
 
             if submit_button:
@@ -203,59 +196,46 @@ def patent_management():
                     st.error("专利所有人和参与人员至少需要填写一项")
                 else:
                     try:
-                        conn = get_connection()
-                        cursor = conn.cursor()
-
                         # 格式化日期
                         application_date_str = application_date.strftime("%Y-%m-%d")
                         grant_date_str = grant_date.strftime("%Y-%m-%d")
 
                         if st.session_state.patent_edit_mode and st.session_state.patent_selected_id:
                             # 更新现有记录
-                            cursor.execute('''
-                                UPDATE patent SET name=?, type=?, application_date=?, grant_date=?,
-                                owner_id=?, participants=?, company=?, patent_number=?, certificate=? WHERE id=?
-                            ''', (name, patent_type, application_date_str, grant_date_str,
-                                 owner_id, participants_str, company, patent_number, certificate, st.session_state.patent_selected_id))
+                            save_versioned('patent', 'patent', st.session_state.patent_selected_id, patent_data['version'], {
+                                'name': name, 'type': patent_type, 'application_date': application_date_str,
+                                'grant_date': grant_date_str, 'owner_id': owner_id, 'participants': participants_str,
+                                'company': company, 'patent_number': patent_number, 'certificate': certificate,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.patent_success_message = f"已更新专利 {name} 的信息"
                             # 保持expander展开
                             st.session_state.patent_expander_expanded = True
                         else:
                             # 新增记录
-                            cursor.execute('''
-                                INSERT INTO patent (name, type, application_date, grant_date,
-                                owner_id, participants, company, patent_number, certificate)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (name, patent_type, application_date_str, grant_date_str,
-                                 owner_id, participants_str, company, patent_number, certificate))
+                            patent_repository.insert({
+                                'name': name, 'type': patent_type, 'application_date': application_date_str,
+                                'grant_date': grant_date_str, 'owner_id': owner_id, 'participants': participants_str,
+                                'company': company, 'patent_number': patent_number, 'certificate': certificate,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.patent_success_message = f"已添加专利 {name} 的信息"
                             # 保持expander展开
                             st.session_state.patent_expander_expanded = True
 
-                        conn.commit()
-                        conn.close()
-
                         # 刷新页面
                         st.rerun()
                     except Exception as e:
                         st.error(f"保存失败: {str(e)}")
 
-        conn.close()
-
     st.subheader("专利列表")
 
-    # 直接从数据库获取专利数据
-    conn = get_connection()
-    patents_df = pd.read_sql("SELECT * FROM patent", conn)
-
-    # 获取人员信息用于显示
-    persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+    # 在数据库中筛选、排序和分页，只读取当前页
+    patents_df = paged_list('patent')
 
     if not patents_df.empty:
-        # 格式化人员信息用于显示
-        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
+        # 获取人员信息用于显示
+        persons_dict = get_person_names()
 
         # 定义格式化函数
         def format_owner(owner_id):
@@ -292,15 +272,17 @@ def patent_management():
         formatted_df['参与人员'] = display_df['participants'].apply(format_participants)
         formatted_df['单位'] = display_df['company']
 
-        # 使用自定义表格显示工具
-        display_dataframe(formatted_df, 'patent')
+        # 使用自定义表格显示工具，可勾选多行进行批量操作
+        selected_rows = display_dataframe(formatted_df, 'patent', selection_key=list_selection_key('patent'))
+        selected_ids = patents_df['id'].iloc[selected_rows].tolist()
 
-        # 详细信息查看和删除选项
+        # 详细信息查看和删除选项，从当前页中选择
+        page_labels = dict(zip(patents_df['id'], patents_df['name']))
         col_view, col_del = st.columns(2)
 
         with col_view:
-            view_id = st.selectbox("选择要查看详细信息的专利", patents_df['id'].tolist(),
-                                 format_func=lambda x: patents_df[patents_df['id'] == x]['name'].iloc[0])
+            view_id = st.selectbox("选择要查看详细信息的专利（当前页）", patents_df['id'].tolist(),
+                                 format_func=page_labels.get)
 
             if st.button("查看详细信息"):
                 patent_data = patents_df[patents_df['id'] == view_id].iloc[0]
@@ -324,29 +306,27 @@ def patent_management():
                     st.markdown(f"**参与人员**: {participants}")
 
         with col_del:
-            del_id = st.selectbox("选择要删除的专利", patents_df['id'].tolist(),
-                                format_func=lambda x: patents_df[patents_df['id'] == x]['name'].iloc[0])
+            del_id = st.selectbox("选择要删除的专利（当前页）", patents_df['id'].tolist(),
+                                format_func=page_labels.get)
 
             if st.button("删除专利"):
                 try:
-                    conn = get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM patent WHERE id = ?", (del_id,))
-                    conn.commit()
-                    conn.close()
+                    patent_repository.delete(del_id)
                     # 保存成功消息到会话状态
                     st.session_state.patent_success_message = "已删除专利"
                     st.rerun()
                 except Exception as e:
                     st.error(f"删除失败: {str(e)}")
-    else:
-        st.info("暂无专利信息")
 
-    conn.close()
+        # 对勾选的专利或全部符合条件的专利批量修改、删除
+        bulk_actions('patent', selected_ids)
+    else:
+        st.info("没有符合条件的专利信息")
 
 # 辅助函数 - 显示专利统计信息
 def show_patent_statistics():
-    conn = get_connection()
+    # 统计查询读取只读分析副本
+    conn = get_analytics_connection()
 
     # 按专利类型统计
     type_stats = pd.read_sql("""
@@ -1,9 +1,67 @@
 import streamlit as st
 import pandas as pd
 from components.db_utils import get_connection
+from components.row_version import editing_row, release_editing_row, save_versioned, show_version_conflict
+import json
 import datetime
 from components.validation import validate_id_card, validate_phone
 from components.table_utils import translate_columns, display_dataframe
+from components.list_view import paged_list, list_selection_key
+from components.repository import get_repository, ids_condition
+from components.bulk_edit import bulk_actions
+from components.lookup import get_person_names, get_person_dossier
+from components.entity_selector import entity_selectbox
+
+person_repository = get_repository('person')
+
+def delete_persons(conditions, params):
+    """
+    删除满足条件的人员，并从项目成员列表中移除这些人员；
+    在写队列的一个事务中以集合语句执行，任一人员是项目负责人时不删除
+
+    参数:
+    - conditions: 人员查询条件列表（以AND连接）
+    - params: 条件参数
+
+    返回:
+    - str: 成功消息
+
+    异常:
+    - ValueError: 有人员是项目负责人
+    """
+    where = " AND ".join(conditions) if conditions else "1"
+
+    def delete(conn):
+        # 在写事务中取出要删除的人员并检查是否是项目负责人，避免检查后被其他会话修改
+        ids = json.dumps([row[0] for row in conn.execute(f"SELECT id FROM person WHERE {where}", list(params))])
+        leader_projects = conn.execute(
+            "SELECT id, name FROM project WHERE leader_id IN (SELECT value FROM json_each(?))", (ids,)
+        ).fetchall()
+        if leader_projects:
+            return leader_projects, 0, 0
+
+        # 从所有包含这些人员的项目成员列表中移除，保留其余成员的顺序
+        affected_count = conn.execute('''
+            UPDATE project SET members = COALESCE((
+                SELECT group_concat(value, ',') FROM (
+                    SELECT j.value FROM json_each('[' || members || ']') j
+                    WHERE j.value NOT IN (SELECT value FROM json_each(?1))
+                    ORDER BY j.key)
+            ), ''), version = version + 1
+            WHERE id IN (SELECT project_id FROM project_member
+                         WHERE person_id IN (SELECT value FROM json_each(?1)))
+        ''', (ids,)).rowcount
+
+        # 删除人员
+        deleted = conn.execute("DELETE FROM person WHERE id IN (SELECT value FROM json_each(?))", (ids,)).rowcount
+        return [], affected_count, deleted
+
+    # 通过写队列执行，等待提交完成
+    leader_projects, affected_count, deleted = person_repository.write(delete)
+    if leader_projects:
+        project_names = ", ".join([p[1] for p in leader_projects])
+        raise ValueError(f"无法删除：人员是以下项目的负责人: {project_names}，请先修改这些项目的负责人后再尝试删除")
+    return f"已删除 {deleted} 名人员，并从 {affected_count} 个项目的成员列表中移除"
 
 def person_management():
     #st.title("人员管理")
@@ -31,10 +89,8 @@ def person_management():
 
     # 使用expander，根据会话状态决定是否展开
     with st.expander("添加/编辑人员信息", expanded=st.session_state.person_expander_expanded):
-        # 获取所有人员信息用于编辑
-        conn = get_connection()
-        df = pd.read_sql("SELECT * FROM person", conn)
-        conn.close()
+        # 人员选择使用共享的人员ID到姓名映射，不再读取整张人员表
+        person_names = get_person_names()
 
         # 编辑模式切换回调函数
         def set_add_mode():
@@ -44,6 +100,8 @@ def person_management():
             st.session_state.person_success_message = None
             # 保持expander展开
             st.session_state.person_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('person')
             if 'person_selector' in st.session_state:
                 del st.session_state.person_selector
 
@@ -53,6 +111,8 @@ def person_management():
             st.session_state.person_success_message = None
             # 保持expander展开
             st.session_state.person_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('person')
 
         # 人员选择回调函数
         def on_person_select():
@@ -61,6 +121,8 @@ def person_management():
             st.session_state.person_success_message = None
             # 保持expander展开
             st.session_state.person_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('person')
 
         # 创建两个按钮用于切换模式，使用更紧凑的布局
         button_cols = st.columns([1, 1, 3])  # 两个按钮占用较小空间，右侧留白
@@ -72,23 +134,19 @@ def person_management():
         # 获取当前模式
         edit_mode = st.session_state.person_edit_mode
 
-        # 如果是编辑模式，显示人员选择器
-        if edit_mode and not df.empty:
-            person_id = st.selectbox(
-                "选择要编辑的人员",
-                options=df['id'].tolist(),
-                format_func=lambda x: df[df['id'] == x]['name'].iloc[0],
-                key="person_selector",
-                on_change=on_person_select
-            )
-
+        # 如果是编辑模式，显示可搜索的人员选择器
+        person_id = entity_selectbox("选择要编辑的人员", 'person', "person_selector",
+                                     on_change=on_person_select) if edit_mode else None
+        if person_id is not None:
             # 获取选中的人员数据
-            if st.session_state.person_selected_id:
+            if st.session_state.person_selected_id in person_names:
                 person_id = st.session_state.person_selected_id
-                person_data = df[df['id'] == person_id].iloc[0]
             else:
-                person_data = df[df['id'] == person_id].iloc[0]
                 st.session_state.person_selected_id = person_id
+            person_data = person_repository.get(person_id)
+
+            # 编辑期间使用开始编辑时载入的数据，保存时据其版本号检查并发修改
+            person_data = editing_row('person', person_id, person_data)
         else:
             person_id = None
             person_data = pd.Series({"name": "", "gender": "男", "birth_date": None, "id_card": "",
@@ -97,6 +155,12 @@ def person_management():
                                      "position": "", "skill_level": ""})
             st.session_state.person_selected_id = None
 
+        # 保存时发现并发修改，显示冲突处理界面
+        if edit_mode and show_version_conflict('person', 'person'):
+            st.session_state.person_success_message = "已用您的修改覆盖最新数据"
+            st.session_state.person_expander_expanded = True
+            st.rerun()
+
         # 表单用于添加或编辑人员
         with st.form("person_form"):
 
@@ -165,6 +229,8 @@ def person_management():
                     if not id_card_valid:
                         st.error(id_card_error)
                         return
+                    # 校验码 x 统一保存为大写，与导入的身份证号一致
+                    id_card = id_card.strip().upper()
 
                     # 验证手机号
                     phone_valid, phone_error = validate_phone(phone)
@@ -173,45 +239,35 @@ def person_management():
                         return
 
                     try:
-                        conn = get_connection()
-                        cursor = conn.cursor()
-
                         # 格式化日期
                         birth_date_str = birth_date.strftime("%Y-%m-%d")
                         graduation_date_str = graduation_date.strftime("%Y-%m-%d")
 
                         if st.session_state.person_edit_mode and st.session_state.person_selected_id:
                             # 更新现有记录
-                            cursor.execute('''
-                                UPDATE person SET name=?, gender=?, birth_date=?, id_card=?,
-                                education=?, school=?, graduation_date=?, major=?, title=?, phone=?,
-                                department=?, position=?, skill_level=?
-                                WHERE id=?
-                            ''', (name, gender, birth_date_str, id_card, education, school,
-                                 graduation_date_str, major, title, phone, department, position,
-                                 skill_level, st.session_state.person_selected_id))
+                            save_versioned('person', 'person', st.session_state.person_selected_id, person_data['version'], {
+                                'name': name, 'gender': gender, 'birth_date': birth_date_str, 'id_card': id_card,
+                                'education': education, 'school': school, 'graduation_date': graduation_date_str,
+                                'major': major, 'title': title, 'phone': phone, 'department': department,
+                                'position': position, 'skill_level': skill_level,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.person_success_message = f"已更新 {name} 的信息"
                             # 保持expander展开
                             st.session_state.person_expander_expanded = True
                         else:
                             # 新增记录
-                            cursor.execute('''
-                                INSERT INTO person (name, gender, birth_date, id_card, education,
-                                                  school, graduation_date, major, title, phone,
-                                                  department, position, skill_level)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (name, gender, birth_date_str, id_card, education, school,
-                                 graduation_date_str, major, title, phone, department, position,
-                                 skill_level))
+                            person_repository.insert({
+                                'name': name, 'gender': gender, 'birth_date': birth_date_str, 'id_card': id_card,
+                                'education': education, 'school': school, 'graduation_date': graduation_date_str,
+                                'major': major, 'title': title, 'phone': phone, 'department': department,
+                                'position': position, 'skill_level': skill_level,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.person_success_message = f"已添加 {name} 的信息"
                             # 保持expander展开
                             st.session_state.person_expander_expanded = True
 
-                        conn.commit()
-                        conn.close()
-
                         # 刷新页面
                         st.rerun()
                     except Exception as e:
@@ -221,9 +277,8 @@ def person_management():
 
     st.subheader("人员列表")
 
-    # 直接从数据库获取人员数据
-    conn = get_connection()
-    df = pd.read_sql("SELECT * FROM person", conn)
+    # 在数据库中筛选、排序和分页，只读取当前页
+    df = paged_list('person')
 
     if not df.empty:
         # 创建一个新的DataFrame，只包含我们需要的列，确保正确的列名翻译
@@ -245,15 +300,17 @@ def person_management():
         formatted_df['position'] = df['position']
         formatted_df['skill_level'] = df['skill_level']
 
-        # 使用自定义表格显示工具
-        display_dataframe(formatted_df, 'person')
+        # 使用自定义表格显示工具，可勾选多行进行批量操作
+        selected_rows = display_dataframe(formatted_df, 'person', selection_key=list_selection_key('person'))
+        selected_ids = df['id'].iloc[selected_rows].tolist()
 
-        # 详细信息查看和删除选项
+        # 详细信息查看和删除选项，从当前页中选择
+        page_names = dict(zip(df['id'], df['name']))
         col_view, col_del = st.columns(2)
 
         with col_view:
-            view_id = st.selectbox("选择要查看详细信息的人员", df['id'].tolist(),
-                                 format_func=lambda x: df[df['id'] == x]['name'].iloc[0])
+            view_id = st.selectbox("选择要查看详细信息的人员（当前页）", df['id'].tolist(),
+                                 format_func=page_names.get)
             if st.button("查看详细信息"):
                 person_data = df[df['id'] == view_id].iloc[0]
 
@@ -285,26 +342,21 @@ def person_management():
                 st.markdown(f"**毕业日期**: {person_data['graduation_date']}")
                 st.markdown(f"**专业**: {person_data['major']}")
 
-                # 获取此人参与的项目
-                projects_query = "SELECT * FROM project WHERE members LIKE ? OR leader_id = ?"
-                projects_df = pd.read_sql(projects_query, conn, params=[f'%{view_id}%', view_id])
+                # 一次查询取出此人关联的全部项目、专利、标准和论文
+                dossier = get_person_dossier(view_id)
 
+                projects_df = dossier[dossier['entity'] == 'project']
                 if not projects_df.empty:
                     st.markdown("##### 参与的项目")
                     for _, project in projects_df.iterrows():
-                        is_leader = project['leader_id'] == view_id
-                        role = "主负责人" if is_leader else "项目成员"
-                        status = project['status'] if 'status' in project else "进行中"
-                        st.markdown(f"- **{project['name']}** ({project['start_date']} 至 {project['end_date']}) - {role} - 状态: {status}")
+                        role = "主负责人" if project['role'] == 'leader' else "项目成员"
+                        st.markdown(f"- **{project['name']}** ({project['date']} 至 {project['end_date']}) - {role} - 状态: {project['status']}")
                 else:
                     st.info("该人员未参与任何项目")
 
-                # 获取此人关联的专利信息（作为所有人或参与者）
-                patents_owner_query = "SELECT * FROM patent WHERE owner_id = ?"
-                patents_owner_df = pd.read_sql(patents_owner_query, conn, params=[view_id])
-
-                patents_participant_query = "SELECT * FROM patent WHERE participants LIKE ?"
-                patents_participant_df = pd.read_sql(patents_participant_query, conn, params=[f'%{view_id}%'])
+                # 此人关联的专利信息（作为所有人或参与者）
+                patents_owner_df = dossier[(dossier['entity'] == 'patent') & (dossier['role'] == 'owner')]
+                patents_participant_df = dossier[(dossier['entity'] == 'patent') & (dossier['role'] == 'participant')]
 
                 if not patents_owner_df.empty or not patents_participant_df.empty:
                     st.markdown("##### 关联的专利")
@@ -313,35 +365,29 @@ def person_management():
                     if not patents_owner_df.empty:
                         st.markdown("**作为专利所有人**")
                         for _, patent in patents_owner_df.iterrows():
-                            cert_status = patent['certificate'] if 'certificate' in patent else "无"
-                            st.markdown(f"- **{patent['name']}** ({patent['type']}) - 专利号: {patent['patent_number']} - 证书状态: {cert_status}")
+                            st.markdown(f"- **{patent['name']}** ({patent['category']}) - 专利号: {patent['number']} - 证书状态: {patent['status']}")
 
                     # 显示作为专利参与人的专利
                     if not patents_participant_df.empty:
                         st.markdown("**作为专利参与人**")
                         for _, patent in patents_participant_df.iterrows():
-                            cert_status = patent['certificate'] if 'certificate' in patent else "无"
-                            st.markdown(f"- **{patent['name']}** ({patent['type']}) - 专利号: {patent['patent_number']} - 证书状态: {cert_status}")
+                            st.markdown(f"- **{patent['name']}** ({patent['category']}) - 专利号: {patent['number']} - 证书状态: {patent['status']}")
                 else:
                     st.info("该人员未关联任何专利")
 
-                # 获取此人参与的标准
-                standards_query = "SELECT * FROM standard WHERE participant_id = ?"
-                standards_df = pd.read_sql(standards_query, conn, params=[view_id])
+                # 此人参与的标准
+                standards_df = dossier[dossier['entity'] == 'standard']
 
                 if not standards_df.empty:
                     st.markdown("##### 参与的标准")
                     for _, standard in standards_df.iterrows():
-                        st.markdown(f"- **{standard['name']}** ({standard['type']}) - 标准号: {standard['code']} - 发布日期: {standard['release_date']}")
+                        st.markdown(f"- **{standard['name']}** ({standard['category']}) - 标准号: {standard['number']} - 发布日期: {standard['date']}")
                 else:
                     st.info("该人员未参与任何标准")
 
-                # 获取此人关联的论文信息（作为第一作者或参与作者）
-                papers_first_author_query = "SELECT * FROM paper WHERE first_author_id = ?"
-                papers_first_author_df = pd.read_sql(papers_first_author_query, conn, params=[view_id])
-
-                papers_co_author_query = "SELECT * FROM paper WHERE co_authors LIKE ?"
-                papers_co_author_df = pd.read_sql(papers_co_author_query, conn, params=[f'%{view_id}%'])
+                # 此人关联的论文信息（作为第一作者或参与作者）
+                papers_first_author_df = dossier[(dossier['entity'] == 'paper') & (dossier['role'] == 'first_author')]
+                papers_co_author_df = dossier[(dossier['entity'] == 'paper') & (dossier['role'] == 'co_author')]
 
                 if not papers_first_author_df.empty or not papers_co_author_df.empty:
                     st.markdown("##### 关联的论文")
@@ -350,66 +396,41 @@ def person_management():
                     if not papers_first_author_df.empty:
                         st.markdown("**作为第一作者**")
                         for _, paper in papers_first_author_df.iterrows():
-                            volume = f" - {paper['volume_info']}" if 'volume_info' in paper and paper['volume_info'] else ""
-                            st.markdown(f"- **{paper['title']}** - {paper['journal']} ({paper['journal_type']}){volume} - 发表日期: {paper['publish_date']}")
+                            volume = f" - {paper['volume_info']}" if paper['volume_info'] else ""
+                            st.markdown(f"- **{paper['name']}** - {paper['number']} ({paper['category']}){volume} - 发表日期: {paper['date']}")
 
                     # 显示作为参与作者的论文
                     if not papers_co_author_df.empty:
                         st.markdown("**作为参与作者**")
                         for _, paper in papers_co_author_df.iterrows():
-                            volume = f" - {paper['volume_info']}" if 'volume_info' in paper and paper['volume_info'] else ""
-                            st.markdown(f"- **{paper['title']}** - {paper['journal']} ({paper['journal_type']}){volume} - 发表日期: {paper['publish_date']}")
+                            volume = f" - {paper['volume_info']}" if paper['volume_info'] else ""
+                            st.markdown(f"- **{paper['name']}** - {paper['number']} ({paper['category']}){volume} - 发表日期: {paper['date']}")
                 else:
                     st.info("该人员未关联任何论文")
 
         with col_del:
-            del_id = st.selectbox("选择要删除的人员", df['id'].tolist(),
-                                format_func=lambda x: df[df['id'] == x]['name'].iloc[0])
+            del_id = st.selectbox("选择要删除的人员（当前页）", df['id'].tolist(),
+                                format_func=page_names.get)
 
             if st.button("删除人员"):
+                condition, params = ids_condition([del_id])
                 try:
-                    conn = get_connection()
-                    cursor = conn.cursor()
-
-                    # 先检查此人是否是项目负责人
-                    cursor.execute("SELECT id, name FROM project WHERE leader_id = ?", (del_id,))
-                    leader_projects = cursor.fetchall()
-
-                    if leader_projects:
-                        project_names = ", ".join([p[1] for p in leader_projects])
-                        st.error(f"无法删除：该人员是以下项目的负责人: {project_names}")
-                        st.info("请先修改这些项目的负责人后再尝试删除")
-                    else:
-                        # 更新所有包含此人的项目成员列表
-                        cursor.execute("SELECT id, members FROM project WHERE members LIKE ?", (f'%{del_id}%',))
-                        affected_projects = cursor.fetchall()
-
-                        for project in affected_projects:
-                            project_id, members_str = project
-                            # 从成员列表中移除此人
-                            member_ids = [int(m) for m in members_str.split(',') if m and int(m) != del_id]
-                            new_members_str = ",".join([str(m) for m in member_ids])
-
-                            # 更新项目成员
-                            cursor.execute("UPDATE project SET members = ? WHERE id = ?",
-                                          (new_members_str, project_id))
-
-                        # 删除人员
-                        cursor.execute("DELETE FROM person WHERE id = ?", (del_id,))
-                        conn.commit()
-                        # 保存成功消息到会话状态
-                        st.session_state.person_success_message = f"已删除人员，并从 {len(affected_projects)} 个项目的成员列表中移除"
-                        # 保持expander展开
-                        st.session_state.person_expander_expanded = True
-                        st.rerun()
-
-                    conn.close()
+                    message = delete_persons([condition], params)
+                except ValueError as e:
+                    st.error(str(e))
                 except Exception as e:
                     st.error(f"删除失败: {str(e)}")
+                else:
+                    # 保存成功消息到会话状态
+                    st.session_state.person_success_message = message
+                    # 保持expander展开
+                    st.session_state.person_expander_expanded = True
+                    st.rerun()
+
+        # 对勾选的人员或全部符合条件的人员批量修改、删除
+        bulk_actions('person', selected_ids, delete_func=delete_persons)
     else:
-        st.info("暂无人员信息")
-
-    conn.close()
+        st.info("没有符合条件的人员信息")
 
 # 辅助函数 - 显示人员统计信息
 def show_person_statistics():
@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
-from components.db_utils import get_connection
+from components.analytics_db import get_analytics_connection
+from components.row_version import editing_row, release_editing_row, save_versioned, show_version_conflict
+from components.lookup import get_person_names
+from components.entity_selector import entity_selectbox, entity_multiselect
 import datetime
 from components.table_utils import translate_columns, display_dataframe
+from components.list_view import paged_list, list_selection_key
+from components.repository import get_repository
+from components.bulk_edit import bulk_actions
+
+project_repository = get_repository('project')
 
 def project_management():
     #st.title("项目管理")
@@ -30,12 +38,11 @@ def project_management():
 
     # 使用expander，根据会话状态决定是否展开
     with st.expander("添加/编辑项目信息", expanded=st.session_state.project_expander_expanded):
-        # 获取所有项目信息用于编辑
-        conn = get_connection()
-        projects_df = pd.read_sql("SELECT * FROM project", conn)
+        # 编辑选择使用ID到名称的映射，选中后再读取该条记录
+        project_labels = project_repository.labels()
 
-        # 获取所有人员信息用于选择
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+        # 人员ID到姓名的映射，用于显示已选择的人员
+        persons_dict = get_person_names()
 
         # 编辑模式切换回调函数
         def set_add_mode():
@@ -45,6 +52,8 @@ def project_management():
             st.session_state.project_success_message = None
             # 保持expander展开
             st.session_state.project_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('project')
             if 'project_selector' in st.session_state:
                 del st.session_state.project_selector
 
@@ -54,6 +63,8 @@ def project_management():
             st.session_state.project_success_message = None
             # 保持expander展开
             st.session_state.project_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('project')
 
         # 项目选择回调函数
         def on_project_select():
@@ -62,6 +73,8 @@ def project_management():
             st.session_state.project_success_message = None
             # 保持expander展开
             st.session_state.project_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('project')
 
         # 创建两个按钮用于切换模式，使用更紧凑的布局
         button_cols = st.columns([1, 1, 3])  # 两个按钮占用较小空间，右侧留白
@@ -73,23 +86,19 @@ def project_management():
         # 获取当前模式
         edit_mode = st.session_state.project_edit_mode
 
-        # 如果是编辑模式，显示项目选择器
-        if edit_mode and not projects_df.empty:
-            project_id = st.selectbox(
-                "选择要编辑的项目",
-                options=projects_df['id'].tolist(),
-                format_func=lambda x: projects_df[projects_df['id'] == x]['name'].iloc[0],
-                key="project_selector",
-                on_change=on_project_select
-            )
-
+        # 如果是编辑模式，显示可搜索的项目选择器
+        project_id = entity_selectbox("选择要编辑的项目", 'project', "project_selector",
+                                      on_change=on_project_select) if edit_mode else None
+        if project_id is not None:
             # 获取选中的项目数据
-            if st.session_state.project_selected_id:
+            if st.session_state.project_selected_id in project_labels:
                 project_id = st.session_state.project_selected_id
-                project_data = projects_df[projects_df['id'] == project_id].iloc[0]
             else:
-                project_data = projects_df[projects_df['id'] == project_id].iloc[0]
                 st.session_state.project_selected_id = project_id
+            project_data = project_repository.get(project_id)
+
+            # 编辑期间使用开始编辑时载入的数据，保存时据其版本号检查并发修改
+            project_data = editing_row('project', project_id, project_data)
 
             # 获取已有成员
             if project_data['members']:
@@ -103,6 +112,39 @@ def project_management():
             current_members = []
             st.session_state.project_selected_id = None
 
+        # 保存时发现并发修改，显示冲突处理界面
+        if edit_mode and show_version_conflict('project', 'project'):
+            st.session_state.project_success_message = "已用您的修改覆盖最新数据"
+            st.session_state.project_expander_expanded = True
+            st.rerun()
+
+        # 成员和负责人在表单之外选择：搜索人员需要刷新页面，下拉框只包含已选成员和匹配的人员
+        if persons_dict:
+            members = entity_multiselect("项目成员", 'person', "project_members_picker",
+                                         current_members, scope=project_id)
+
+            # 负责人选择（从成员中选择），选择结果保存在会话状态中，成员变化时不会丢失；编辑的项目变化时重新载入
+            if 'project_leader_picker' not in st.session_state or st.session_state.get('project_leader_scope') != project_id:
+                st.session_state.project_leader_scope = project_id
+                st.session_state.project_leader_picker = project_data["leader_id"]
+            current_leader = st.session_state.project_leader_picker
+            leader_options = [m for m in members]
+            if current_leader in persons_dict and current_leader not in leader_options:
+                leader_options.append(current_leader)
+
+            if leader_options:
+                if current_leader not in leader_options:
+                    st.session_state.project_leader_picker = leader_options[0]
+                leader_id = st.selectbox("主负责人", options=leader_options, key="project_leader_picker",
+                                       format_func=lambda x: persons_dict.get(x, f"ID:{x}"))
+            else:
+                leader_id = None
+                st.warning("请先选择项目成员以指定负责人")
+        else:
+            members = []
+            leader_id = None
+            st.warning("暂无人员信息，请先添加人员")
+
         # 表单用于添加或编辑项目
         with st.form("project_form"):
 
@@ -149,30 +191,6 @@ def project_management():
 
                 auto_status = st.checkbox("根据日期自动判断状态", value=not edit_mode)
 
-            # 成员选择放在下方，占据整行空间
-            if not persons_df.empty:
-                persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
-                members = st.multiselect("项目成员", options=persons_df['id'].tolist(),
-                                        default=current_members,
-                                        format_func=lambda x: persons_dict.get(x, f"ID:{x}"))
-
-                # 负责人选择（从成员中选择）
-                leader_options = [m for m in members]
-                if project_data["leader_id"] in persons_dict and project_data["leader_id"] not in leader_options:
-                    leader_options.append(project_data["leader_id"])
-
-                if leader_options:
-                    leader_id = st.selectbox("主负责人", options=leader_options,
-                                           index=0 if project_data["leader_id"] is None else leader_options.index(project_data["leader_id"]) if project_data["leader_id"] in leader_options else 0,
-                                           format_func=lambda x: persons_dict.get(x, f"ID:{x}"))
-                else:
-                    leader_id = None
-                    st.warning("请先选择项目成员以指定负责人")
-            else:
-                members = []
-                leader_id = None
-                st.warning("暂无人员信息，请先添加人员")
-
             outcome = st.text_area("项目成果", value=project_data["outcome"])
 
             submit_button = st.form_submit_button("保存")
@@ -189,9 +207,6 @@ def project_management():
                     st.error("必须指定一个主负责人")
                 else:
                     try:
-                        conn = get_connection()
-                        cursor = conn.cursor()
-
                         # 格式化日期
                         start_date_str = start_date.strftime("%Y-%m-%d")
                         end_date_str = end_date.strftime("%Y-%m-%d")
@@ -209,45 +224,37 @@ def project_management():
 
                         if st.session_state.project_edit_mode and st.session_state.project_selected_id:
                             # 更新现有记录
-                            cursor.execute('''
-                                UPDATE project SET name=?, start_date=?, end_date=?, members=?,
-                                leader_id=?, outcome=?, status=? WHERE id=?
-                            ''', (name, start_date_str, end_date_str, members_str,
-                                 leader_id, outcome, status, st.session_state.project_selected_id))
+                            save_versioned('project', 'project', st.session_state.project_selected_id, project_data['version'], {
+                                'name': name, 'start_date': start_date_str, 'end_date': end_date_str, 'members': members_str,
+                                'leader_id': leader_id, 'outcome': outcome, 'status': status,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.project_success_message = f"已更新项目 {name} 的信息"
                             # 保持expander展开
                             st.session_state.project_expander_expanded = True
                         else:
                             # 新增记录
-                            cursor.execute('''
-                                INSERT INTO project (name, start_date, end_date, members, leader_id, outcome, status)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                            ''', (name, start_date_str, end_date_str, members_str, leader_id, outcome, status))
+                            project_repository.insert({
+                                'name': name, 'start_date': start_date_str, 'end_date': end_date_str, 'members': members_str,
+                                'leader_id': leader_id, 'outcome': outcome, 'status': status,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.project_success_message = f"已添加项目 {name} 的信息"
                             # 保持expander展开
                             st.session_state.project_expander_expanded = True
 
-                        conn.commit()
-                        conn.close()
-
                         # 刷新页面
                         st.rerun()
                     except Exception as e:
                         st.error(f"保存失败: {str(e)}")
 
-        conn.close()
-
     st.subheader("项目列表")
 
-    # 直接从数据库获取项目数据
-    conn = get_connection()
-    projects_df = pd.read_sql("SELECT * FROM project", conn)
+    # 在数据库中筛选、排序和分页，只读取当前页
+    projects_df = paged_list('project')
 
     # 获取人员信息用于显示
-    persons_df = pd.read_sql("SELECT id, name FROM person", conn)
-    persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
+    persons_dict = get_person_names()
 
     if not projects_df.empty:
         # 格式化显示数据
@@ -281,15 +288,17 @@ def project_management():
 
         formatted_df['成员'] = display_df['members'].apply(format_members)
 
-        # 使用自定义表格显示工具
-        display_dataframe(formatted_df, 'project')
+        # 使用自定义表格显示工具，可勾选多行进行批量操作
+        selected_rows = display_dataframe(formatted_df, 'project', selection_key=list_selection_key('project'))
+        selected_ids = projects_df['id'].iloc[selected_rows].tolist()
 
-        # 详细信息查看和删除选项
+        # 详细信息查看和删除选项，从当前页中选择
+        page_labels = dict(zip(projects_df['id'], projects_df['name']))
         col_view, col_del = st.columns(2)
 
         with col_view:
-            view_id = st.selectbox("选择要查看详细信息的项目", projects_df['id'].tolist(),
-                                 format_func=lambda x: projects_df[projects_df['id'] == x]['name'].iloc[0])
+            view_id = st.selectbox("选择要查看详细信息的项目（当前页）", projects_df['id'].tolist(),
+                                 format_func=page_labels.get)
 
             if st.button("查看详细信息"):
                 project_data = projects_df[projects_df['id'] == view_id].iloc[0]
@@ -329,16 +338,12 @@ def project_management():
                 st.text(project_data['outcome'])
 
         with col_del:
-            del_id = st.selectbox("选择要删除的项目", projects_df['id'].tolist(),
-                                format_func=lambda x: projects_df[projects_df['id'] == x]['name'].iloc[0])
+            del_id = st.selectbox("选择要删除的项目（当前页）", projects_df['id'].tolist(),
+                                format_func=page_labels.get)
 
             if st.button("删除项目"):
                 try:
-                    conn = get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM project WHERE id = ?", (del_id,))
-                    conn.commit()
-                    conn.close()
+                    project_repository.delete(del_id)
                     # 保存成功消息到会话状态
                     st.session_state.project_success_message = "已删除项目"
                     # 保持expander展开
@@ -346,24 +351,22 @@ def project_management():
                     st.rerun()
                 except Exception as e:
                     st.error(f"删除失败: {str(e)}")
-    else:
-        st.info("暂无项目信息")
 
-    conn.close()
+        # 对勾选的项目或全部符合条件的项目批量修改、删除
+        bulk_actions('project', selected_ids)
+    else:
+        st.info("没有符合条件的项目信息")
 
 # 辅助函数 - 显示项目统计信息
 def show_statistics():
-    conn = get_connection()
+    # 统计查询读取只读分析副本
+    conn = get_analytics_connection()
 
     # 获取人员参与项目数量统计
     query = """
-    SELECT p.id, p.name, COUNT(pr.id) as project_count
+    SELECT p.id, p.name, COALESCE(c.project_count, 0) as project_count
     FROM person p
-    LEFT JOIN (
-        SELECT id, members, leader_id
-        FROM project
-    ) pr ON (pr.members LIKE '%' || p.id || '%' OR pr.leader_id = p.id)
-    GROUP BY p.id
+    LEFT JOIN person_contribution c ON c.person_id = p.id
     ORDER BY project_count DESC
     """
 
@@ -2,10 +2,11 @@ import streamlit as st
 import pandas as pd
 import sqlite3
 from components.db_utils import get_connection
-import io
-import base64
+from components.lookup import get_person_names, get_entity_labels
+from components.entity_selector import entity_selectbox
 from datetime import datetime
-from components.table_utils import translate_columns, get_display_columns, display_dataframe
+from components.table_utils import translate_columns, display_dataframe
+from components.export_utils import save_query_results, excel_results_export
 
 def query_management():
     st.subheader("数据查询")
@@ -15,38 +16,19 @@ def query_management():
         "按人员查询", "按项目查询", "按标准查询", "按专利查询", "按论文查询"
     ])
 
-    # 生成Excel下载链接的函数
-    def get_excel_download_link(df, filename):
-        # 使用BytesIO对象保存Excel文件
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, sheet_name='Sheet1', index=False)
-
-        # 获取二进制数据并转换为base64
-        excel_data = output.getvalue()
-        b64 = base64.b64encode(excel_data).decode()
-
-        # 生成下载链接
-        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}">下载Excel文件</a>'
-        return href
-
     # 按人员查询
     with query_tab1:
         st.write("根据人员信息查询关联数据")
 
         # 获取所有人员数据
         conn = get_connection()
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+        persons_dict = get_person_names()
 
-        if persons_df.empty:
+        if not persons_dict:
             st.info("暂无人员数据")
         else:
-            # 下拉选择人员
-            selected_person = st.selectbox(
-                "选择人员",
-                options=persons_df['id'].tolist(),
-                format_func=lambda x: persons_df[persons_df['id'] == x]['name'].iloc[0]
-            )
+            # 可搜索的人员选择
+            selected_person = entity_selectbox("选择人员", 'person', "person_select")
 
             # 多选查询类型
             query_types = st.multiselect(
@@ -55,10 +37,10 @@ def query_management():
                 default=["基本信息"]
             )
 
-            if st.button("查询"):
+            if st.button("查询", disabled=selected_person is None):
                 results = {}
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename_base = f"人员查询_{persons_df[persons_df['id'] == selected_person]['name'].iloc[0]}_{timestamp}"
+                filename_base = f"人员查询_{persons_dict.get(selected_person)}_{timestamp}"
 
                 # 基本信息查询
                 if "基本信息" in query_types:
@@ -97,16 +79,14 @@ def query_management():
 
                 # 关联项目查询
                 if "关联项目" in query_types:
-                    projects_query = f"""
+                    projects_query = """
                     SELECT p.* FROM project p
-                    WHERE p.leader_id = {selected_person} OR p.members LIKE '%{selected_person}%'
+                    WHERE p.leader_id = ?
+                       OR p.id IN (SELECT project_id FROM project_member WHERE person_id = ?)
                     """
-                    projects = pd.read_sql(projects_query, conn)
+                    projects = pd.read_sql(projects_query, conn, params=[selected_person, selected_person])
 
                     if not projects.empty:
-                        # 格式化项目数据，将leader_id替换为姓名
-                        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
-
                         # 处理负责人
                         def format_leader(leader_id):
                             if pd.isna(leader_id) or leader_id is None:
@@ -170,9 +150,6 @@ def query_management():
                     standards = pd.read_sql(standards_query, conn)
 
                     if not standards.empty:
-                        # 格式化标准数据，将participant_id替换为姓名
-                        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
-
                         def format_participant(participant_id):
                             if pd.isna(participant_id) or participant_id is None:
                                 return "无"
@@ -214,16 +191,14 @@ def query_management():
 
                 # 关联专利查询
                 if "关联专利" in query_types:
-                    patents_query = f"""
+                    patents_query = """
                     SELECT * FROM patent
-                    WHERE owner_id = {selected_person} OR participants LIKE '%{selected_person}%'
+                    WHERE owner_id = ?
+                       OR id IN (SELECT patent_id FROM patent_participant WHERE person_id = ?)
                     """
-                    patents = pd.read_sql(patents_query, conn)
+                    patents = pd.read_sql(patents_query, conn, params=[selected_person, selected_person])
 
                     if not patents.empty:
-                        # 格式化专利数据，将owner_id和participants替换为姓名
-                        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
-
                         def format_owner(owner_id):
                             if pd.isna(owner_id) or owner_id is None:
                                 return "无"
@@ -275,16 +250,14 @@ def query_management():
 
                 # 关联论文查询
                 if "关联论文" in query_types:
-                    papers_query = f"""
+                    papers_query = """
                     SELECT * FROM paper
-                    WHERE first_author_id = {selected_person} OR co_authors LIKE '%{selected_person}%'
+                    WHERE first_author_id = ?
+                       OR id IN (SELECT paper_id FROM paper_coauthor WHERE person_id = ?)
                     """
-                    papers = pd.read_sql(papers_query, conn)
+                    papers = pd.read_sql(papers_query, conn, params=[selected_person, selected_person])
 
                     if not papers.empty:
-                        # 格式化论文数据，将first_author_id和co_authors替换为姓名
-                        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
-
                         def format_first_author(author_id):
                             if pd.isna(author_id) or author_id is None:
                                 return "无"
@@ -333,28 +306,11 @@ def query_management():
                     else:
                         st.info("该人员未关联任何论文")
 
-                # 导出数据
-                if results:
-                    st.subheader("导出查询结果")
-
-                    # 为每个查询结果创建下载链接
-                    for key, df in results.items():
-                        filename = f"{filename_base}_{key}.xlsx"
-                        download_link = get_excel_download_link(df, filename)
-                        st.markdown(f"{key}: {download_link}", unsafe_allow_html=True)
-
-                    # 创建一个包含所有结果的Excel文件
-                    if len(results) > 1:
-                        # 创建Excel writer
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            for key, df in results.items():
-                                df.to_excel(writer, sheet_name=key[:31], index=False)  # Excel限制工作表名不超过31个字符
-
-                        excel_data = output.getvalue()
-                        b64 = base64.b64encode(excel_data).decode()
-                        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename_base}_全部数据.xlsx">下载所有查询结果</a>'
-                        st.markdown(href, unsafe_allow_html=True)
+                # 保存查询结果，点击生成按钮时才写入Excel文件
+                save_query_results(results, filename_base, key="query_person")
+
+            # 导出最近一次查询的结果
+            excel_results_export(key="query_person")
 
     # 按项目查询
     with query_tab2:
@@ -362,19 +318,13 @@ def query_management():
 
         # 获取所有项目数据
         conn = get_connection()
-        projects_df = pd.read_sql("SELECT id, name FROM project", conn)
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+        project_labels = get_entity_labels('project')
 
-        if projects_df.empty:
+        if not project_labels:
             st.info("暂无项目数据")
         else:
-            # 下拉选择项目
-            selected_project = st.selectbox(
-                "选择项目",
-                options=projects_df['id'].tolist(),
-                format_func=lambda x: projects_df[projects_df['id'] == x]['name'].iloc[0],
-                key="project_select"
-            )
+            # 可搜索的项目选择
+            selected_project = entity_selectbox("选择项目", 'project', "project_select")
 
             # 多选查询类型
             query_types = st.multiselect(
@@ -384,17 +334,17 @@ def query_management():
                 key="project_query_types"
             )
 
-            if st.button("查询", key="project_query_button"):
+            if st.button("查询", key="project_query_button", disabled=selected_project is None):
                 results = {}
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename_base = f"项目查询_{projects_df[projects_df['id'] == selected_project]['name'].iloc[0]}_{timestamp}"
+                filename_base = f"项目查询_{project_labels[selected_project]}_{timestamp}"
 
                 # 项目详情查询
                 if "项目详情" in query_types:
                     project_info = pd.read_sql(f"SELECT * FROM project WHERE id = {selected_project}", conn)
                     if not project_info.empty:
                         # 格式化项目数据，将leader_id和members替换为姓名
-                        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
+                        persons_dict = get_person_names()
 
                         def format_leader(leader_id):
                             if pd.isna(leader_id) or leader_id is None:
@@ -487,11 +437,13 @@ def query_management():
                         if members_str:
                             members_list = members_str.split(',')
                             if members_list:
-                                members_query = f"""
-                                SELECT * FROM person
-                                WHERE id IN ({','.join(members_list)})
+                                members_query = """
+                                SELECT person.* FROM project_member m
+                                JOIN person ON person.id = m.person_id
+                                WHERE m.project_id = ?
+                                ORDER BY m.position
                                 """
-                                members = pd.read_sql(members_query, conn)
+                                members = pd.read_sql(members_query, conn, params=[selected_project])
                                 if not members.empty:
                                     # 转换为中文列名
                                     display_members = members.copy()
@@ -532,27 +484,11 @@ def query_management():
                         else:
                             st.info("该项目未设置成员")
 
-                # 导出数据
-                if results:
-                    st.subheader("导出查询结果")
-
-                    # 为每个查询结果创建下载链接
-                    for key, df in results.items():
-                        filename = f"{filename_base}_{key}.xlsx"
-                        download_link = get_excel_download_link(df, filename)
-                        st.markdown(f"{key}: {download_link}", unsafe_allow_html=True)
-
-                    # 创建一个包含所有结果的Excel文件
-                    if len(results) > 1:
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            for key, df in results.items():
-                                df.to_excel(writer, sheet_name=key[:31], index=False)
+                # 保存查询结果，点击生成按钮时才写入Excel文件
+                save_query_results(results, filename_base, key="query_project")
 
-                        excel_data = output.getvalue()
-                        b64 = base64.b64encode(excel_data).decode()
-                        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename_base}_全部数据.xlsx">下载所有查询结果</a>'
-                        st.markdown(href, unsafe_allow_html=True)
+            # 导出最近一次查询的结果
+            excel_results_export(key="query_project")
 
     # 按标准查询
     with query_tab3:
@@ -560,19 +496,13 @@ def query_management():
 
         # 获取所有标准数据
         conn = get_connection()
-        standards_df = pd.read_sql("SELECT id, name FROM standard", conn)
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+        standard_labels = get_entity_labels('standard')
 
-        if standards_df.empty:
+        if not standard_labels:
             st.info("暂无标准数据")
         else:
-            # 下拉选择标准
-            selected_standard = st.selectbox(
-                "选择标准",
-                options=standards_df['id'].tolist(),
-                format_func=lambda x: standards_df[standards_df['id'] == x]['name'].iloc[0],
-                key="standard_select"
-            )
+            # 可搜索的标准选择
+            selected_standard = entity_selectbox("选择标准", 'standard', "standard_select")
 
             # 多选查询类型
             query_types = st.multiselect(
@@ -582,17 +512,17 @@ def query_management():
                 key="standard_query_types"
             )
 
-            if st.button("查询", key="standard_query_button"):
+            if st.button("查询", key="standard_query_button", disabled=selected_standard is None):
                 results = {}
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename_base = f"标准查询_{standards_df[standards_df['id'] == selected_standard]['name'].iloc[0]}_{timestamp}"
+                filename_base = f"标准查询_{standard_labels[selected_standard]}_{timestamp}"
 
                 # 标准详情查询
                 if "标准详情" in query_types:
                     standard_info = pd.read_sql(f"SELECT * FROM standard WHERE id = {selected_standard}", conn)
                     if not standard_info.empty:
                         # 格式化标准数据，将participant_id替换为姓名
-                        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
+                        persons_dict = get_person_names()
 
                         def format_participant(participant_id):
                             if pd.isna(participant_id) or participant_id is None:
@@ -655,49 +585,12 @@ def query_management():
                         else:
                             st.info("该标准没有记录参与人员")
 
-                # 导出数据
-                if results:
-                    st.subheader("导出查询结果")
-
-                    # 为每个查询结果创建下载链接
-                    for key, df in results.items():
-                        filename = f"{filename_base}_{key}.xlsx"
-                        download_link = get_excel_download_link(df, filename)
-                        st.markdown(f"{key}: {download_link}", unsafe_allow_html=True)
-
-                    # 创建一个包含所有结果的Excel文件
-                    if len(results) > 1:
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            for key, df in results.items():
-                                df.to_excel(writer, sheet_name=key[:31], index=False)
-
-                        excel_data = output.getvalue()
-                        b64 = base64.b64encode(excel_data).decode()
-                        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename_base}_全部数据.xlsx">下载所有查询结果</a>'
-                        st.markdown(href, unsafe_allow_html=True)
-
-                # 导出数据
-                if results:
-                    st.subheader("导出查询结果")
-
-                    # 为每个查询结果创建下载链接
-                    for key, df in results.items():
-                        filename = f"{filename_base}_{key}.xlsx"
-                        download_link = get_excel_download_link(df, filename)
-                        st.markdown(f"{key}: {download_link}", unsafe_allow_html=True)
-
-                    # 创建一个包含所有结果的Excel文件
-                    if len(results) > 1:
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            for key, df in results.items():
-                                df.to_excel(writer, sheet_name=key[:31], index=False)
-
-                        excel_data = output.getvalue()
-                        b64 = base64.b64encode(excel_data).decode()
-                        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename_base}_全部数据.xlsx">下载所有查询结果</a>'
-                        st.markdown(href, unsafe_allow_html=True)
+                # 保存查询结果，点击生成按钮时才写入Excel文件
+                save_query_results(results, filename_base, key="query_standard")
+
+            # 导出最近一次查询的结果
+            excel_results_export(key="query_standard")
+
 
     # 按专利查询
     with query_tab4:
@@ -705,19 +598,13 @@ def query_management():
 
         # 获取所有专利数据
         conn = get_connection()
-        patents_df = pd.read_sql("SELECT id, name FROM patent", conn)
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+        patent_labels = get_entity_labels('patent')
 
-        if patents_df.empty:
+        if not patent_labels:
             st.info("暂无专利数据")
         else:
-            # 下拉选择专利
-            selected_patent = st.selectbox(
-                "选择专利",
-                options=patents_df['id'].tolist(),
-                format_func=lambda x: patents_df[patents_df['id'] == x]['name'].iloc[0],
-                key="patent_select"
-            )
+            # 可搜索的专利选择
+            selected_patent = entity_selectbox("选择专利", 'patent', "patent_select")
 
             # 多选查询类型
             query_types = st.multiselect(
@@ -727,17 +614,17 @@ def query_management():
                 key="patent_query_types"
             )
 
-            if st.button("查询", key="patent_query_button"):
+            if st.button("查询", key="patent_query_button", disabled=selected_patent is None):
                 results = {}
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename_base = f"专利查询_{patents_df[patents_df['id'] == selected_patent]['name'].iloc[0]}_{timestamp}"
+                filename_base = f"专利查询_{patent_labels[selected_patent]}_{timestamp}"
 
                 # 专利详情查询
                 if "专利详情" in query_types:
                     patent_info = pd.read_sql(f"SELECT * FROM patent WHERE id = {selected_patent}", conn)
                     if not patent_info.empty:
                         # 格式化专利数据，将owner_id和participants替换为姓名
-                        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
+                        persons_dict = get_person_names()
 
                         def format_owner(owner_id):
                             if pd.isna(owner_id) or owner_id is None:
@@ -820,11 +707,13 @@ def query_management():
                         if participants_str:
                             participants_list = participants_str.split(',')
                             if participants_list:
-                                participants_query = f"""
-                                SELECT * FROM person
-                                WHERE id IN ({','.join(participants_list)})
+                                participants_query = """
+                                SELECT person.* FROM patent_participant pp
+                                JOIN person ON person.id = pp.person_id
+                                WHERE pp.patent_id = ?
+                                ORDER BY pp.position
                                 """
-                                participants = pd.read_sql(participants_query, conn)
+                                participants = pd.read_sql(participants_query, conn, params=[selected_patent])
                                 if not participants.empty:
                                     # 转换为中文列名
                                     display_participants = participants.copy()
@@ -855,27 +744,11 @@ def query_management():
                         else:
                             st.info("该专利未设置参与人员")
 
-                # 导出数据
-                if results:
-                    st.subheader("导出查询结果")
-
-                    # 为每个查询结果创建下载链接
-                    for key, df in results.items():
-                        filename = f"{filename_base}_{key}.xlsx"
-                        download_link = get_excel_download_link(df, filename)
-                        st.markdown(f"{key}: {download_link}", unsafe_allow_html=True)
-
-                    # 创建一个包含所有结果的Excel文件
-                    if len(results) > 1:
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            for key, df in results.items():
-                                df.to_excel(writer, sheet_name=key[:31], index=False)
+                # 保存查询结果，点击生成按钮时才写入Excel文件
+                save_query_results(results, filename_base, key="query_patent")
 
-                        excel_data = output.getvalue()
-                        b64 = base64.b64encode(excel_data).decode()
-                        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename_base}_全部数据.xlsx">下载所有查询结果</a>'
-                        st.markdown(href, unsafe_allow_html=True)
+            # 导出最近一次查询的结果
+            excel_results_export(key="query_patent")
 
     # 按论文查询
     with query_tab5:
@@ -883,18 +756,13 @@ def query_management():
 
         # 获取所有论文数据
         conn = get_connection()
-        papers_df = pd.read_sql("SELECT id, title FROM paper", conn)
+        paper_labels = get_entity_labels('paper')
 
-        if papers_df.empty:
+        if not paper_labels:
             st.info("暂无论文数据")
         else:
-            # 下拉选择论文
-            selected_paper = st.selectbox(
-                "选择论文",
-                options=papers_df['id'].tolist(),
-                format_func=lambda x: papers_df[papers_df['id'] == x]['title'].iloc[0],
-                key="paper_select"
-            )
+            # 可搜索的论文选择
+            selected_paper = entity_selectbox("选择论文", 'paper', "paper_select")
 
             # 多选查询类型
             query_types = st.multiselect(
@@ -904,17 +772,17 @@ def query_management():
                 key="paper_query_types"
             )
 
-            if st.button("查询", key="paper_query_button"):
+            if st.button("查询", key="paper_query_button", disabled=selected_paper is None):
                 results = {}
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename_base = f"论文查询_{papers_df[papers_df['id'] == selected_paper]['title'].iloc[0][:20]}_{timestamp}"
+                filename_base = f"论文查询_{paper_labels[selected_paper][:20]}_{timestamp}"
 
                 # 论文详情查询
                 if "论文详情" in query_types:
                     paper_info = pd.read_sql(f"SELECT * FROM paper WHERE id = {selected_paper}", conn)
                     if not paper_info.empty:
                         # 格式化论文数据，将first_author_id和co_authors替换为姓名
-                        persons_dict = dict(zip(persons_df['id'], persons_df['name']))
+                        persons_dict = get_person_names()
 
                         def format_first_author(author_id):
                             if pd.isna(author_id) or author_id is None:
@@ -994,11 +862,13 @@ def query_management():
                         if co_authors_str:
                             co_authors_list = co_authors_str.split(',')
                             if co_authors_list:
-                                co_authors_query = f"""
-                                SELECT * FROM person
-                                WHERE id IN ({','.join(co_authors_list)})
+                                co_authors_query = """
+                                SELECT person.* FROM paper_coauthor pc
+                                JOIN person ON person.id = pc.person_id
+                                WHERE pc.paper_id = ?
+                                ORDER BY pc.position
                                 """
-                                co_authors = pd.read_sql(co_authors_query, conn)
+                                co_authors = pd.read_sql(co_authors_query, conn, params=[selected_paper])
 
                                 if not co_authors.empty:
                                     # 重命名列为中文
@@ -1026,27 +896,11 @@ def query_management():
                         else:
                             st.info("该论文没有记录参与作者")
 
-                # 导出数据
-                if results:
-                    st.subheader("导出查询结果")
-
-                    # 为每个查询结果创建下载链接
-                    for key, df in results.items():
-                        filename = f"{filename_base}_{key}.xlsx"
-                        download_link = get_excel_download_link(df, filename)
-                        st.markdown(f"{key}: {download_link}", unsafe_allow_html=True)
-
-                    # 创建一个包含所有结果的Excel文件
-                    if len(results) > 1:
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-                            for key, df in results.items():
-                                df.to_excel(writer, sheet_name=key[:31], index=False)
-
-                        excel_data = output.getvalue()
-                        b64 = base64.b64encode(excel_data).decode()
-                        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename_base}_全部数据.xlsx">下载所有查询结果</a>'
-                        st.markdown(href, unsafe_allow_html=True)
+                # 保存查询结果，点击生成按钮时才写入Excel文件
+                save_query_results(results, filename_base, key="query_paper")
+
+            # 导出最近一次查询的结果
+            excel_results_export(key="query_paper")
 
     # 关闭数据库连接
     conn.close()
\ No newline at end of file
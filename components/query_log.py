@@ -0,0 +1,279 @@
+import os
+import re
+import sys
+import time
+import queue
+import sqlite3
+import threading
+from collections import deque
+
+# 是否记录查询耗时，设置环境变量 PROJECT_MANAGER_QUERY_LOG=0 可关闭
+QUERY_LOG_ENABLED = os.environ.get('PROJECT_MANAGER_QUERY_LOG', '1') != '0'
+
+# 内存中保留最近的查询记录数
+QUERY_BUFFER_SIZE = 2000
+
+# 耗时超过该值（毫秒）的查询写入 query_log 表
+SLOW_QUERY_MS = 200
+
+# query_log 表最多保留的记录数
+QUERY_LOG_MAX_ROWS = 10000
+
+# 项目根目录，用于定位发起查询的页面和函数
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 不作为调用位置的本项目文件（数据库连接层自身）
+_SKIP_FILES = {
+    os.path.abspath(__file__),
+    os.path.join(_ROOT, 'components', 'db_utils.py'),
+}
+
+# 最近查询的滚动缓冲区，所有会话共用
+_buffer = deque(maxlen=QUERY_BUFFER_SIZE)
+_buffer_lock = threading.Lock()
+
+# 慢查询由后台线程批量写入数据库，避免在查询线程中写库（调用方可能持有写事务）
+_slow_queue = queue.Queue()
+_writer_lock = threading.Lock()
+_writer_thread = None
+
+# 源文件路径 -> 相对项目根目录的路径（非本项目文件为None），避免每次查询都解析路径
+_relative_paths = {}
+
+def _relative_path(filename):
+    relative = _relative_paths.get(filename, False)
+    if relative is False:
+        path = os.path.abspath(filename)
+        if path.startswith(_ROOT + os.sep) and path not in _SKIP_FILES:
+            relative = os.path.relpath(path, _ROOT)
+        else:
+            relative = None
+        _relative_paths[filename] = relative
+    return relative
+
+def _find_caller():
+    # 沿调用栈向上查找本项目中发起查询的函数和所在页面
+    caller = None
+    page = None
+    frame = sys._getframe(3)
+    while frame is not None:
+        relative = _relative_path(frame.f_code.co_filename)
+        if relative is not None:
+            if caller is None:
+                caller = f"{relative}:{frame.f_code.co_name}"
+            if relative.startswith('pages') or relative == 'app.py':
+                page = os.path.splitext(os.path.basename(relative))[0]
+                break
+        frame = frame.f_back
+    return caller, page
+
+def _params_shape(parameters):
+    # 只记录参数的类型和个数，不记录参数值
+    if parameters is None:
+        return "无"
+    if isinstance(parameters, dict):
+        return f"dict[{len(parameters)}]"
+    try:
+        return f"{type(parameters).__name__}[{len(parameters)}]"
+    except TypeError:
+        return type(parameters).__name__
+
+def normalize_sql(sql):
+    """
+    将SQL中的字面量替换为 ?，并合并空白字符，用于统计相同语句的执行情况
+
+    参数:
+    - sql: SQL语句
+
+    返回:
+    - str: 规范化后的SQL
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", "?", sql)
+    sql = re.sub(r"\b\d+(?:\.\d+)?\b", "?", sql)
+    return re.sub(r"\s+", " ", sql).strip()
+
+def _start_writer():
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_write_slow_queries, name="query-log-writer", daemon=True)
+            _writer_thread.start()
+
+def _write_slow_queries():
+    # 后台线程：批量写入慢查询，并删除超出保留数量的旧记录
+    while True:
+        batch = [_slow_queue.get()]
+        while len(batch) < 100:
+            try:
+                batch.append(_slow_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        by_path = {}
+        for path, entry in batch:
+            by_path.setdefault(path, []).append(entry)
+
+        for path, entries in by_path.items():
+            try:
+                # 使用普通连接，日志写入本身不再被记录
+                conn = sqlite3.connect(path, timeout=30)
+                try:
+                    with conn:
+                        conn.executemany('''
+                            INSERT INTO query_log (logged_at, sql, params, duration_ms, rows, caller, page)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)
+                        ''', [(_format_time(e['logged_at']), e['sql'], e['params'], e['duration_ms'], e['rows'],
+                               e['caller'], e['page']) for e in entries])
+                        conn.execute("DELETE FROM query_log WHERE id <= (SELECT MAX(id) FROM query_log) - ?",
+                                     (QUERY_LOG_MAX_ROWS,))
+                finally:
+                    conn.close()
+            except sqlite3.Error:
+                # 数据库尚未迁移或暂时不可写时丢弃本批记录，不影响正常查询
+                pass
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    记录查询耗时的游标
+
+    记录内容包括SQL、参数形状、执行与读取结果的总耗时、返回行数以及发起查询的函数和页面。
+    语句在结果读取完毕、游标再次执行或被关闭时结束计时
+    """
+
+    _entry = None
+    _db_path = None
+
+    def _begin(self, sql, params):
+        self._finish()
+        if not QUERY_LOG_ENABLED:
+            return None
+        caller, page = _find_caller()
+        entry = {
+            'logged_at': time.time(),
+            'sql': sql,
+            'params': params,
+            'duration_ms': 0.0,
+            'rows': 0,
+            'caller': caller,
+            'page': page,
+        }
+        self._entry = entry
+        with _buffer_lock:
+            _buffer.append(entry)
+        return entry
+
+    def _finish(self):
+        entry = self._entry
+        if entry is None:
+            return
+        self._entry = None
+        # 非查询语句记录影响的行数
+        if self.description is None and self.rowcount >= 0:
+            entry['rows'] = self.rowcount
+        if entry['duration_ms'] >= SLOW_QUERY_MS and self._db_path:
+            _slow_queue.put((self._db_path, entry))
+            _start_writer()
+
+    def _timed(self, method, *args):
+        entry = self._entry
+        if entry is None:
+            return method(*args)
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            entry['duration_ms'] += (time.perf_counter() - start) * 1000
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, _params_shape(parameters))
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, "executemany")
+        result = self._timed(super().executemany, sql, seq_of_parameters)
+        self._finish()
+        return result
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if self._entry is not None:
+            if row is None:
+                self._finish()
+            else:
+                self._entry['rows'] += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._entry is not None:
+            self._entry['rows'] += len(rows)
+            if len(rows) < (self.arraysize if size is None else size):
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._entry is not None:
+            self._entry['rows'] += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+def _format_time(timestamp):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+def get_recent_queries():
+    """
+    获取内存中最近的查询记录
+
+    返回:
+    - list: 查询记录（dict）列表，按执行顺序排列
+    """
+    with _buffer_lock:
+        entries = [dict(entry) for entry in _buffer]
+    for entry in entries:
+        entry['logged_at'] = _format_time(entry['logged_at'])
+    return entries
+
+def clear_recent_queries():
+    # 清空内存中的查询记录
+    with _buffer_lock:
+        _buffer.clear()
+
+def get_slow_queries(conn, limit=QUERY_LOG_MAX_ROWS):
+    """
+    读取 query_log 表中的慢查询记录
+
+    参数:
+    - conn: 数据库连接
+    - limit: 最多读取的记录数（最新的记录优先）
+
+    返回:
+    - list: 慢查询记录（dict）列表
+    """
+    cursor = conn.execute('''
+        SELECT logged_at, sql, params, duration_ms, rows, caller, page
+        FROM query_log ORDER BY id DESC LIMIT ?
+    ''', (limit,))
+    columns = [description[0] for description in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def clear_slow_queries(conn):
+    # 清空 query_log 表
+    conn.execute("DELETE FROM query_log")
+    conn.commit()
@@ -0,0 +1,541 @@
+import json
+import threading
+from collections import OrderedDict
+import pandas as pd
+from components.db_utils import get_connection, get_data_version, TABLE_DEFINITIONS, RELATION_TABLES
+from components.pagination import cached_count, fetch_keyset_page
+from components.write_queue import run_write
+from components.lookup import ENTITY_LABEL_COLUMNS, get_entity_labels
+
+# 按ID批量读取时每条语句包含的ID数，低于SQLite的参数数量上限
+GET_MANY_BATCH = 500
+
+# 各实体的列投影：读取时只查询所需的列
+# label: 下拉选择；list: 管理页面列表和详细信息；detail: 整行（编辑表单，包括版本号）
+ENTITY_PROJECTIONS = {
+    'person': {
+        'list': ['id', 'name', 'gender', 'birth_date', 'id_card', 'education', 'school', 'graduation_date',
+                 'major', 'title', 'phone', 'department', 'position', 'skill_level'],
+    },
+    'project': {
+        'list': ['id', 'name', 'start_date', 'end_date', 'status', 'outcome', 'leader_id', 'members'],
+    },
+    'standard': {
+        'list': ['id', 'name', 'type', 'code', 'release_date', 'implementation_date', 'participant_id', 'company'],
+    },
+    'patent': {
+        'list': ['id', 'name', 'type', 'application_date', 'grant_date', 'patent_number', 'certificate',
+                 'owner_id', 'participants', 'company'],
+    },
+    'paper': {
+        'list': ['id', 'title', 'journal', 'journal_type', 'publish_date', 'volume_info', 'first_author_id',
+                 'co_authors', 'organization'],
+    },
+}
+
+# 写入前统一转为大写的列：身份证号末位校验码 x 与 X 等价，统一存储为大写，
+# 按身份证号精确匹配（导入自然键、唯一索引）时不会因大小写不同而漏掉已有记录
+UPPERCASE_COLUMNS = {
+    'person': ['id_card'],
+}
+
+ENTITY_LABELS = {
+    'person': '人员',
+    'project': '项目',
+    'standard': '标准',
+    'patent': '专利',
+    'paper': '论文',
+}
+
+# 各实体数据库列的中文名称（与导出文件的列名一致），人员字段使用姓名列的名称
+COLUMN_LABELS = {
+    'person': {
+        'name': '姓名', 'gender': '性别', 'birth_date': '出生日期', 'id_card': '身份证号', 'education': '学历',
+        'school': '毕业学校', 'graduation_date': '毕业日期', 'major': '专业', 'title': '职称', 'phone': '电话',
+        'department': '部门', 'position': '职位', 'skill_level': '技能等级',
+    },
+    'project': {
+        'name': '项目名称', 'start_date': '开始日期', 'end_date': '结束日期', 'leader_id': '负责人',
+        'members': '成员', 'status': '状态', 'outcome': '成果',
+    },
+    'standard': {
+        'name': '标准名称', 'type': '类型', 'code': '标准号', 'release_date': '发布日期',
+        'implementation_date': '实施日期', 'company': '单位', 'participant_id': '参与人员',
+    },
+    'patent': {
+        'name': '专利名称', 'type': '类型', 'application_date': '申请日期', 'grant_date': '授权日期',
+        'owner_id': '专利所有人', 'participants': '参与人员', 'company': '单位', 'patent_number': '专利号',
+        'certificate': '证书状态',
+    },
+    'paper': {
+        'title': '标题', 'journal': '期刊', 'journal_type': '期刊类型', 'publish_date': '发表日期',
+        'first_author_id': '第一作者', 'co_authors': '参与作者', 'organization': '组织/单位', 'volume_info': '卷期信息',
+    },
+}
+
+# 取值限定为表单选项的字段
+CHOICE_COLUMNS = {
+    'person': {
+        'gender': ["男", "女"],
+        'education': ["高中", "专科", "本科", "硕士", "博士"],
+        'skill_level': ["初级", "中级", "高级", "资深", "专家"],
+    },
+    'project': {'status': ["进行中", "已完成"]},
+    'standard': {'type': ["国家标准", "行业标准", "地方标准", "团体标准", "企业标准"]},
+    'patent': {
+        'type': ["发明专利", "实用新型专利", "外观设计专利"],
+        'certificate': ["有", "无"],
+    },
+    'paper': {'journal_type': ["核心期刊", "非核心期刊", "EI收录", "SCI收录"]},
+}
+
+# 引用单个人员的字段和引用多个人员（逗号分隔ID）的字段
+PERSON_COLUMNS = {'leader_id', 'participant_id', 'owner_id', 'first_author_id'}
+PERSON_LIST_COLUMNS = {'members', 'participants', 'co_authors'}
+
+# 列表页缓存：(表名, 条件, 参数, 排序, 翻页位置, 每页条数, 列, 数据版本) -> 当前页，所有会话共用
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()
+_PAGE_CACHE_SIZE = 128
+
+def column_label(entity_type, column):
+    """
+    获取数据库列对应的中文列名
+
+    参数:
+    - entity_type: 实体类型
+    - column: 数据库列名
+
+    返回:
+    - str: 中文列名，未定义时返回列名本身
+    """
+    return COLUMN_LABELS[entity_type].get(column, column)
+
+def ids_condition(ids):
+    """
+    按ID集合筛选的查询条件：ID列表作为一个JSON数组参数传入，任意数量的ID都只需一条语句
+
+    参数:
+    - ids: 记录ID列表
+
+    返回:
+    - tuple: (条件, 参数列表)
+    """
+    return "id IN (SELECT value FROM json_each(?))", [json.dumps([int(row_id) for row_id in ids])]
+
+class VersionConflict(Exception):
+    """
+    编辑期间记录已被其他用户修改
+
+    参数:
+    - table: 表名
+    - row_id: 记录ID
+    - current: 数据库中的最新数据 {列名: 值}
+    """
+
+    def __init__(self, table, row_id, current):
+        super().__init__("该记录在您编辑期间已被其他用户修改")
+        self.table = table
+        self.row_id = row_id
+        self.current = current
+
+def update_versioned(conn, table, row_id, version, values):
+    """
+    按编辑开始时的版本号更新一行，版本号不一致时不修改数据
+
+    参数:
+    - conn: 数据库连接（在写队列中执行）
+    - table: 表名
+    - row_id: 记录ID
+    - version: 编辑开始时载入的版本号
+    - values: 要更新的列 {列名: 值}
+
+    返回:
+    - int: 更新后的版本号
+
+    异常:
+    - VersionConflict: 记录已被其他用户修改
+    - ValueError: 记录已被删除
+    """
+    assignments = ", ".join(f"{column}=?" for column in values)
+    cursor = conn.execute(
+        f"UPDATE {table} SET {assignments}, version = version + 1 WHERE id=? AND version=?",
+        [*values.values(), row_id, int(version)]
+    )
+    if cursor.rowcount == 0:
+        cursor = conn.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,))
+        row = cursor.fetchone()
+        if row is None:
+            raise ValueError("该记录已被其他用户删除")
+        raise VersionConflict(table, row_id, dict(zip([column[0] for column in cursor.description], row)))
+    return int(version) + 1
+
+class Repository:
+    """
+    实体仓储：封装一张业务表的读取和写入
+
+    读取按列投影只查询所需的列，列表查询和记录数按数据版本缓存；
+    写入全部通过写队列执行，由修改计数触发器更新数据版本，使各处缓存失效
+
+    参数:
+    - table: 表名
+    - projections: 列投影 {投影名: 列名列表}
+    """
+
+    def __init__(self, table, projections):
+        self.table = table
+        self.label_column = ENTITY_LABEL_COLUMNS[table]
+        self.projections = {'label': ['id', self.label_column], **projections}
+        # 逗号分隔的人员列 -> (关联表, 关联表中的主表ID列)，用于按人员的索引查找
+        self.relations = {ids_column: (relation, id_column)
+                          for relation, (relation_table, id_column, ids_column) in RELATION_TABLES.items()
+                          if relation_table == table}
+        self._columns = None
+
+    def table_columns(self):
+        """
+        获取表的全部列名（首次调用时从数据库读取）
+
+        返回:
+        - list: 列名列表
+        """
+        if self._columns is None:
+            conn = get_connection()
+            try:
+                self._columns = [row[1] for row in conn.execute(f"PRAGMA table_info({self.table})")]
+            finally:
+                conn.close()
+        return self._columns
+
+    def columns(self, projection='detail'):
+        """
+        获取投影包含的列，detail 为整行
+
+        参数:
+        - projection: 投影名或列名列表
+
+        返回:
+        - list: 列名列表
+
+        异常:
+        - ValueError: 投影名不存在或包含表中没有的列
+        """
+        if projection == 'detail':
+            return self.table_columns()
+        if isinstance(projection, str):
+            if projection not in self.projections:
+                raise ValueError(f"{self.table} 没有名为 {projection} 的列投影")
+            projection = self.projections[projection]
+        unknown = [column for column in projection if column not in self.table_columns()]
+        if unknown:
+            raise ValueError(f"{self.table} 表中没有列: {', '.join(unknown)}")
+        return list(projection)
+
+    def person_columns(self):
+        """
+        获取引用人员的列（单个人员ID列和逗号分隔的人员ID列）
+
+        返回:
+        - list: 列名列表，按表中的顺序
+        """
+        return [column for column in self.table_columns() if column in PERSON_COLUMNS | PERSON_LIST_COLUMNS]
+
+    def _normalize(self, values):
+        # 检查列名并规范化写入的值
+        self.columns(list(values))
+        values = dict(values)
+        for column in UPPERCASE_COLUMNS.get(self.table, []):
+            if isinstance(values.get(column), str):
+                values[column] = values[column].strip().upper()
+        return values
+
+    def _select(self, projection):
+        return ", ".join(self.columns(projection))
+
+    def _matching_ids(self, conn, conditions, params):
+        # 在写事务中先取出满足条件的ID：条件中的子查询（如全文索引）不受本次修改的触发器影响，
+        # 之后的修改语句按ID集合执行
+        where = " AND ".join(conditions) if conditions else "1"
+        ids = [row[0] for row in conn.execute(f"SELECT id FROM {self.table} WHERE {where}", list(params))]
+        return json.dumps(ids)
+
+    def get(self, row_id, projection='detail'):
+        """
+        按ID读取一条记录
+
+        参数:
+        - row_id: 记录ID
+        - projection: 列投影
+
+        返回:
+        - Series: 记录数据，不存在时为None
+        """
+        conn = get_connection()
+        try:
+            df = pd.read_sql(f"SELECT {self._select(projection)} FROM {self.table} WHERE id = ?",
+                             conn, params=[int(row_id)])
+        finally:
+            conn.close()
+        return None if df.empty else df.iloc[0]
+
+    def get_many(self, ids, projection='detail'):
+        """
+        按ID批量读取记录，每 GET_MANY_BATCH 个ID一条语句，通过主键查找
+
+        参数:
+        - ids: 记录ID列表（重复和不存在的ID被忽略）
+        - projection: 列投影
+
+        返回:
+        - DataFrame: 记录数据，按ID排序
+        """
+        ids = sorted({int(row_id) for row_id in ids})
+        select = self._select(projection)
+        conn = get_connection()
+        try:
+            frames = []
+            for start in range(0, len(ids), GET_MANY_BATCH):
+                batch = ids[start:start + GET_MANY_BATCH]
+                placeholders = ", ".join("?" for _ in batch)
+                frames.append(pd.read_sql(
+                    f"SELECT {select} FROM {self.table} WHERE id IN ({placeholders}) ORDER BY id", conn, params=batch))
+            if not frames:
+                return pd.read_sql(f"SELECT {select} FROM {self.table} WHERE 0", conn)
+        finally:
+            conn.close()
+        return pd.concat(frames, ignore_index=True)
+
+    def labels(self):
+        """
+        获取ID到名称的映射
+
+        返回:
+        - dict: {ID: 名称}（共享缓存，请勿修改）
+        """
+        return get_entity_labels(self.table)
+
+    def count(self, conditions=(), params=()):
+        """
+        获取满足条件的记录数，数据未变化前只统计一次
+
+        参数:
+        - conditions: 查询条件列表（以AND连接）
+        - params: 条件参数
+
+        返回:
+        - int: 记录数
+        """
+        conn = get_connection()
+        try:
+            return cached_count(conn, self.table, list(conditions), list(params))
+        finally:
+            conn.close()
+
+    def page(self, conditions=(), params=(), sort_column=None, descending=False, anchor=None, page_size=20,
+             projection='list'):
+        """
+        按键集分页读取一页记录，结果按数据版本缓存
+
+        参数:
+        - conditions: 查询条件列表（以AND连接），可以引用其他表
+        - params: 条件参数
+        - sort_column: 排序字段，为None时按id排序
+        - descending: 是否降序
+        - anchor: 翻页位置，见 pagination.fetch_keyset_page
+        - page_size: 每页记录数
+        - projection: 列投影，必须包含 id 和排序字段
+
+        返回:
+        - DataFrame: 当前页数据（副本）
+        """
+        columns = self._select(projection)
+        conn = get_connection()
+        try:
+            # 条件可能引用人员表等其他表，使用全部表的数据版本
+            key = (self.table, tuple(conditions), tuple(params), sort_column, descending,
+                   anchor, page_size, columns, get_data_version(conn))
+            with _page_cache_lock:
+                if key in _page_cache:
+                    _page_cache.move_to_end(key)
+                    return _page_cache[key].copy()
+
+            df = fetch_keyset_page(conn, self.table, list(conditions), list(params), sort_column, descending,
+                                   anchor, page_size, columns)
+        finally:
+            conn.close()
+
+        with _page_cache_lock:
+            _page_cache[key] = df
+            if len(_page_cache) > _PAGE_CACHE_SIZE:
+                _page_cache.popitem(last=False)
+        return df.copy()
+
+    def insert(self, values):
+        """
+        通过写队列新增一条记录
+
+        参数:
+        - values: 列值 {列名: 值}
+
+        返回:
+        - int: 新记录的ID
+        """
+        values = self._normalize(values)
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        sql = f"INSERT INTO {self.table} ({columns}) VALUES ({placeholders})"
+        return run_write(lambda conn: conn.execute(sql, list(values.values())).lastrowid)
+
+    def update(self, row_id, version, values):
+        """
+        通过写队列按版本号更新一条记录，成功后版本号加一
+
+        参数:
+        - row_id: 记录ID
+        - version: 编辑开始时载入的版本号
+        - values: 要更新的列 {列名: 值}
+
+        返回:
+        - int: 更新后的版本号
+
+        异常:
+        - VersionConflict: 记录已被其他用户修改
+        - ValueError: 记录已被删除
+        """
+        values = self._normalize(values)
+        return run_write(lambda conn: update_versioned(conn, self.table, row_id, version, values))
+
+    def delete(self, row_id):
+        """
+        通过写队列删除一条记录
+
+        参数:
+        - row_id: 记录ID
+
+        返回:
+        - int: 删除的记录数
+        """
+        return run_write(lambda conn: conn.execute(f"DELETE FROM {self.table} WHERE id = ?", (int(row_id),)).rowcount)
+
+    def update_where(self, conditions, params, values):
+        """
+        通过写队列以一条语句批量修改满足条件的记录，在同一个事务中提交。
+        各记录的版本号加一，正在编辑这些记录的用户保存时会提示冲突
+
+        参数:
+        - conditions: 查询条件列表（以AND连接），可以引用其他表
+        - params: 条件参数
+        - values: 要更新的列 {列名: 值}
+
+        返回:
+        - int: 修改的记录数
+        """
+        values = self._normalize(values)
+        assignments = ", ".join(f"{column} = ?" for column in values)
+
+        def update(conn):
+            ids = self._matching_ids(conn, conditions, params)
+            return conn.execute(
+                f"UPDATE {self.table} SET {assignments}, version = version + 1 "
+                "WHERE id IN (SELECT value FROM json_each(?))",
+                [*values.values(), ids]
+            ).rowcount
+
+        return run_write(update)
+
+    def delete_where(self, conditions, params):
+        """
+        通过写队列以一条语句批量删除满足条件的记录，在同一个事务中提交
+
+        参数:
+        - conditions: 查询条件列表（以AND连接），可以引用其他表
+        - params: 条件参数
+
+        返回:
+        - int: 删除的记录数
+        """
+        def delete(conn):
+            ids = self._matching_ids(conn, conditions, params)
+            return conn.execute(f"DELETE FROM {self.table} WHERE id IN (SELECT value FROM json_each(?))",
+                                (ids,)).rowcount
+
+        return run_write(delete)
+
+    def reassign_person(self, conditions, params, old_id, new_id, columns=None):
+        """
+        通过写队列以一条语句将满足条件的记录中的人员替换为另一人员，在同一个事务中提交。
+        逗号分隔的人员列保持原有顺序，新人员已在列表中时不重复添加；只修改包含原人员的记录，版本号加一
+
+        参数:
+        - conditions: 查询条件列表（以AND连接），可以引用其他表
+        - params: 条件参数
+        - old_id: 原人员ID
+        - new_id: 新人员ID
+        - columns: 要替换的人员列，为None时为全部人员列
+
+        返回:
+        - int: 修改的记录数
+        """
+        columns = self.person_columns() if columns is None else self.columns(list(columns))
+        # 人员ID为整数，直接写入语句
+        old_id, new_id = int(old_id), int(new_id)
+
+        assignments = []
+        matches = []
+        for column in columns:
+            if column in self.relations:
+                # 通过关联表的人员索引找到包含原人员的记录，按列表中的位置重新拼接
+                relation, id_column = self.relations[column]
+                contains = f"id IN (SELECT {id_column} FROM {relation} WHERE person_id = {old_id})"
+                assignments.append(f'''{column} = CASE WHEN {contains} THEN (
+                    SELECT group_concat(person_id, ',') FROM (
+                        SELECT CASE WHEN j.value = {old_id} THEN {new_id} ELSE j.value END AS person_id,
+                               MIN(j.key) AS position
+                        FROM json_each('[' || {column} || ']') j
+                        GROUP BY 1 ORDER BY position)
+                ) ELSE {column} END''')
+                matches.append(contains)
+            elif column in PERSON_COLUMNS:
+                assignments.append(f"{column} = CASE WHEN {column} = {old_id} THEN {new_id} ELSE {column} END")
+                matches.append(f"{column} = {old_id}")
+            else:
+                raise ValueError(f"{column} 不是人员列")
+        if not assignments:
+            return 0
+
+        def reassign(conn):
+            ids = self._matching_ids(conn, conditions, params)
+            return conn.execute(
+                f"UPDATE {self.table} SET {', '.join(assignments)}, version = version + 1 "
+                f"WHERE id IN (SELECT value FROM json_each(?)) AND ({' OR '.join(matches)})",
+                (ids,)
+            ).rowcount
+
+        return run_write(reassign)
+
+    def write(self, func):
+        """
+        通过写队列执行包含多条语句的写操作（如删除时同时维护其他表），在同一个事务中提交
+
+        参数:
+        - func: 写操作函数，参数为数据库连接
+
+        返回:
+        - func 的返回值
+        """
+        return run_write(func)
+
+# 各实体的仓储实例，所有会话共用
+REPOSITORIES = {table: Repository(table, ENTITY_PROJECTIONS[table]) for table in TABLE_DEFINITIONS}
+
+def get_repository(entity_type):
+    """
+    获取实体的仓储
+
+    参数:
+    - entity_type: 实体类型（表名）
+
+    返回:
+    - Repository: 仓储实例
+    """
+    return REPOSITORIES[entity_type]
@@ -0,0 +1,138 @@
+import streamlit as st
+import pandas as pd
+from components.repository import VersionConflict, get_repository, column_label, PERSON_COLUMNS, PERSON_LIST_COLUMNS
+from components.lookup import get_person_names
+
+def editing_row(prefix, row_id, row):
+    """
+    获取正在编辑的行：开始编辑某条记录时载入的数据保存在会话状态中，
+    之后页面刷新不再使用数据库中的最新数据，保存时以其中的版本号检查并发修改
+
+    参数:
+    - prefix: 会话状态键前缀（如 'person'）
+    - row_id: 正在编辑的记录ID
+    - row: 数据库中的最新数据（Series）
+
+    返回:
+    - Series: 开始编辑时载入的数据
+    """
+    key = f"{prefix}_editing_row"
+    loaded = st.session_state.get(key)
+    if loaded is None or loaded['id'] != row_id:
+        loaded = row.to_dict()
+        st.session_state[key] = loaded
+    return pd.Series(loaded)
+
+def release_editing_row(prefix):
+    """
+    结束编辑（保存成功、放弃修改、切换新增/编辑模式或重新选择记录），下次编辑时重新载入最新数据
+
+    参数:
+    - prefix: 会话状态键前缀
+    """
+    st.session_state.pop(f"{prefix}_editing_row", None)
+    st.session_state.pop(f"{prefix}_conflict", None)
+
+def save_versioned(prefix, table, row_id, version, values):
+    """
+    通过写队列按版本号保存修改，发生冲突时记录冲突信息并刷新页面显示冲突处理界面
+
+    参数:
+    - prefix: 会话状态键前缀
+    - table: 表名
+    - row_id: 记录ID
+    - version: 编辑开始时载入的版本号
+    - values: 要更新的列 {列名: 值}
+    """
+    try:
+        get_repository(table).update(row_id, version, values)
+    except VersionConflict as e:
+        st.session_state[f"{prefix}_conflict"] = {
+            'row_id': row_id,
+            'loaded': st.session_state.get(f"{prefix}_editing_row"),
+            'mine': values,
+            'current': e.current,
+        }
+        st.rerun()
+    release_editing_row(prefix)
+
+def _display_value(column, value):
+    # 人员字段显示姓名
+    if value is None or (isinstance(value, float) and pd.isna(value)) or value == '':
+        return ''
+    names = get_person_names()
+    if column in PERSON_COLUMNS:
+        return names.get(int(value), f"ID:{value}")
+    if column in PERSON_LIST_COLUMNS:
+        return "、".join(names.get(int(person_id), f"ID:{person_id}")
+                        for person_id in str(value).split(',') if person_id.strip().isdigit())
+    return str(value)
+
+def show_version_conflict(prefix, table):
+    """
+    显示版本冲突处理界面：对比您的修改与最新数据，可选择覆盖或放弃修改。
+    覆盖时只写入您实际修改过的字段，他人修改而您未修改的字段保留最新数据
+
+    参数:
+    - prefix: 会话状态键前缀
+    - table: 表名
+
+    返回:
+    - bool: 已用您的修改覆盖最新数据时返回True，调用方显示成功消息并刷新页面
+    """
+    conflict = st.session_state.get(f"{prefix}_conflict")
+    if not conflict:
+        return False
+
+    current = conflict['current']
+    loaded = conflict['loaded'] or {}
+    st.warning(f"保存失败：您编辑期间该记录已被其他用户修改（版本 {loaded.get('version', '?')} → {current['version']}），"
+               "请核对后选择覆盖或放弃您的修改")
+
+    rows = []
+    changed = {}
+    for column, mine in conflict['mine'].items():
+        mine_text = _display_value(column, mine)
+        current_text = _display_value(column, current.get(column))
+        loaded_text = _display_value(column, loaded.get(column))
+        if mine_text != loaded_text or not loaded:
+            changed[column] = mine
+        if mine_text == current_text:
+            continue
+        if current_text == loaded_text:
+            state = "仅您修改"
+        elif mine_text == loaded_text:
+            state = "仅他人修改"
+        else:
+            state = "双方都修改"
+        rows.append({'字段': column_label(table, column), '您的修改': mine_text,
+                     '最新数据': current_text, '说明': state})
+    if rows:
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+    else:
+        st.info("您的修改与最新数据相同")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        overwrite = st.button("用我的修改覆盖最新数据", key=f"{prefix}_conflict_overwrite", type="primary",
+                              help="只写入您修改过的字段，其他字段保留最新数据")
+    with col2:
+        discard = st.button("放弃我的修改，载入最新数据", key=f"{prefix}_conflict_discard")
+
+    if overwrite:
+        try:
+            if changed:
+                get_repository(table).update(conflict['row_id'], current['version'], changed)
+        except VersionConflict as e:
+            # 期间又被修改，更新对比内容后重新确认
+            conflict['current'] = e.current
+            st.rerun()
+        except Exception as e:
+            st.error(f"保存失败: {str(e)}")
+        else:
+            release_editing_row(prefix)
+            return True
+    if discard:
+        release_editing_row(prefix)
+        st.rerun()
+    return False
@@ -0,0 +1,329 @@
+import os
+import json
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime
+import pyarrow as pa
+import pyarrow.parquet as pq
+from components.db_utils import TABLE_DEFINITIONS, RELATION_TABLES, get_connection, get_data_version
+
+# 快照目录，可通过环境变量 PROJECT_MANAGER_SNAPSHOT_DIR 指定
+SNAPSHOT_DIR = os.environ.get('PROJECT_MANAGER_SNAPSHOT_DIR', 'snapshots')
+
+# 快照格式及文件扩展名：feather 为未压缩的 Arrow IPC 文件，可零拷贝内存映射；parquet 体积更小
+SNAPSHOT_FORMATS = {
+    'feather': '.arrow',
+    'parquet': '.parquet',
+}
+
+# 导出的表：业务表、人员关联表和人员贡献汇总表（全文索引、查询日志等内部表不导出）
+SNAPSHOT_TABLES = list(TABLE_DEFINITIONS) + list(RELATION_TABLES) + ['person_contribution']
+
+# 游标每次读取的行数，即快照文件中每个记录批次的行数
+SNAPSHOT_BATCH_ROWS = 10000
+
+# 取值较少的文本列使用字典编码，整列共用一个字典
+DICTIONARY_COLUMNS = {
+    'person': ['gender', 'education', 'school', 'major', 'title', 'department', 'position', 'skill_level'],
+    'project': ['status'],
+    'standard': ['type', 'company'],
+    'patent': ['type', 'company', 'certificate'],
+    'paper': ['journal', 'journal_type', 'organization'],
+}
+
+# 当前快照所在的子目录名
+_CURRENT = 'current'
+
+_export_lock = threading.Lock()
+
+# 已打开的快照表，所有会话共用，快照重新生成后自动失效
+_table_cache = {}
+_table_cache_lock = threading.Lock()
+
+def _column_type(declared_type):
+    # 按SQLite列的声明类型确定Arrow类型
+    declared_type = (declared_type or '').upper()
+    if 'INT' in declared_type:
+        return pa.int64()
+    if 'REAL' in declared_type or 'FLOA' in declared_type or 'DOUB' in declared_type:
+        return pa.float64()
+    return pa.string()
+
+def _select_expression(column, arrow_type):
+    # SQLite为动态类型，按目标类型统一取值，整数列中的非整数值视为空值
+    if arrow_type == pa.int64():
+        return f"CASE WHEN typeof({column}) = 'integer' THEN {column} END"
+    if arrow_type == pa.float64():
+        return f"CAST({column} AS REAL)"
+    return f"CAST({column} AS TEXT)"
+
+def _table_layout(conn, table):
+    """
+    读取表结构，确定每一列的Arrow类型、查询表达式和字典
+
+    参数:
+    - conn: 数据库连接（应处于读事务中，字典与数据来自同一快照）
+    - table: 表名
+
+    返回:
+    - tuple: (pyarrow.Schema, 查询SQL, {列名: 字典数组})
+    """
+    fields = []
+    expressions = []
+    dictionaries = {}
+    for _, column, declared_type, _, _, _, hidden in conn.execute(f"PRAGMA table_xinfo({table})"):
+        # hidden=1 为虚拟表的隐藏列，生成列（2、3）照常导出
+        if hidden == 1:
+            continue
+        arrow_type = _column_type(declared_type)
+        expression = _select_expression(column, arrow_type)
+        if column in DICTIONARY_COLUMNS.get(table, []):
+            values = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT {expression} AS value FROM {table} WHERE value IS NOT NULL ORDER BY value"
+            )]
+            dictionaries[column] = pa.array(values, pa.string())
+            arrow_type = pa.dictionary(pa.int32(), pa.string())
+        fields.append(pa.field(column, arrow_type))
+        expressions.append(f"{expression} AS {column}")
+    schema = pa.schema(fields)
+    return schema, f"SELECT {', '.join(expressions)} FROM {table}", dictionaries
+
+def _record_batch(schema, rows, dictionaries, indexes):
+    # 将游标读取的一批行按列转换为记录批次，字典列只存储字典下标
+    columns = list(zip(*rows))
+    arrays = []
+    for field, values in zip(schema, columns):
+        if field.name in dictionaries:
+            index = indexes[field.name]
+            codes = pa.array([index.get(value) for value in values], pa.int32())
+            arrays.append(pa.DictionaryArray.from_arrays(codes, dictionaries[field.name]))
+        else:
+            arrays.append(pa.array(values, field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def _open_writer(path, schema, snapshot_format):
+    if snapshot_format == 'feather':
+        # 不压缩，读取时可以直接内存映射
+        return pa.ipc.new_file(path, schema)
+    return pq.ParquetWriter(path, schema, compression='zstd')
+
+def _export_table(conn, table, path, snapshot_format, batch_rows):
+    # 流式导出一张表：游标分批读取，逐批写入，内存中只保留一个批次
+    schema, query, dictionaries = _table_layout(conn, table)
+    indexes = {
+        column: {value: position for position, value in enumerate(dictionary.to_pylist())}
+        for column, dictionary in dictionaries.items()
+    }
+
+    rows_written = 0
+    writer = _open_writer(path, schema, snapshot_format)
+    try:
+        cursor = conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            writer.write_batch(_record_batch(schema, rows, dictionaries, indexes))
+            rows_written += len(rows)
+    finally:
+        writer.close()
+    return rows_written
+
+def _table_exists(conn, table):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+def export_snapshot(snapshot_format='feather', snapshot_dir=SNAPSHOT_DIR, batch_rows=SNAPSHOT_BATCH_ROWS, progress=None):
+    """
+    将所有业务表、人员关联表和贡献汇总表导出为列式快照
+
+    所有表在同一个读事务中导出，快照对应数据库的某一时刻；导出期间应用可以正常读写。
+    快照先写入临时目录，全部完成后再替换当前快照
+
+    参数:
+    - snapshot_format: 'feather'（Arrow IPC，可零拷贝内存映射）或 'parquet'
+    - snapshot_dir: 快照目录
+    - batch_rows: 每批读取和写入的行数
+    - progress: 进度回调，参数为 (已导出表数, 总表数, 表名)
+
+    返回:
+    - dict: 快照清单，包含 format、created、data_version、tables
+    """
+    if snapshot_format not in SNAPSHOT_FORMATS:
+        raise ValueError(f"不支持的快照格式: {snapshot_format}")
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    partial_dir = os.path.join(snapshot_dir, f".partial_{os.getpid()}_{threading.get_ident()}")
+    if os.path.exists(partial_dir):
+        shutil.rmtree(partial_dir)
+    os.makedirs(partial_dir)
+
+    with _export_lock:
+        try:
+            conn = get_connection()
+            try:
+                # 读事务：WAL模式下不阻塞写操作，各表读取同一快照
+                conn.execute("BEGIN")
+                try:
+                    manifest = {
+                        'format': snapshot_format,
+                        'created': datetime.now().isoformat(timespec='seconds'),
+                        'data_version': get_data_version(conn),
+                        'tables': {},
+                    }
+                    tables = [table for table in SNAPSHOT_TABLES if _table_exists(conn, table)]
+                    for position, table in enumerate(tables):
+                        if progress:
+                            progress(position, len(tables), table)
+                        filename = table + SNAPSHOT_FORMATS[snapshot_format]
+                        rows = _export_table(conn, table, os.path.join(partial_dir, filename),
+                                             snapshot_format, batch_rows)
+                        manifest['tables'][table] = {'file': filename, 'rows': rows}
+                    if progress:
+                        progress(len(tables), len(tables), None)
+                finally:
+                    conn.rollback()
+            finally:
+                conn.close()
+
+            with open(os.path.join(partial_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+            # 替换当前快照：已打开的内存映射仍指向旧文件，不受删除影响
+            current_dir = os.path.join(snapshot_dir, _CURRENT)
+            old_dir = None
+            if os.path.exists(current_dir):
+                old_dir = os.path.join(snapshot_dir, f".old_{os.getpid()}_{int(time.time() * 1000)}")
+                os.rename(current_dir, old_dir)
+            os.rename(partial_dir, current_dir)
+            if old_dir:
+                shutil.rmtree(old_dir, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            raise
+    return manifest
+
+def read_manifest(snapshot_dir=SNAPSHOT_DIR):
+    """
+    读取当前快照的清单
+
+    参数:
+    - snapshot_dir: 快照目录
+
+    返回:
+    - dict: 快照清单，没有快照时返回None
+    """
+    path = os.path.join(snapshot_dir, _CURRENT, 'manifest.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def is_snapshot_stale(manifest):
+    """
+    判断快照生成后数据库是否发生过写入
+
+    参数:
+    - manifest: 快照清单
+
+    返回:
+    - bool: 数据已变化时返回True
+    """
+    conn = get_connection()
+    try:
+        return get_data_version(conn) != manifest['data_version']
+    finally:
+        conn.close()
+
+def _open_table(path, snapshot_format):
+    if snapshot_format == 'feather':
+        # 内存映射读取：列数据直接引用映射的文件页，不复制到内存
+        return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    # Parquet需要解码，只能利用内存映射减少一次读取复制
+    return pq.read_table(path, memory_map=True)
+
+def load_snapshot_table(table, columns=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    从当前快照加载一张表
+
+    参数:
+    - table: 表名
+    - columns: 需要的列，为None时返回所有列
+    - snapshot_dir: 快照目录
+
+    返回:
+    - pyarrow.Table: 表数据（共享缓存，请勿修改）
+
+    异常:
+    - ValueError: 没有快照或快照中没有该表
+    """
+    manifest = read_manifest(snapshot_dir)
+    if manifest is None:
+        raise ValueError("尚未生成数据快照")
+    if table not in manifest['tables']:
+        raise ValueError(f"快照中没有表: {table}")
+
+    path = os.path.join(snapshot_dir, _CURRENT, manifest['tables'][table]['file'])
+    key = (os.path.abspath(path), manifest['created'], manifest['data_version'])
+    arrow_table = _table_cache.get(key)
+    if arrow_table is None:
+        with _table_cache_lock:
+            arrow_table = _table_cache.get(key)
+            if arrow_table is None:
+                arrow_table = _open_table(path, manifest['format'])
+                # 快照重新生成后，旧快照的表不再使用
+                for cached_key in [cached_key for cached_key in _table_cache if cached_key[0] == key[0]]:
+                    del _table_cache[cached_key]
+                _table_cache[key] = arrow_table
+
+    if columns is not None:
+        arrow_table = arrow_table.select(columns)
+    return arrow_table
+
+def load_snapshot_frame(table, columns=None, snapshot_dir=SNAPSHOT_DIR):
+    """
+    从当前快照加载一张表并转换为DataFrame，字典编码的列转换为分类类型
+
+    参数:
+    - table: 表名
+    - columns: 需要的列，为None时返回所有列
+    - snapshot_dir: 快照目录
+
+    返回:
+    - pandas.DataFrame: 表数据
+    """
+    return load_snapshot_table(table, columns, snapshot_dir).to_pandas()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="将数据库导出为列式数据快照")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="生成快照")
+    export_parser.add_argument('--format', choices=list(SNAPSHOT_FORMATS), default='feather', help="快照格式")
+    export_parser.add_argument('--batch-rows', type=int, default=SNAPSHOT_BATCH_ROWS, help="每批读取和写入的行数")
+
+    subparsers.add_parser('info', help="查看当前快照")
+    return parser.parse_args()
+
+def _print_manifest(manifest):
+    print(f"格式: {manifest['format']}  生成时间: {manifest['created']}  数据版本: {manifest['data_version']}")
+    for table, info in manifest['tables'].items():
+        print(f"  {table:<24}{info['rows']:>10} 行  {info['file']}")
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == 'export':
+        start = time.time()
+        manifest = export_snapshot(args.format, batch_rows=args.batch_rows)
+        _print_manifest(manifest)
+        print(f"快照已生成，耗时 {time.time() - start:.1f} 秒")
+    else:
+        manifest = read_manifest()
+        if manifest is None:
+            print("尚未生成数据快照")
+        else:
+            _print_manifest(manifest)
+            if is_snapshot_stale(manifest):
+                print("快照生成后数据库已发生修改")
@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
-from components.db_utils import get_connection
+from components.analytics_db import get_analytics_connection
+from components.row_version import editing_row, release_editing_row, save_versioned, show_version_conflict
+from components.lookup import get_person_names
+from components.entity_selector import entity_selectbox, optional_entity_selectbox
 import datetime
 from components.table_utils import translate_columns, display_dataframe
+from components.list_view import paged_list, list_selection_key
+from components.repository import get_repository
+from components.bulk_edit import bulk_actions
+
+standard_repository = get_repository('standard')
 
 def standard_management():
     #st.title("标准管理")
@@ -30,12 +38,11 @@ def standard_management():
 
     # 使用expander，根据会话状态决定是否展开
     with st.expander("添加/编辑标准信息", expanded=st.session_state.standard_expander_expanded):
-        # 获取所有标准信息用于编辑
-        conn = get_connection()
-        standards_df = pd.read_sql("SELECT * FROM standard", conn)
+        # 编辑选择使用ID到名称的映射，选中后再读取该条记录
+        standard_labels = standard_repository.labels()
 
-        # 获取所有人员信息用于选择参与人员
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
+        # 人员ID到姓名的映射，用于判断是否已有人员
+        persons_dict = get_person_names()
 
         # 编辑模式切换回调函数
         def set_add_mode():
@@ -45,6 +52,8 @@ def standard_management():
             st.session_state.standard_success_message = None
             # 保持expander展开
             st.session_state.standard_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('standard')
             if 'standard_selector' in st.session_state:
                 del st.session_state.standard_selector
 
@@ -54,6 +63,8 @@ def standard_management():
             st.session_state.standard_success_message = None
             # 保持expander展开
             st.session_state.standard_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('standard')
 
         # 标准选择回调函数
         def on_standard_select():
@@ -62,6 +73,8 @@ def standard_management():
             st.session_state.standard_success_message = None
             # 保持expander展开
             st.session_state.standard_expander_expanded = True
+            # 放弃之前载入的编辑数据，再次编辑时重新载入最新数据
+            release_editing_row('standard')
 
         # 创建两个按钮用于切换模式，使用更紧凑的布局
         button_cols = st.columns([1, 1, 3])  # 两个按钮占用较小空间，右侧留白
@@ -73,23 +86,19 @@ def standard_management():
         # 获取当前模式
         edit_mode = st.session_state.standard_edit_mode
 
-        # 如果是编辑模式，显示标准选择器
-        if edit_mode and not standards_df.empty:
-            standard_id = st.selectbox(
-                "选择要编辑的标准",
-                options=standards_df['id'].tolist(),
-                format_func=lambda x: standards_df[standards_df['id'] == x]['name'].iloc[0],
-                key="standard_selector",
-                on_change=on_standard_select
-            )
-
+        # 如果是编辑模式，显示可搜索的标准选择器
+        standard_id = entity_selectbox("选择要编辑的标准", 'standard', "standard_selector",
+                                       on_change=on_standard_select) if edit_mode else None
+        if standard_id is not None:
             # 获取选中的标准数据
-            if st.session_state.standard_selected_id:
+            if st.session_state.standard_selected_id in standard_labels:
                 standard_id = st.session_state.standard_selected_id
-                standard_data = standards_df[standards_df['id'] == standard_id].iloc[0]
             else:
-                standard_data = standards_df[standards_df['id'] == standard_id].iloc[0]
                 st.session_state.standard_selected_id = standard_id
+            standard_data = standard_repository.get(standard_id)
+
+            # 编辑期间使用开始编辑时载入的数据，保存时据其版本号检查并发修改
+            standard_data = editing_row('standard', standard_id, standard_data)
         else:
             standard_id = None
             standard_data = pd.Series({"name": "", "type": "国家标准", "code": "",
@@ -97,6 +106,20 @@ def standard_management():
                                       "company": "", "participant_id": None})
             st.session_state.standard_selected_id = None
 
+        # 保存时发现并发修改，显示冲突处理界面
+        if edit_mode and show_version_conflict('standard', 'standard'):
+            st.session_state.standard_success_message = "已用您的修改覆盖最新数据"
+            st.session_state.standard_expander_expanded = True
+            st.rerun()
+
+        # 参与人员在表单之外选择：搜索人员需要刷新页面，下拉框只包含已选人员和匹配的人员
+        if persons_dict:
+            participant_id = optional_entity_selectbox("参与人员", 'person', "standard_participant_picker",
+                                                       standard_data["participant_id"] or None, scope=standard_id)
+        else:
+            st.warning("暂无人员信息，请先添加人员")
+            participant_id = None
+
         # 表单用于添加或编辑标准
         with st.form("standard_form"):
 
@@ -137,37 +160,6 @@ def standard_management():
                 # 参与单位
                 company = st.text_input("参与单位", value=standard_data["company"])
 
-                # 参与人员选择
-                if not persons_df.empty:
-                    persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
-                    # 添加一个"无"选项
-                    persons_dict[0] = "无"
-
-                    # 获取当前参与人员
-                    current_participant = standard_data["participant_id"] if standard_data["participant_id"] else 0
-
-                    # 创建选项列表
-                    options = [0] + persons_df['id'].tolist()
-
-                    # 计算索引
-                    if current_participant in persons_df['id'].tolist():
-                        # 找到当前参与人员在选项列表中的索引
-                        index = options.index(current_participant)
-                    else:
-                        # 默认选择"无"选项
-                        index = 0
-
-                    participant_id = st.selectbox("参与人员",
-                                                options=options,
-                                                index=index,
-                                                format_func=lambda x: persons_dict.get(x, f"ID:{x}"))
-
-                    if participant_id == 0:
-                        participant_id = None
-                else:
-                    st.warning("暂无人员信息，请先添加人员")
-                    participant_id = None
-
             submit_button = st.form_submit_button("保存")
 
             if submit_button:
@@ -180,56 +172,45 @@ def standard_management():
                     st.error("实施日期不能早于发布日期")
                 else:
                     try:
-                        conn = get_connection()
-                        cursor = conn.cursor()
-
                         # 格式化日期
                         release_date_str = release_date.strftime("%Y-%m-%d")
                         implementation_date_str = implementation_date.strftime("%Y-%m-%d")
 
                         if edit_mode and standard_id:
                             # 更新现有记录
-                            cursor.execute('''
-                                UPDATE standard SET name=?, type=?, code=?, release_date=?,
-                                implementation_date=?, company=?, participant_id=? WHERE id=?
-                            ''', (name, standard_type, code, release_date_str,
-                                 implementation_date_str, company, participant_id, standard_id))
+                            save_versioned('standard', 'standard', standard_id, standard_data['version'], {
+                                'name': name, 'type': standard_type, 'code': code, 'release_date': release_date_str,
+                                'implementation_date': implementation_date_str, 'company': company,
+                                'participant_id': participant_id,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.standard_success_message = f"已更新标准 {name} 的信息"
                             # 保持expander展开
                             st.session_state.standard_expander_expanded = True
                         else:
                             # 新增记录
-                            cursor.execute('''
-                                INSERT INTO standard (name, type, code, release_date,
-                                implementation_date, company, participant_id)
-                                VALUES (?, ?, ?, ?, ?, ?, ?)
-                            ''', (name, standard_type, code, release_date_str,
-                                 implementation_date_str, company, participant_id))
+                            standard_repository.insert({
+                                'name': name, 'type': standard_type, 'code': code, 'release_date': release_date_str,
+                                'implementation_date': implementation_date_str, 'company': company,
+                                'participant_id': participant_id,
+                            })
                             # 保存成功消息到会话状态
                             st.session_state.standard_success_message = f"已添加标准 {name} 的信息"
                             # 保持expander展开
                             st.session_state.standard_expander_expanded = True
 
-                        conn.commit()
-                        conn.close()
-
                         # 刷新页面
                         st.rerun()
                     except Exception as e:
                         st.error(f"保存失败: {str(e)}")
 
-        conn.close()
-
     st.subheader("标准列表")
 
-    # 直接从数据库获取标准数据
-    conn = get_connection()
-    standards_df = pd.read_sql("SELECT * FROM standard", conn)
+    # 在数据库中筛选、排序和分页，只读取当前页
+    standards_df = paged_list('standard')
 
     # 获取人员信息用于显示
-    persons_df = pd.read_sql("SELECT id, name FROM person", conn)
-    persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
+    persons_dict = get_person_names()
 
     if not standards_df.empty:
         # 格式化显示数据
@@ -251,15 +232,17 @@ def standard_management():
             lambda x: persons_dict.get(x, "无") if x else "无")
         formatted_df['单位'] = display_df['company']
 
-        # 使用自定义表格显示工具
-        display_dataframe(formatted_df, 'standard')
+        # 使用自定义表格显示工具，可勾选多行进行批量操作
+        selected_rows = display_dataframe(formatted_df, 'standard', selection_key=list_selection_key('standard'))
+        selected_ids = standards_df['id'].iloc[selected_rows].tolist()
 
-        # 详细信息查看和删除选项
+        # 详细信息查看和删除选项，从当前页中选择
+        page_labels = dict(zip(standards_df['id'], standards_df['name']))
         col_view, col_del = st.columns(2)
 
         with col_view:
-            view_id = st.selectbox("选择要查看详细信息的标准", standards_df['id'].tolist(),
-                                 format_func=lambda x: standards_df[standards_df['id'] == x]['name'].iloc[0])
+            view_id = st.selectbox("选择要查看详细信息的标准（当前页）", standards_df['id'].tolist(),
+                                 format_func=page_labels.get)
 
             if st.button("查看详细信息"):
                 standard_data = standards_df[standards_df['id'] == view_id].iloc[0]
@@ -274,11 +257,9 @@ def standard_management():
 
                 # 显示参与人员信息
                 if standard_data['participant_id']:
-                    participant_query = "SELECT * FROM person WHERE id = ?"
-                    participant_df = pd.read_sql(participant_query, conn, params=[standard_data['participant_id']])
+                    participant = get_repository('person').get(standard_data['participant_id'])
 
-                    if not participant_df.empty:
-                        participant = participant_df.iloc[0]
+                    if participant is not None:
                         st.subheader("参与人员信息")
                         st.text(f"姓名: {participant['name']}")
                         st.text(f"性别: {participant['gender']}")
@@ -288,29 +269,27 @@ def standard_management():
                     st.text("参与人员: 无")
 
         with col_del:
-            del_id = st.selectbox("选择要删除的标准", standards_df['id'].tolist(),
-                                format_func=lambda x: standards_df[standards_df['id'] == x]['name'].iloc[0])
+            del_id = st.selectbox("选择要删除的标准（当前页）", standards_df['id'].tolist(),
+                                format_func=page_labels.get)
 
             if st.button("删除标准"):
                 try:
-                    conn = get_connection()
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM standard WHERE id = ?", (del_id,))
-                    conn.commit()
-                    conn.close()
+                    standard_repository.delete(del_id)
                     # 保存成功消息到会话状态
                     st.session_state.standard_success_message = "已删除标准"
                     st.rerun()
                 except Exception as e:
                     st.error(f"删除失败: {str(e)}")
+
+        # 对勾选的标准或全部符合条件的标准批量修改、删除
+        bulk_actions('standard', selected_ids)
     else:
         st.info("未找到符合条件的标准信息")
 
-    conn.close()
-
 # 辅助函数 - 显示标准统计信息
 def show_standard_statistics():
-    conn = get_connection()
+    # 统计查询读取只读分析副本
+    conn = get_analytics_connection()
 
     # 按标准性质统计
     type_query = """
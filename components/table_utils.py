@@ -61,6 +61,7 @@ COLUMN_TRANSLATIONS = {
 
     # 其他通用字段
     'id': 'ID',
+    'version': '版本',
     'count': '数量',
     '负责人': '负责人',
     '成员': '成员',
@@ -146,7 +147,7 @@ def translate_columns(df, entity_type=None):
 
     return display_df
 
-def display_dataframe(df, entity_type, key_suffix=None):
+def display_dataframe(df, entity_type, key_suffix=None, selection_key=None):
     """
     使用dashboard风格显示DataFrame，支持内置的列选择和排序功能
     默认不显示ID列和index列
@@ -155,11 +156,15 @@ def display_dataframe(df, entity_type, key_suffix=None):
     - df: 要显示的DataFrame
     - entity_type: 实体类型
     - key_suffix: 会话状态键的后缀（保留参数以兼容现有代码，但不再使用）
+    - selection_key: 指定时可勾选多行，作为表格的会话状态键
+
+    返回:
+    - list: 选中行在df中的位置，未启用选择时为空列表
     """
     # 忽略key_suffix参数，保留它只是为了兼容现有代码
     if df.empty:
         st.info(f"暂无{entity_type}数据")
-        return
+        return []
 
     # 翻译列名
     display_df = translate_columns(df, entity_type)
@@ -238,10 +243,24 @@ def display_dataframe(df, entity_type, key_suffix=None):
     display_df = display_df.reset_index(drop=True)
     display_df.index = display_df.index + 1  # 索引从1开始
 
-    # 显示DataFrame，使用dashboard风格，显示索引列
-    st.dataframe(
+    if selection_key is None:
+        # 显示DataFrame，使用dashboard风格，显示索引列
+        st.dataframe(
+            display_df,
+            column_config=column_config,
+            hide_index=False,  # 显示索引列
+            use_container_width=True
+        )
+        return []
+
+    # 勾选行时刷新页面，返回选中行的位置
+    event = st.dataframe(
         display_df,
         column_config=column_config,
-        hide_index=False,  # 显示索引列
-        use_container_width=True
+        hide_index=False,
+        use_container_width=True,
+        key=selection_key,
+        on_select="rerun",
+        selection_mode="multi-row"
     )
+    return list(event.selection.rows)
@@ -1,4 +1,6 @@
 import re
+import numpy as np
+import pandas as pd
 
 def validate_id_card(id_card):
     """
@@ -97,3 +99,110 @@ def validate_phone(phone):
         return False, "手机号格式不正确，应为11位数字且以1开头"
     
     return True, ""
+
+# 批量验证的错误码，下标即错误码，0 表示有效
+ID_CARD_ERRORS = (
+    "",
+    "身份证号不能为空",
+    "身份证号长度应为15位或18位",
+    "15位身份证号应全部为数字",
+    "18位身份证号前17位应为数字，最后一位可以是数字或X",
+    "身份证号中的年份无效",
+    "身份证号中的月份无效",
+    "身份证号中的日期无效",
+    "身份证号校验码错误",
+)
+
+PHONE_ERRORS = (
+    "",
+    "手机号格式不正确，应为11位数字且以1开头",
+)
+
+# 18位身份证号前17位的加权因子和校验码（按 ASCII 码存储，便于与字符矩阵比较）
+_ID_CARD_FACTORS = np.array([7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2], dtype=np.int64)
+_ID_CARD_CHECK_CODES = np.frombuffer(b'10X98765432', dtype=np.uint8).astype(np.int64)
+
+def _as_text(values):
+    # 转换为文本Series，空值(None/NaN)转换为空字符串
+    series = pd.Series(values, dtype=object).reset_index(drop=True)
+    empty = series.isna().to_numpy() | (series == '').to_numpy()
+    return series.where(~empty, '').astype(str), empty
+
+def _digit_matrix(texts, width):
+    # 将等长字符串转换为 (行数, width) 的数字矩阵，非数字字符不在 0-9 范围内
+    codes = np.array(texts, dtype=f'U{width}').view(np.uint32).reshape(-1, width)
+    return codes.astype(np.int64) - ord('0')
+
+def _set_code(codes, rows, mask, code):
+    # 只为尚未出错的行设置错误码，保持与逐条验证相同的检查顺序
+    target = rows[mask]
+    codes[target[codes[target] == 0]] = code
+
+def _check_dates(codes, rows, digits, year, month_at, day_at):
+    month = digits[:, month_at] * 10 + digits[:, month_at + 1]
+    day = digits[:, day_at] * 10 + digits[:, day_at + 1]
+    if year is not None:
+        _set_code(codes, rows, (year < 1900) | (year > 2100), 5)
+    _set_code(codes, rows, (month < 1) | (month > 12), 6)
+    _set_code(codes, rows, (day < 1) | (day > 31), 7)
+
+def validate_id_cards(id_cards):
+    """
+    批量验证身份证号，规则与 validate_id_card 相同，
+    18位身份证号的校验码通过数字矩阵与加权因子的点积一次算出
+
+    参数:
+    - id_cards: pandas Series、NumPy数组或列表
+
+    返回:
+    - tuple: (valid, codes)
+        valid: 是否有效的布尔数组
+        codes: 错误码数组（0为有效），错误信息为 ID_CARD_ERRORS[code]
+    """
+    texts, empty = _as_text(id_cards)
+    texts = texts.str.strip()
+    lengths = texts.str.len().to_numpy()
+    codes = np.zeros(len(texts), dtype=np.int8)
+    codes[empty] = 1
+    codes[~empty & (lengths != 15) & (lengths != 18)] = 2
+
+    rows = np.flatnonzero(~empty & (lengths == 15))
+    if len(rows):
+        digits = _digit_matrix(texts.to_numpy()[rows], 15)
+        _set_code(codes, rows, ((digits < 0) | (digits > 9)).any(axis=1), 3)
+        _check_dates(codes, rows, digits, None, 8, 10)
+
+    rows = np.flatnonzero(~empty & (lengths == 18))
+    if len(rows):
+        digits = _digit_matrix(texts.str.upper().to_numpy()[rows], 18)
+        last = digits[:, 17] + ord('0')
+        invalid = ((digits[:, :17] < 0) | (digits[:, :17] > 9)).any(axis=1)
+        invalid |= ((digits[:, 17] < 0) | (digits[:, 17] > 9)) & (last != ord('X'))
+        _set_code(codes, rows, invalid, 4)
+
+        year = digits[:, 6:10] @ np.array([1000, 100, 10, 1])
+        _check_dates(codes, rows, digits, year, 10, 12)
+
+        # 格式有误的行点积结果无意义，_set_code 不会覆盖已有的错误码
+        check = _ID_CARD_CHECK_CODES[(digits[:, :17] @ _ID_CARD_FACTORS) % 11]
+        _set_code(codes, rows, check != last, 8)
+
+    return codes == 0, codes
+
+def validate_phones(phones):
+    """
+    批量验证手机号，规则与 validate_phone 相同（空值视为有效）
+
+    参数:
+    - phones: pandas Series、NumPy数组或列表
+
+    返回:
+    - tuple: (valid, codes)
+        valid: 是否有效的布尔数组
+        codes: 错误码数组（0为有效），错误信息为 PHONE_ERRORS[code]
+    """
+    texts, empty = _as_text(phones)
+    normalized = texts.str.replace(r'[\s-]', '', regex=True)
+    matched = normalized.str.fullmatch(r'1[3-9]\d{9}').fillna(False).to_numpy(dtype=bool)
+    codes = np.where(empty | matched, 0, 1).astype(np.int8)
+    return codes == 0, codes
@@ -0,0 +1,157 @@
+import time
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from components.db_utils import get_connection
+
+# 一次提交中最多合并的写操作数
+WRITE_BATCH_MAX = 64
+
+# 等待写操作完成的最长时间（秒）
+WRITE_TIMEOUT = 30
+
+# 数据库被其他连接（如批量导入、恢复备份）锁定时，开始事务的重试次数和间隔（秒）
+WRITE_LOCK_RETRIES = 5
+WRITE_LOCK_RETRY_DELAY = 0.2
+
+class WriteQueue:
+    """
+    单写线程队列：所有会话的写操作排队后由同一个线程、同一个连接依次执行
+
+    写线程每次取出队列中已积压的写操作（最多 WRITE_BATCH_MAX 个），在一个事务中执行并一次提交（组提交），
+    每个写操作使用独立的保存点，某个操作失败只回滚它自己，不影响同一批的其他操作。
+    写操作之间不再争抢写锁，不会因多人同时保存而出现 database is locked
+
+    参数:
+    - batch_max: 一次提交中最多合并的写操作数
+    """
+
+    def __init__(self, batch_max=WRITE_BATCH_MAX):
+        self.batch_max = batch_max
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, func):
+        """
+        提交一个写操作
+
+        参数:
+        - func: 写操作函数，参数为数据库连接，在写线程中执行；不要在其中提交事务或调用Streamlit界面函数
+
+        返回:
+        - concurrent.futures.Future: 事务提交后得到 func 的返回值，func 抛出异常或提交失败时得到该异常
+        """
+        future = Future()
+        self._ensure_thread()
+        self._queue.put((func, future))
+        return future
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        # 阻塞等待第一个写操作，再取出此期间积压的其他写操作
+        batch = [self._queue.get()]
+        while len(batch) < self.batch_max:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return [(func, future) for func, future in batch if future.set_running_or_notify_cancel()]
+
+    def _begin(self, conn):
+        for attempt in range(WRITE_LOCK_RETRIES):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if 'locked' not in str(e) or attempt == WRITE_LOCK_RETRIES - 1:
+                    raise
+                time.sleep(WRITE_LOCK_RETRY_DELAY)
+
+    def _run(self):
+        conn = get_connection()
+        try:
+            while True:
+                batch = self._next_batch()
+                if not batch:
+                    continue
+                try:
+                    self._write_batch(conn, batch)
+                except Exception as e:
+                    # 事务本身出错（如磁盘已满）时整批失败，写线程继续处理后续写操作
+                    if conn.in_transaction:
+                        conn.rollback()
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn, batch):
+        self._begin(conn)
+
+        results = []
+        for func, future in batch:
+            conn.execute("SAVEPOINT write_item")
+            try:
+                result = func(conn)
+            except Exception as e:
+                conn.execute("ROLLBACK TO write_item")
+                conn.execute("RELEASE write_item")
+                future.set_exception(e)
+            else:
+                conn.execute("RELEASE write_item")
+                results.append((future, result))
+
+        conn.commit()
+
+        # 提交成功后才返回结果，调用方拿到结果时数据已经写入
+        for future, result in results:
+            future.set_result(result)
+
+# 默认数据库的写队列，所有会话共用
+_write_queue = WriteQueue()
+
+def submit_write(func):
+    """
+    将写操作提交到共用的写队列
+
+    参数:
+    - func: 写操作函数，参数为数据库连接
+
+    返回:
+    - concurrent.futures.Future: 写操作的结果
+    """
+    return _write_queue.submit(func)
+
+def run_write(func, timeout=WRITE_TIMEOUT):
+    """
+    将写操作提交到共用的写队列并等待其提交
+
+    参数:
+    - func: 写操作函数，参数为数据库连接
+    - timeout: 最长等待时间（秒）
+
+    返回:
+    - func 的返回值，写操作失败时抛出其异常
+    """
+    return submit_write(func).result(timeout)
+
+def execute_write(sql, parameters=()):
+    """
+    通过写队列执行一条写入语句并等待其提交
+
+    参数:
+    - sql: SQL语句
+    - parameters: 语句参数
+
+    返回:
+    - int: 受影响的行数
+    """
+    return run_write(lambda conn: conn.execute(sql, parameters).rowcount)
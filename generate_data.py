@@ -1,17 +1,39 @@
+import os
+import sys
+import time
+import shutil
 import sqlite3
 import random
 import string
-from datetime import datetime, timedelta
+import argparse
+import tempfile
+from datetime import date, timedelta
+from itertools import islice, accumulate
+from concurrent.futures import ProcessPoolExecutor
 
-# 数据库文件路径
-DB_FILE = 'project_manager.db'
+# 直接运行本脚本或在子进程中导入时都能找到 components 包
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# 获取数据库连接
-def get_connection():
-    return sqlite3.connect(DB_FILE)
+from components.db_utils import migrate, bulk_load, DB_FILE, TABLE_DEFINITIONS
+
+# 出生日期范围，身份证号按序号生成时使用
+ID_CARD_FIRST_BIRTH_DATE = date(1960, 1, 1)
+ID_CARD_BIRTH_DAYS = (date(2000, 12, 31) - ID_CARD_FIRST_BIRTH_DATE).days + 1
+# 序号映射的步长：质数，与取值空间（只含较小的质因数）互质
+ID_CARD_STRIDE = 2654435761
 
 # 生成随机身份证号
-def generate_id_card():
+def generate_id_card(serial=None, offset=0):
+    """
+    生成身份证号
+
+    参数:
+    - serial: 序号，不为None时不同序号生成的身份证号一定不同（用于大批量生成，避免唯一约束冲突）
+    - offset: 序号映射的起点，同一批数据应使用相同的值
+
+    返回:
+    - str: 18位身份证号
+    """
     # 地区码（前6位）- 使用有效的地区码
     area_codes = [
         "110100", "110200", "120100", "130100", "130200", "130300", "130400", "130500",
@@ -58,6 +80,16 @@ def generate_id_card():
         "640500", "650100", "650200", "652100", "652200", "652300", "652700", "652800",
         "652900", "653000", "653100", "653200", "654000", "654200", "654300", "659000"
     ]
+    if serial is not None:
+        # 将序号一一映射到 (地区码, 出生日期, 顺序码) 的组合上：步长与取值空间互质，映射不会重复
+        space = len(area_codes) * ID_CARD_BIRTH_DAYS * 999
+        code = (serial * ID_CARD_STRIDE + offset) % space
+        code, seq_index = divmod(code, 999)
+        area_index, day_index = divmod(code, ID_CARD_BIRTH_DAYS)
+        area_code = area_codes[area_index]
+        birth_code = (ID_CARD_FIRST_BIRTH_DATE + timedelta(days=day_index)).strftime("%Y%m%d")
+        return _id_card_with_checksum(f"{area_code}{birth_code}{seq_index + 1:03d}")
+
     area_code = random.choice(area_codes)
 
     # 出生日期（中间8位）
@@ -82,8 +114,9 @@ def generate_id_card():
     seq = random.randint(1, 999)
 
     # 构建前17位
-    id_17 = f"{area_code}{birth_code}{seq:03d}"
+    return _id_card_with_checksum(f"{area_code}{birth_code}{seq:03d}")
 
+def _id_card_with_checksum(id_17):
     # 计算校验码
     factors = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
     checksum_map = '10X98765432'
@@ -121,116 +154,143 @@ def generate_phone():
 
     return f"{prefix}{suffix}"
 
-# 创建数据库表结构
-def create_tables():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 创建人员表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS person (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        gender TEXT,
-        birth_date TEXT,
-        id_card TEXT UNIQUE,
-        education TEXT,
-        school TEXT,
-        graduation_date TEXT,
-        major TEXT,
-        title TEXT,
-        phone TEXT,
-        department TEXT,
-        position TEXT,
-        skill_level TEXT
-    )
-    ''')
-
-    # 创建项目表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS project (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,
-        start_date TEXT,
-        end_date TEXT,
-        members TEXT,  -- 存储人员id，以逗号分隔
-        leader_id INTEGER,
-        outcome TEXT,
-        status TEXT DEFAULT "进行中",
-        FOREIGN KEY (leader_id) REFERENCES person (id)
-    )
-    ''')
-
-    # 创建标准表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS standard (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,          -- 标准名称
-        type TEXT NOT NULL,          -- 标准性质（国标、行标等）
-        code TEXT NOT NULL,          -- 标准号
-        release_date TEXT,           -- 发布日期
-        implementation_date TEXT,    -- 实施日期
-        company TEXT,                -- 参与单位
-        participant_id INTEGER,      -- 参与人员ID
-        FOREIGN KEY (participant_id) REFERENCES person (id)
-    )
-    ''')
-
-    # 创建专利表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS patent (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT NOT NULL,          -- 专利名称
-        type TEXT NOT NULL,          -- 专利类型（发明、实用新型、外观设计）
-        application_date TEXT,       -- 申请日期
-        grant_date TEXT,             -- 授权日期
-        owner_id INTEGER,            -- 专利所有人（人员ID）
-        participants TEXT,           -- 其他参与人员（以逗号分隔的ID）
-        company TEXT,                -- 申请单位
-        patent_number TEXT,          -- 专利号
-        certificate TEXT DEFAULT "无",  -- 证书状态
-        FOREIGN KEY (owner_id) REFERENCES person (id)
-    )
-    ''')
-
-    # 创建论文表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS paper (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        title TEXT NOT NULL,          -- 论文标题
-        journal TEXT NOT NULL,        -- 期刊名称
-        journal_type TEXT NOT NULL,   -- 期刊类型（核心、非核心、EI、SCI）
-        publish_date TEXT,            -- 发表日期
-        first_author_id INTEGER,      -- 第一作者ID
-        co_authors TEXT,              -- 参与作者（以逗号分隔的ID）
-        organization TEXT,            -- 作者单位
-        volume_info TEXT,             -- 期次信息
-        FOREIGN KEY (first_author_id) REFERENCES person (id)
-    )
-    ''')
-
-    conn.commit()
-    conn.close()
-    print("数据库表结构创建完成")
+# 默认生成的数据量
+DEFAULT_COUNTS = {
+    'person': 20,
+    'project': 15,
+    'standard': 15,
+    'patent': 30,
+    'paper': 25,
+}
+
+# 每批写入的行数
+BATCH_SIZE = 10000
+
+# 批量生成时的连接参数：数据库文件为新建，失败时直接删除，因此可以关闭日志和同步
+FAST_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = OFF",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA cache_size = -262144",      # 页缓存约256MB
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA locking_mode = EXCLUSIVE",
+]
+
+# 数据分布方案：可组合使用，未指定的项按均匀分布生成
+# - author_zipf: 人员产出服从Zipf分布的指数（少数人员参与大量项目、专利和论文）
+# - department_zipf: 部门规模服从Zipf分布的指数（出现超大部门）
+# - team_alpha: 团队规模（项目成员、专利参与人、论文合作作者）服从幂律分布的指数
+# - seasonal: 项目启动、标准发布、专利申请和论文发表集中在特定月份
+PROFILES = {
+    'uniform': {},
+    'zipf_authors': {'author_zipf': 0.9},
+    'power_law_teams': {'team_alpha': 3.0},
+    'seasonal': {'seasonal': True},
+    'giant_departments': {'department_zipf': 1.5},
+    'production': {'author_zipf': 0.9, 'department_zipf': 1.5, 'team_alpha': 3.0, 'seasonal': True},
+}
+
+# 幂律团队规模的上限
+MAX_TEAM_SIZE = 50
+
+# 季节性月份权重：年初立项、年末集中申请专利和发表论文
+SEASONAL_MONTH_WEIGHTS = [6, 2, 5, 4, 3, 3, 2, 2, 3, 3, 5, 8]
+
+# 人员产出排名到人员ID的映射步长：质数，使高产人员分散在整个ID范围内
+RANK_STRIDE = 2654435761
+
+def resolve_profile(names):
+    """
+    合并多个分布方案
+
+    参数:
+    - names: 方案名称列表，例如 ['zipf_authors', 'seasonal']
+
+    返回:
+    - dict: 合并后的分布参数
+    """
+    settings = {}
+    for name in names or []:
+        if name not in PROFILES:
+            raise ValueError(f"未知的数据分布方案: {name}，可选: {', '.join(PROFILES)}")
+        settings.update(PROFILES[name])
+    return settings
+
+class DistributionSampler:
+    """
+    按分布方案抽取人员、团队规模、月份和部门
+
+    参数:
+    - settings: 分布参数（见 PROFILES）
+    - person_ids: 可选的人员ID序列（生成人员数据时为None）
+    """
+
+    def __init__(self, settings, person_ids=None):
+        self.settings = settings or {}
+        self.person_ids = person_ids
+        self._rank_weights = None
+        if person_ids and self.settings.get('author_zipf'):
+            # 第r名的权重为 1/r^s，累积权重用于按二分查找抽样
+            exponent = self.settings['author_zipf']
+            self._rank_weights = list(accumulate(1 / rank ** exponent for rank in range(1, len(person_ids) + 1)))
+
+    def person(self):
+        # 抽取一名人员
+        if self._rank_weights is None:
+            return random.choice(self.person_ids)
+        rank = random.choices(range(len(self.person_ids)), cum_weights=self._rank_weights, k=1)[0]
+        return self.person_ids[rank * RANK_STRIDE % len(self.person_ids)]
+
+    def people(self, count, exclude=None):
+        # 抽取 count 名互不相同的人员，不包含 exclude
+        if self._rank_weights is None:
+            # 多抽取一人再排除，避免每条记录都复制一次完整的人员列表
+            candidates = random.sample(self.person_ids, count + (exclude is not None))
+            return [p_id for p_id in candidates if p_id != exclude][:count]
+
+        chosen = []
+        while len(chosen) < count:
+            p_id = self.person()
+            if p_id != exclude and p_id not in chosen:
+                chosen.append(p_id)
+        return chosen
+
+    def team_size(self, low, high, limit):
+        # 团队规模：均匀分布时取 [low, high]，幂律分布时以 low 为下限、长尾可超过 high
+        alpha = self.settings.get('team_alpha')
+        if not alpha:
+            return min(random.randint(low, high), limit)
+        size = int(low * (1 - random.random()) ** (-1 / (alpha - 1)))
+        return min(size, MAX_TEAM_SIZE, limit)
+
+    def month(self):
+        if self.settings.get('seasonal'):
+            return random.choices(range(1, 13), weights=SEASONAL_MONTH_WEIGHTS, k=1)[0]
+        return random.randint(1, 12)
+
+    def department(self, departments):
+        exponent = self.settings.get('department_zipf')
+        if not exponent:
+            return random.choice(departments)
+        weights = [1 / rank ** exponent for rank in range(1, len(departments) + 1)]
+        return random.choices(departments, weights=weights, k=1)[0]
 
 # 生成人员数据
-def generate_person_data(count=15):
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 清空现有数据
-    cursor.execute("DELETE FROM person")
-
+def person_rows(count, sampler=None):
+    """
+    生成人员数据行，人员ID为 1..count
+
+    参数:
+    - count: 人员数量
+    - sampler: DistributionSampler，为None时按均匀分布生成
+
+    返回:
+    - 生成器: (id, name, gender, birth_date, id_card, education, school, graduation_date,
+               major, title, phone, department, position, skill_level)
+    """
     names = ["张三", "李四", "王五", "赵六", "钱七", "孙八", "周九", "吴十",
              "郑十一", "王十二", "刘十三", "陈十四", "杨十五", "黄十六", "赵十七",
              "朱十八", "冯十九", "程二十", "褚二十一", "魏二十二"]
 
-    if count > len(names):
-        # 如果需要生成更多数据，复制名字列表
-        names = names * (count // len(names) + 1)
-
-    names = names[:count]  # 截取需要的数量
-
     genders = ["男", "女"]
     educations = ["高中", "专科", "本科", "硕士", "博士"]
     schools = ["四川大学", "江南大学", "中国农业大学", "华中农业大学", "天津科技大学",
@@ -244,16 +304,21 @@ def generate_person_data(count=15):
     positions = ["研究员", "工程师", "技术员", "部门经理", "主管", "专员", "组长", "技术总监"]
     skill_levels = ["初级", "中级", "高级", "资深", "专家"]
 
-    person_ids = []  # 存储生成的人员ID
+    sampler = sampler or DistributionSampler({})
 
-    for name in names:
+    # 身份证号按人员ID生成，保证唯一
+    id_card_offset = random.getrandbits(32)
+
+    for person_id in range(1, count + 1):
+        # 名字列表循环使用
+        name = names[(person_id - 1) % len(names)]
         gender = random.choice(genders)
         birth_year = random.randint(1960, 2000)
         birth_month = random.randint(1, 12)
         birth_day = random.randint(1, 28)
         birth_date = f"{birth_year}-{birth_month:02d}-{birth_day:02d}"
 
-        id_card = generate_id_card()
+        id_card = generate_id_card(person_id, id_card_offset)
         education = random.choice(educations)
         school = random.choice(schools)
 
@@ -267,37 +332,26 @@ def generate_person_data(count=15):
         phone = generate_phone()
 
         # 新增字段的随机值
-        department = random.choice(departments)
+        department = sampler.department(departments)
         position = random.choice(positions)
         skill_level = random.choice(skill_levels)
 
-        cursor.execute('''
-            INSERT INTO person (name, gender, birth_date, id_card, education, school,
-                               graduation_date, major, title, phone, department, position, skill_level)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (name, gender, birth_date, id_card, education, school,
-              graduation_date, major, title, phone, department, position, skill_level))
-
-        # 获取插入的ID
-        person_ids.append(cursor.lastrowid)
-
-    conn.commit()
-    conn.close()
-    print(f"已生成 {len(person_ids)} 条人员数据")
-    return person_ids
+        yield (person_id, name, gender, birth_date, id_card, education, school,
+               graduation_date, major, title, phone, department, position, skill_level)
 
 # 生成项目数据
-def generate_project_data(person_ids, count=10):
-    if not person_ids:
-        print("无法生成项目数据：没有人员数据")
-        return []
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 清空现有数据
-    cursor.execute("DELETE FROM project")
-
+def project_rows(count, person_ids, sampler=None):
+    """
+    生成项目数据行
+
+    参数:
+    - count: 项目数量
+    - person_ids: 可选的人员ID序列（列表或range）
+    - sampler: DistributionSampler，为None时按均匀分布生成
+
+    返回:
+    - 生成器: (id, name, start_date, end_date, members, leader_id, outcome, status)
+    """
     project_names = [
         "白酒酿造微生物菌种优化研究", "白酒香味成分分析系统开发", "酒曲制作工艺改良",
         "白酒陈酿加速技术研究", "发酵温度对白酒品质影响分析",
@@ -308,15 +362,6 @@ def generate_project_data(person_ids, count=10):
         "白酒酿造智能温控系统", "新型酒曲微生物筛选与应用研究"
     ]
 
-    if count > len(project_names):
-        # 构造更多项目名称
-        for i in range(len(project_names), count):
-            project_names.append(f"白酒研究项目{i+1}")
-
-    project_names = project_names[:count]  # 截取需要的数量
-
-    project_ids = []  # 存储生成的项目ID
-
     # 项目成果选项
     outcomes = [
         "发酵效率提高15%",
@@ -334,19 +379,26 @@ def generate_project_data(person_ids, count=10):
     # 项目状态选项
     statuses = ["进行中", "已完成"]
 
-    for project_name in project_names:
+    sampler = sampler or DistributionSampler({}, person_ids)
+    current_date = date.today()
+
+    for project_id in range(1, count + 1):
+        # 名称列表用完后构造更多项目名称
+        if project_id <= len(project_names):
+            project_name = project_names[project_id - 1]
+        else:
+            project_name = f"白酒研究项目{project_id}"
+
         # 随机起止日期
         start_year = random.randint(2018, 2023)
-        start_month = random.randint(1, 12)
+        start_month = sampler.month()
         start_day = random.randint(1, 28)
-        start_date = f"{start_year}-{start_month:02d}-{start_day:02d}"
+        start_date_obj = date(start_year, start_month, start_day)
 
         # 确保结束日期在开始日期之后
-        end_date_obj = datetime.strptime(start_date, "%Y-%m-%d") + timedelta(days=random.randint(90, 730))
-        end_date = end_date_obj.strftime("%Y-%m-%d")
+        end_date_obj = start_date_obj + timedelta(days=random.randint(90, 730))
 
         # 根据当前日期和结束日期自动判断项目状态
-        current_date = datetime.now()
         if end_date_obj < current_date:
             status = "已完成"
         else:
@@ -354,42 +406,32 @@ def generate_project_data(person_ids, count=10):
             status = random.choices(statuses, weights=[0.8, 0.2], k=1)[0]
 
         # 随机选择项目成员和负责人
-        team_size = random.randint(3, min(6, len(person_ids)))
-        team_members = random.sample(person_ids, team_size)
+        team_size = sampler.team_size(3, 6, len(person_ids))
+        team_members = sampler.people(team_size)
         leader = random.choice(team_members)
 
         # 构建项目成员字符串
-        member_ids = [str(member_id) for member_id in team_members]
-        members_str = ",".join(member_ids)
+        members_str = ",".join(map(str, team_members))
 
         # 随机项目成果
         outcome = random.choice(outcomes)
 
-        cursor.execute('''
-            INSERT INTO project (name, start_date, end_date, members, leader_id, outcome, status)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (project_name, start_date, end_date, members_str, leader, outcome, status))
-
-        # 获取插入的ID
-        project_ids.append(cursor.lastrowid)
-
-    conn.commit()
-    conn.close()
-    print(f"已生成 {len(project_ids)} 条项目数据")
-    return project_ids
+        yield (project_id, project_name, start_date_obj.isoformat(), end_date_obj.isoformat(),
+               members_str, leader, outcome, status)
 
 # 生成标准数据
-def generate_standard_data(person_ids, count=12):
-    if not person_ids:
-        print("无法生成标准数据：没有人员数据")
-        return []
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 清空现有数据
-    cursor.execute("DELETE FROM standard")
-
+def standard_rows(count, person_ids, sampler=None):
+    """
+    生成标准数据行
+
+    参数:
+    - count: 标准数量
+    - person_ids: 可选的人员ID序列（列表或range）
+    - sampler: DistributionSampler，为None时按均匀分布生成
+
+    返回:
+    - 生成器: (id, name, type, code, release_date, implementation_date, company, participant_id)
+    """
     standard_names = [
         "白酒感官评价方法",
         "白酒酿造微生物检测技术规范",
@@ -408,13 +450,6 @@ def generate_standard_data(person_ids, count=12):
         "清香型白酒工艺规范"
     ]
 
-    if count > len(standard_names):
-        # 构造更多标准名称
-        for i in range(len(standard_names), count):
-            standard_names.append(f"白酒技术规范{i+1}")
-
-    standard_names = standard_names[:count]  # 截取需要的数量
-
     standard_types = ["国家标准", "行业标准", "地方标准", "团体标准", "企业标准"]
 
     companies = [
@@ -429,9 +464,15 @@ def generate_standard_data(person_ids, count=12):
         "山西杏花村汾酒集团有限责任公司"
     ]
 
-    standard_ids = []  # 存储生成的标准ID
+    sampler = sampler or DistributionSampler({}, person_ids)
+
+    for standard_id in range(1, count + 1):
+        # 名称列表用完后构造更多标准名称
+        if standard_id <= len(standard_names):
+            standard_name = standard_names[standard_id - 1]
+        else:
+            standard_name = f"白酒技术规范{standard_id}"
 
-    for standard_name in standard_names:
         # 生成标准号
         standard_type = random.choice(standard_types)
         if standard_type == "国家标准":
@@ -450,48 +491,36 @@ def generate_standard_data(person_ids, count=12):
 
         # 随机日期
         release_year = random.randint(2018, 2023)
-        release_month = random.randint(1, 12)
+        release_month = sampler.month()
         release_day = random.randint(1, 28)
-        release_date = f"{release_year}-{release_month:02d}-{release_day:02d}"
+        release_date_obj = date(release_year, release_month, release_day)
 
         # 实施日期在发布日期之后
-        release_date_obj = datetime.strptime(release_date, "%Y-%m-%d")
         impl_date_obj = release_date_obj + timedelta(days=random.randint(30, 180))
-        impl_date = impl_date_obj.strftime("%Y-%m-%d")
 
         # 随机选择参与单位
         company = random.choice(companies)
 
         # 随机选择参与人员（通常只有一个）
-        participant_id = random.choice(person_ids)
-
-        cursor.execute('''
-            INSERT INTO standard (name, type, code, release_date, implementation_date,
-                               company, participant_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (standard_name, standard_type, standard_code, release_date, impl_date,
-              company, participant_id))
+        participant_id = sampler.person()
 
-        # 获取插入的ID
-        standard_ids.append(cursor.lastrowid)
-
-    conn.commit()
-    conn.close()
-    print(f"已生成 {len(standard_ids)} 条标准数据")
-    return standard_ids
+        yield (standard_id, standard_name, standard_type, standard_code, release_date_obj.isoformat(),
+               impl_date_obj.isoformat(), company, participant_id)
 
 # 生成专利数据
-def generate_patent_data(person_ids, count=30):
-    if not person_ids:
-        print("无法生成专利数据：没有人员数据")
-        return []
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 清空现有数据
-    cursor.execute("DELETE FROM patent")
-
+def patent_rows(count, person_ids, sampler=None):
+    """
+    生成专利数据行
+
+    参数:
+    - count: 专利数量
+    - person_ids: 可选的人员ID序列（列表或range）
+    - sampler: DistributionSampler，为None时按均匀分布生成
+
+    返回:
+    - 生成器: (id, name, type, application_date, grant_date, owner_id, participants,
+               company, patent_number, certificate)
+    """
     # 专利名称列表
     patent_names = [
         "一种基于微生物发酵的白酒酿造方法",
@@ -516,13 +545,6 @@ def generate_patent_data(person_ids, count=30):
         "一种强化酒曲发酵的方法",
     ]
 
-    # if count > len(patent_names):
-    #     # 构造更多专利名称
-    #     for i in range(len(patent_names), count):
-    #         patent_names.append(f"一种白酒酿造改良技术{i+1}")
-
-    patent_names = patent_names[:count]  # 截取需要的数量
-
     # 专利类型
     patent_types = ["发明专利", "实用新型专利", "外观设计专利"]
 
@@ -545,20 +567,26 @@ def generate_patent_data(person_ids, count=30):
     # 证书状态选项
     certificate_statuses = ["有", "无"]
 
-    patent_ids = []  # 存储生成的专利ID
+    sampler = sampler or DistributionSampler({}, person_ids)
+    current_date = date.today()
+
+    for patent_id in range(1, count + 1):
+        # 名称列表用完后构造更多专利名称
+        if patent_id <= len(patent_names):
+            patent_name = patent_names[patent_id - 1]
+        else:
+            patent_name = f"一种白酒酿造改良技术{patent_id}"
 
-    for patent_name in patent_names:
         # 随机专利类型 (基于权重)
         patent_type = random.choices(patent_types, weights=patent_type_weights, k=1)[0]
 
         # 随机申请日期（2015-2023年间）
         app_year = random.randint(2015, 2023)
-        app_month = random.randint(1, 12)
+        app_month = sampler.month()
         app_day = random.randint(1, 28)
-        application_date = f"{app_year}-{app_month:02d}-{app_day:02d}"
+        app_date_obj = date(app_year, app_month, app_day)
 
         # 授权日期在申请日期之后1-3年
-        app_date_obj = datetime.strptime(application_date, "%Y-%m-%d")
         # 外观设计专利审查周期较短
         if patent_type == "外观设计专利":
             delay_days = random.randint(180, 365)
@@ -568,25 +596,24 @@ def generate_patent_data(person_ids, count=30):
             delay_days = random.randint(365, 1095)
 
         grant_date_obj = app_date_obj + timedelta(days=delay_days)
-        grant_date = grant_date_obj.strftime("%Y-%m-%d")
 
         # 随机选择申请单位
         company = random.choice(companies)
 
         # 随机选择专利所有人（通常是一个人）
-        owner_id = random.choice(person_ids)
+        owner_id = sampler.person()
 
         # 随机选择参与人员（根据专利类型调整人数）
-        available_participants = [p_id for p_id in person_ids if p_id != owner_id]
+        max_participants = len(person_ids) - 1
 
         if patent_type == "发明专利":
-            participant_count = min(random.randint(2, 5), len(available_participants))
+            participant_count = sampler.team_size(2, 5, max_participants)
         elif patent_type == "实用新型专利":
-            participant_count = min(random.randint(1, 3), len(available_participants))
+            participant_count = sampler.team_size(1, 3, max_participants)
         else:  # 外观设计专利
-            participant_count = min(random.randint(1, 2), len(available_participants))
+            participant_count = sampler.team_size(1, 2, max_participants)
 
-        participants = random.sample(available_participants, participant_count)
+        participants = sampler.people(participant_count, exclude=owner_id)
         participants_str = ",".join(map(str, participants))
 
         # 生成专利号
@@ -604,7 +631,7 @@ def generate_patent_data(person_ids, count=30):
         patent_number = f"{prefix}{year_part}{number_part}{suffix}"
 
         # 随机证书状态，授权日期越早，拥有证书的几率越高
-        years_since_grant = (datetime.now() - grant_date_obj).days / 365
+        years_since_grant = (current_date - grant_date_obj).days / 365
         if years_since_grant > 2:
             certificate_probabilities = [0.8, 0.2]  # 80%有证书
         elif years_since_grant > 1:
@@ -614,33 +641,23 @@ def generate_patent_data(person_ids, count=30):
 
         certificate = random.choices(certificate_statuses, weights=certificate_probabilities, k=1)[0]
 
-        cursor.execute('''
-            INSERT INTO patent (name, type, application_date, grant_date,
-                             owner_id, participants, company, patent_number, certificate)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (patent_name, patent_type, application_date, grant_date,
-             owner_id, participants_str, company, patent_number, certificate))
-
-        # 获取插入的ID
-        patent_ids.append(cursor.lastrowid)
-
-    conn.commit()
-    conn.close()
-    print(f"已生成 {len(patent_ids)} 条专利数据")
-    return patent_ids
+        yield (patent_id, patent_name, patent_type, app_date_obj.isoformat(), grant_date_obj.isoformat(),
+               owner_id, participants_str, company, patent_number, certificate)
 
 # 生成论文数据
-def generate_paper_data(person_ids, count=25):
-    if not person_ids:
-        print("无法生成论文数据：没有人员数据")
-        return []
-
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # 清空现有数据
-    cursor.execute("DELETE FROM paper")
-
+def paper_rows(count, person_ids, sampler=None):
+    """
+    生成论文数据行
+
+    参数:
+    - count: 论文数量
+    - person_ids: 可选的人员ID序列（列表或range）
+    - sampler: DistributionSampler，为None时按均匀分布生成
+
+    返回:
+    - 生成器: (id, title, journal, journal_type, publish_date, first_author_id, co_authors,
+               organization, volume_info)
+    """
     # 论文标题列表
     paper_titles = [
         "白酒酿造过程中呈香物质代谢机制研究",
@@ -665,13 +682,6 @@ def generate_paper_data(person_ids, count=25):
         "传统酿造工艺与现代技术相结合的应用研究"
     ]
 
-    # if count > len(paper_titles):
-    #     # 构造更多论文标题
-    #     for i in range(len(paper_titles), count):
-    #         paper_titles.append(f"白酒酿造工艺优化研究({i+1})")
-
-    paper_titles = paper_titles[:count]  # 截取需要的数量
-
     # 期刊名称列表
     journals = [
         "食品科学",
@@ -715,9 +725,16 @@ def generate_paper_data(person_ids, count=25):
         "泸州老窖股份有限公司技术中心"
     ]
 
-    paper_ids = []  # 存储生成的论文ID
 
-    for paper_title in paper_titles:
+    sampler = sampler or DistributionSampler({}, person_ids)
+
+    for paper_id in range(1, count + 1):
+        # 标题列表用完后构造更多论文标题
+        if paper_id <= len(paper_titles):
+            paper_title = paper_titles[paper_id - 1]
+        else:
+            paper_title = f"白酒酿造工艺优化研究({paper_id})"
+
         # 随机选择期刊
         journal = random.choice(journals)
 
@@ -726,7 +743,7 @@ def generate_paper_data(person_ids, count=25):
 
         # 随机发表日期（2015-2023年间）
         pub_year = random.randint(2015, 2023)
-        pub_month = random.randint(1, 12)
+        pub_month = sampler.month()
         pub_day = random.randint(1, 28)
         publish_date = f"{pub_year}-{pub_month:02d}-{pub_day:02d}"
 
@@ -734,13 +751,11 @@ def generate_paper_data(person_ids, count=25):
         organization = random.choice(organizations)
 
         # 随机选择第一作者（通常是一个人）
-        first_author_id = random.choice(person_ids)
+        first_author_id = sampler.person()
 
         # 随机选择参与作者（2-4人）
-        available_co_authors = [p_id for p_id in person_ids if p_id != first_author_id]
-
-        co_author_count = min(random.randint(2, 4), len(available_co_authors))
-        co_authors = random.sample(available_co_authors, co_author_count)
+        co_author_count = sampler.team_size(2, 4, len(person_ids) - 1)
+        co_authors = sampler.people(co_author_count, exclude=first_author_id)
         co_authors_str = ",".join(map(str, co_authors))
 
         # 生成随机期次信息
@@ -748,50 +763,194 @@ def generate_paper_data(person_ids, count=25):
         issue = random.randint(1, 12)
         volume_info = f"第{volume}卷第{issue}期"
 
-        cursor.execute('''
-            INSERT INTO paper (title, journal, journal_type, publish_date,
-                            first_author_id, co_authors, organization, volume_info)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (paper_title, journal, journal_type, publish_date,
-              first_author_id, co_authors_str, organization, volume_info))
-
-        # 获取插入的ID
-        paper_ids.append(cursor.lastrowid)
+        yield (paper_id, paper_title, journal, journal_type, publish_date,
+               first_author_id, co_authors_str, organization, volume_info)
+
+# 各表的数据生成函数和写入字段，按人员在前的顺序生成
+TABLE_GENERATORS = {
+    'person': (person_rows, ['id', 'name', 'gender', 'birth_date', 'id_card', 'education', 'school',
+                             'graduation_date', 'major', 'title', 'phone', 'department', 'position',
+                             'skill_level']),
+    'project': (project_rows, ['id', 'name', 'start_date', 'end_date', 'members', 'leader_id',
+                               'outcome', 'status']),
+    'standard': (standard_rows, ['id', 'name', 'type', 'code', 'release_date', 'implementation_date',
+                                 'company', 'participant_id']),
+    'patent': (patent_rows, ['id', 'name', 'type', 'application_date', 'grant_date', 'owner_id',
+                             'participants', 'company', 'patent_number', 'certificate']),
+    'paper': (paper_rows, ['id', 'title', 'journal', 'journal_type', 'publish_date', 'first_author_id',
+                           'co_authors', 'organization', 'volume_info']),
+}
+
+TABLE_LABELS = {
+    'person': '人员',
+    'project': '项目',
+    'standard': '标准',
+    'patent': '专利',
+    'paper': '论文',
+}
+
+def _apply_fast_load(conn):
+    for pragma in FAST_LOAD_PRAGMAS:
+        conn.execute(pragma)
+
+def _remove_database(path):
+    # 删除数据库文件及WAL模式的附属文件
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+def insert_table(conn, table, count, person_count, seed=None, batch_size=BATCH_SIZE, profile=None):
+    """
+    生成一张表的数据，并通过 executemany 分批写入（不提交事务）
+
+    参数:
+    - conn: 数据库连接
+    - table: 表名
+    - count: 生成行数
+    - person_count: 人员数量，其他表从 1..person_count 中选择人员
+    - seed: 随机种子，每张表使用独立的随机序列，结果与是否并行生成无关
+    - batch_size: 每批写入的行数
+    - profile: 分布参数（resolve_profile 的返回值），为None时按均匀分布生成
+
+    返回:
+    - int: 写入的行数
+    """
+    row_function, columns = TABLE_GENERATORS[table]
+
+    random.seed(None if seed is None else f"{seed}-{table}")
+    if table == 'person':
+        rows = row_function(count, DistributionSampler(profile))
+    elif person_count == 0:
+        print(f"无法生成{TABLE_LABELS[table]}数据：没有人员数据")
+        return 0
+    else:
+        person_ids = range(1, person_count + 1)
+        rows = row_function(count, person_ids, DistributionSampler(profile, person_ids))
+
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    written = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        conn.executemany(sql, batch)
+        written += len(batch)
+    return written
+
+def _generate_table_file(path, table, count, person_count, seed, batch_size, profile):
+    # 并行生成时在子进程中执行：将一张表写入单独的临时数据库文件
+    conn = sqlite3.connect(path)
+    try:
+        _apply_fast_load(conn)
+        conn.execute(TABLE_DEFINITIONS[table])
+        written = insert_table(conn, table, count, person_count, seed, batch_size, profile)
+        conn.commit()
+    finally:
+        conn.close()
+    return written
+
+def generate_database(output=DB_FILE, counts=None, seed=None, workers=1, batch_size=BATCH_SIZE, profile=None):
+    """
+    生成新的模拟数据库，已存在的输出文件会被替换
+
+    所有数据在一个事务中批量写入，期间暂停触发器和二级索引，写入完成后统一重建。
+    workers 大于1时各表在独立进程中并行生成到临时文件，再由主进程导入
+
+    参数:
+    - output: 输出数据库文件路径
+    - counts: 各表生成行数 {表名: 行数}，未指定的表使用 DEFAULT_COUNTS
+    - seed: 随机种子，指定后生成结果可重现
+    - workers: 并行生成的进程数
+    - batch_size: 每批写入的行数
+    - profile: 分布参数（resolve_profile 的返回值），为None时按均匀分布生成
+
+    返回:
+    - dict: 各表写入的行数
+    """
+    counts = {**DEFAULT_COUNTS, **(counts or {})}
+    person_count = counts['person']
+    written = {}
+
+    _remove_database(output)
+    temp_dir = None
+    conn = sqlite3.connect(output)
+    try:
+        _apply_fast_load(conn)
+        migrate(conn)
+
+        if workers > 1:
+            # 临时文件与输出文件放在同一目录，避免跨文件系统复制
+            temp_dir = tempfile.mkdtemp(prefix="generate_", dir=os.path.dirname(os.path.abspath(output)))
+            with ProcessPoolExecutor(max_workers=min(workers, len(TABLE_GENERATORS))) as executor:
+                futures = {
+                    table: executor.submit(_generate_table_file, os.path.join(temp_dir, f"{table}.db"),
+                                           table, counts[table], person_count, seed, batch_size, profile)
+                    for table in TABLE_GENERATORS
+                }
+                for table, future in futures.items():
+                    written[table] = future.result()
+                    print(f"已生成 {written[table]} 条{TABLE_LABELS[table]}数据")
+
+            # ATTACH 不能在事务中执行，先附加全部临时数据库
+            for table in TABLE_GENERATORS:
+                conn.execute(f"ATTACH DATABASE ? AS part_{table}", (os.path.join(temp_dir, f"{table}.db"),))
+
+        with bulk_load(conn):
+            for table, (_, columns) in TABLE_GENERATORS.items():
+                if temp_dir:
+                    column_list = ', '.join(columns)
+                    conn.execute(f"INSERT INTO main.{table} ({column_list}) "
+                                 f"SELECT {column_list} FROM part_{table}.{table}")
+                else:
+                    written[table] = insert_table(conn, table, counts[table], person_count, seed,
+                                                  batch_size, profile)
+                    print(f"已生成 {written[table]} 条{TABLE_LABELS[table]}数据")
+            print("正在重建索引、关联表和统计数据...")
+    except BaseException:
+        conn.close()
+        _remove_database(output)
+        raise
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
-    conn.commit()
     conn.close()
-    print(f"已生成 {len(paper_ids)} 条论文数据")
-    return paper_ids
+    return written
 
 # 生成全部模拟数据
-def generate_all_data():
+def generate_all_data(output=DB_FILE, counts=None, seed=None, workers=1, batch_size=BATCH_SIZE, profile=None):
     print("开始生成模拟数据...")
+    start = time.perf_counter()
 
-    # 创建表结构
-    create_tables()
-
-    # 生成人员数据
-    person_ids = generate_person_data(20)
-
-    # 生成项目数据
-    project_ids = generate_project_data(person_ids, 15)
-
-    # 生成标准数据
-    standard_ids = generate_standard_data(person_ids, 15)
-
-    # 生成专利数据
-    patent_ids = generate_patent_data(person_ids, 30)
-
-    # 生成论文数据
-    paper_ids = generate_paper_data(person_ids, 25)
+    written = generate_database(output, counts, seed, workers, batch_size, profile)
 
     print("所有模拟数据生成完成！")
-    print(f"生成了 {len(person_ids)} 条人员数据")
-    print(f"生成了 {len(project_ids)} 条项目数据")
-    print(f"生成了 {len(standard_ids)} 条标准数据")
-    print(f"生成了 {len(patent_ids)} 条专利数据")
-    print(f"生成了 {len(paper_ids)} 条论文数据")
+    for table, count in written.items():
+        print(f"生成了 {count} 条{TABLE_LABELS[table]}数据")
+    print(f"共 {sum(written.values())} 条，用时 {time.perf_counter() - start:.1f} 秒，数据库文件: {output}")
+    return written
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="生成模拟数据库（已存在的输出文件会被替换）")
+    for table in TABLE_GENERATORS:
+        parser.add_argument(f"--{table}s", dest=table, type=int, default=DEFAULT_COUNTS[table],
+                            help=f"{TABLE_LABELS[table]}数量（默认 {DEFAULT_COUNTS[table]}）")
+    parser.add_argument("--seed", type=int, help="随机种子，指定后生成结果可重现")
+    parser.add_argument("--output", default=DB_FILE, help=f"输出数据库文件（默认 {DB_FILE}）")
+    parser.add_argument("--workers", type=int, default=1, help="并行生成的进程数（最多每张表一个）")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"每批写入的行数（默认 {BATCH_SIZE}）")
+    parser.add_argument("--profile", nargs="+", default=["uniform"], choices=list(PROFILES),
+                        help="数据分布方案，可组合多个（默认 uniform 均匀分布，production 为全部偏斜分布）")
+    return parser.parse_args(argv)
 
 # 主函数
 if __name__ == "__main__":
-    generate_all_data()
\ No newline at end of file
+    args = parse_args()
+    generate_all_data(
+        output=args.output,
+        counts={table: getattr(args, table) for table in TABLE_GENERATORS},
+        seed=args.seed,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        profile=resolve_profile(args.profile),
+    )
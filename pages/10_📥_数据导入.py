@@ -0,0 +1,94 @@
+import streamlit as st
+from components.export_utils import dataframe_chunks, excel_export_button, discard_export
+from components.import_utils import (
+    ENTITY_LABELS, IMPORT_CHUNK_SIZE, REQUIRED_COLUMNS, NATURAL_KEYS, import_template, import_file, column_label
+)
+
+st.set_page_config(
+    page_title="数据导入",
+    page_icon="📥",
+    layout="wide"
+)
+
+# 页面标题
+st.title("数据导入")
+
+st.markdown(f"""
+从CSV或Excel (.xlsx) 文件批量导入数据，文件第一行为表头，列名与导出文件一致（也可使用英文字段名）。
+
+- 文件按每 {IMPORT_CHUNK_SIZE} 行分块读取、校验和写入，校验失败的行不会导入，并在错误报告中列出
+- 负责人、参与人员等字段可填写人员姓名或人员ID，多人以逗号分隔；同名人员请填写人员ID
+- 项目、标准、专利和论文引用人员，请先导入人员数据
+""")
+
+entity_type = st.selectbox("导入数据类型", list(ENTITY_LABELS), format_func=lambda x: ENTITY_LABELS[x])
+entity_label = ENTITY_LABELS[entity_type]
+
+template = import_template(entity_type)
+required = [column_label(entity_type, column) for column in REQUIRED_COLUMNS[entity_type]]
+st.write(f"可导入的列: {'、'.join(template.columns)}")
+st.write(f"必填列: {'、'.join(required)}")
+excel_export_button(lambda: [(entity_label, dataframe_chunks(template))], f"{entity_label}导入模板.xlsx",
+                    key=f"import_template_{entity_type}", label="生成导入模板")
+
+if entity_type in NATURAL_KEYS:
+    key_label = "+".join(column_label(entity_type, column) for column in NATURAL_KEYS[entity_type])
+    mode = st.radio("导入方式", ['insert', 'upsert'], horizontal=True, format_func=lambda x: {
+        'insert': "仅新增",
+        'upsert': f"差异导入（按{key_label}匹配已有记录）",
+    }[x])
+    if mode == 'upsert':
+        st.caption(f"{key_label}已存在的记录只更新文件中提供且发生变化的列，未提供的列和空白单元格保持原值（差异导入不会清空已有字段）；不存在的记录作为新记录插入")
+else:
+    mode = 'insert'
+
+uploaded_file = st.file_uploader("选择文件", type=['csv', 'xlsx'], key=f"import_file_{entity_type}")
+
+if uploaded_file is not None and st.button("开始导入", type="primary"):
+    progress_text = st.empty()
+
+    def show_progress(total, passed):
+        progress_text.text(f"已读取 {total} 行，校验通过 {passed} 行...")
+
+    try:
+        with st.spinner("正在导入..."):
+            result = import_file(uploaded_file, uploaded_file.name, entity_type, mode=mode, progress=show_progress)
+    except ValueError as e:
+        progress_text.empty()
+        st.error(f"导入失败: {e}")
+    else:
+        progress_text.empty()
+        # 之前生成的错误报告不再对应本次导入
+        discard_export("import_error_report")
+        st.session_state.import_result = {'entity_type': entity_type, 'filename': uploaded_file.name, **result}
+
+result = st.session_state.get('import_result')
+if result and result['entity_type'] == entity_type:
+    errors = result['errors']
+    failed_rows = errors['行号'].nunique() if not errors.empty else 0
+
+    st.subheader(f"导入结果: {result['filename']}")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("读取行数", result['total'])
+    with col2:
+        st.metric("新增", result['inserted'])
+    with col3:
+        st.metric("更新", result['updated'])
+    with col4:
+        st.metric("未变化", result['unchanged'])
+    with col5:
+        st.metric("校验失败", failed_rows)
+
+    if result['ignored_columns']:
+        st.warning(f"以下列未识别，已忽略: {'、'.join(result['ignored_columns'])}")
+
+    if errors.empty:
+        st.success(f"全部{entity_label}数据已导入")
+    else:
+        st.write("错误报告（行号为文件中的行号，表头为第1行）")
+        st.dataframe(errors.head(1000), use_container_width=True, hide_index=True)
+        if len(errors) > 1000:
+            st.caption(f"仅显示前1000条，共 {len(errors)} 条错误，完整报告请下载")
+        excel_export_button(lambda: [("错误报告", dataframe_chunks(errors))], f"{entity_label}导入错误报告.xlsx",
+                            key="import_error_report", label="生成错误报告")
@@ -0,0 +1,79 @@
+import streamlit as st
+import pandas as pd
+from components.backup import (
+    BACKUP_DIR, BACKUP_INTERVAL_HOURS, BACKUP_KEEP,
+    create_backup, list_backups, restore_backup, start_backup_scheduler
+)
+
+st.set_page_config(
+    page_title="数据备份",
+    page_icon="💾",
+    layout="wide"
+)
+
+# 页面标题
+st.title("数据备份")
+
+start_backup_scheduler()
+
+if BACKUP_INTERVAL_HOURS > 0:
+    schedule_text = f"每 {BACKUP_INTERVAL_HOURS:g} 小时自动备份一次（压缩），保留最近 {BACKUP_KEEP} 个备份"
+else:
+    schedule_text = "自动备份已通过环境变量 PROJECT_MANAGER_BACKUP_INTERVAL=0 关闭"
+
+st.markdown(f"""
+通过SQLite在线备份接口复制数据库，备份期间应用可以正常读写，备份文件保存在 `{BACKUP_DIR}` 目录。
+
+- {schedule_text}
+- 恢复时备份先复制为新文件并通过完整性检查，当前数据会先自动备份，再整体替换为备份中的数据
+""")
+
+if st.session_state.get('backup_message'):
+    st.success(st.session_state.backup_message)
+    st.session_state.backup_message = None
+
+def make_progress(label):
+    # 备份/恢复进度条
+    bar = st.progress(0.0, text=label)
+
+    def update(copied, total):
+        bar.progress(copied / total if total else 1.0, text=f"{label} {copied}/{total} 页")
+    return update
+
+st.subheader("立即备份")
+compress = st.checkbox("压缩备份文件 (gzip)", value=True)
+if st.button("开始备份", type="primary"):
+    try:
+        path = create_backup(compress=compress, progress=make_progress("正在备份..."))
+    except Exception as e:
+        st.error(f"备份失败: {str(e)}")
+    else:
+        st.session_state.backup_message = f"已备份到 {path}"
+        st.rerun()
+
+st.subheader("备份列表")
+backups = list_backups()
+if not backups:
+    st.info("暂无备份")
+else:
+    backups_df = pd.DataFrame({
+        '备份时间': [backup['created'].strftime("%Y-%m-%d %H:%M:%S") for backup in backups],
+        '文件名': [backup['name'] for backup in backups],
+        '大小(MB)': [round(backup['size'] / 1024 / 1024, 1) for backup in backups],
+        '压缩': ["是" if backup['compressed'] else "否" for backup in backups],
+    })
+    st.dataframe(backups_df, use_container_width=True, hide_index=True)
+
+    st.subheader("从备份恢复")
+    st.warning("恢复会用备份中的数据替换当前全部数据，恢复前的数据会自动备份")
+    restore_index = st.selectbox("选择备份", range(len(backups)),
+                                 format_func=lambda i: f"{backups[i]['created']:%Y-%m-%d %H:%M:%S}  {backups[i]['name']}")
+    confirm = st.checkbox("我确认要恢复到该备份")
+    if st.button("恢复", disabled=not confirm):
+        try:
+            safety_backup = restore_backup(backups[restore_index]['path'], progress=make_progress("正在恢复..."))
+        except Exception as e:
+            st.error(f"恢复失败: {str(e)}")
+        else:
+            st.session_state.backup_message = f"已恢复到 {backups[restore_index]['name']}，恢复前的数据已备份到 {safety_backup}"
+            st.rerun()
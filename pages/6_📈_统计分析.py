@@ -7,11 +7,14 @@ from plotly.subplots import make_subplots
 import networkx as nx
 from pyvis.network import Network
 import tempfile
-from components.db_utils import get_connection
+from components.analytics_db import (
+    ANALYTICS_REFRESH_MINUTES, get_analytics_connection, analytics_status, refresh_analytics_db, start_analytics_refresher
+)
 from components.project import show_statistics
 from components.standard import show_standard_statistics
 from components.patent import show_patent_statistics
 from components.paper import show_paper_statistics
+from components.snapshot import SNAPSHOT_FORMATS, export_snapshot, read_manifest, is_snapshot_stale, load_snapshot_frame
 
 st.set_page_config(
     page_title="统计分析",
@@ -22,6 +25,81 @@ st.set_page_config(
 # 页面标题
 st.title("统计分析")
 
+# 统计查询读取只读分析副本，不与编辑页面的写操作争用数据库
+start_analytics_refresher()
+analytics_info = analytics_status()
+if analytics_info['refreshed'] is None:
+    # 首次访问时生成副本
+    refresh_analytics_db()
+    analytics_info = analytics_status()
+freshness_col, refresh_col = st.columns([3, 1])
+with freshness_col:
+    refresh_text = (f"每 {ANALYTICS_REFRESH_MINUTES:g} 分钟自动刷新" if ANALYTICS_REFRESH_MINUTES > 0
+                    else "自动刷新已关闭")
+    st.caption(f"统计数据来自分析副本，更新于 {analytics_info['refreshed']:%Y-%m-%d %H:%M:%S}（{refresh_text}）")
+    if analytics_info['stale']:
+        st.caption("⚠️ 副本更新后数据已修改，统计结果可能不是最新数据")
+with refresh_col:
+    if st.button("刷新分析副本", disabled=not analytics_info['stale'],
+                 help="立即从数据库重新生成分析副本"):
+        with st.spinner("正在刷新分析副本..."):
+            try:
+                refresh_analytics_db()
+            except Exception as e:
+                st.error(f"刷新失败: {str(e)}")
+            else:
+                st.rerun()
+
+# 数据来源：查询分析副本，或从列式数据快照（内存映射）加载
+snapshot_manifest = read_manifest()
+source_col, info_col = st.columns([1, 3])
+with source_col:
+    use_snapshot = st.toggle("从数据快照加载", value=False, disabled=snapshot_manifest is None,
+                             help="人员统计、人员关联网络和自定义图表从快照读取数据，不再查询数据库；其余标签页仍查询数据库")
+with info_col:
+    if snapshot_manifest is None:
+        st.caption("尚未生成数据快照")
+    else:
+        st.caption(f"当前快照: {snapshot_manifest['created'].replace('T', ' ')}（{snapshot_manifest['format']}）")
+        if is_snapshot_stale(snapshot_manifest):
+            st.caption("⚠️ 快照生成后数据已修改，统计结果可能不是最新数据")
+use_snapshot = use_snapshot and snapshot_manifest is not None
+
+with st.expander("生成数据快照"):
+    snapshot_format = st.radio("快照格式", list(SNAPSHOT_FORMATS), horizontal=True, format_func=lambda x: {
+        'feather': "Feather（Arrow，可内存映射，加载最快）",
+        'parquet': "Parquet（压缩，文件更小）",
+    }[x])
+    if st.button("生成快照"):
+        snapshot_progress = st.progress(0.0, text="正在生成快照...")
+
+        def show_snapshot_progress(done, total, table):
+            snapshot_progress.progress(done / total if total else 1.0,
+                                       text=f"正在导出 {table}..." if table else "快照已生成")
+
+        try:
+            export_snapshot(snapshot_format, progress=show_snapshot_progress)
+        except Exception as e:
+            st.error(f"生成快照失败: {str(e)}")
+        else:
+            st.rerun()
+
+def load_table(conn, table, columns=None):
+    # 按所选数据来源加载整张表
+    if use_snapshot:
+        return load_snapshot_frame(table, columns)
+    return pd.read_sql(f"SELECT {', '.join(columns) if columns else '*'} FROM {table}", conn)
+
+def snapshot_counts(df, column):
+    # 快照模式下的分组计数，对应 SELECT column, COUNT(*) ... GROUP BY column（包括空值分组）
+    counts = df[column].value_counts(dropna=False, sort=False)
+    counts = counts[counts > 0]
+    return counts.rename_axis(column).reset_index(name='count')
+
+# 学历、年龄段的显示顺序
+EDUCATION_ORDER = ['高中', '专科', '本科', '硕士', '博士']
+AGE_GROUP_ORDER = ['30岁以下', '30-40岁', '41-50岁', '50岁以上']
+
 # 创建切换标签页，增加人员统计标签页、网络分析标签页和自定义图表标签页
 stats_tab1, stats_tab2, stats_tab3, stats_tab4, stats_tab5, stats_tab_network, stats_tab_custom = st.tabs(
     ["人员统计", "项目统计", "标准统计", "专利统计", "论文统计", "人员关联网络", "自定义图表"]
@@ -31,7 +109,9 @@ stats_tab1, stats_tab2, stats_tab3, stats_tab4, stats_tab5, stats_tab_network, s
 with stats_tab1:
     st.subheader("人员基本统计")
 
-    conn = get_connection()
+    conn = get_analytics_connection()
+    if use_snapshot:
+        person_df = load_snapshot_frame('person', ['id', 'name', 'gender', 'birth_date', 'education', 'title', 'department'])
 
     # 统计人员性别分布
     gender_query = """
@@ -39,7 +119,10 @@ with stats_tab1:
     FROM person
     GROUP BY gender
     """
-    gender_df = pd.read_sql(gender_query, conn)
+    if use_snapshot:
+        gender_df = snapshot_counts(person_df, 'gender').sort_values('gender').reset_index(drop=True)
+    else:
+        gender_df = pd.read_sql(gender_query, conn)
 
     if not gender_df.empty:
         col1, col2 = st.columns(2)
@@ -77,7 +160,13 @@ with stats_tab1:
         ELSE 6
     END
     """
-    edu_df = pd.read_sql(edu_query, conn)
+    if use_snapshot:
+        edu_df = snapshot_counts(person_df, 'education')
+        edu_rank = edu_df['education'].astype(object).map({education: rank for rank, education in enumerate(EDUCATION_ORDER)})
+        edu_df = edu_df.assign(rank=edu_rank.fillna(len(EDUCATION_ORDER))).sort_values('rank', kind='stable')
+        edu_df = edu_df.drop(columns='rank').reset_index(drop=True)
+    else:
+        edu_df = pd.read_sql(edu_query, conn)
 
     if not edu_df.empty:
         col1, col2 = st.columns(2)
@@ -108,7 +197,11 @@ with stats_tab1:
     GROUP BY title
     ORDER BY count DESC
     """
-    title_df = pd.read_sql(title_query, conn)
+    if use_snapshot:
+        title_df = snapshot_counts(person_df[person_df['title'].notna() & (person_df['title'] != '')], 'title')
+        title_df = title_df.sort_values('count', ascending=False).reset_index(drop=True)
+    else:
+        title_df = pd.read_sql(title_query, conn)
 
     if not title_df.empty and len(title_df) > 0:
         st.subheader("职称分布")
@@ -136,7 +229,15 @@ with stats_tab1:
         WHEN age_group = '50岁以上' THEN 4
     END
     """
-    age_df = pd.read_sql(age_query, conn)
+    if use_snapshot:
+        # 与SQL一致：出生日期为空或无法解析时归入50岁以上
+        age = pd.Timestamp.now().year - pd.to_numeric(person_df['birth_date'].str[:4], errors='coerce')
+        age_group = pd.Series(np.select([age < 30, age <= 40, age <= 50], AGE_GROUP_ORDER[:3], AGE_GROUP_ORDER[3]),
+                              index=person_df.index)
+        age_df = age_group.value_counts().reindex(AGE_GROUP_ORDER).dropna().astype(int)
+        age_df = age_df.rename_axis('age_group').reset_index(name='count')
+    else:
+        age_df = pd.read_sql(age_query, conn)
 
     if not age_df.empty:
         st.subheader("年龄分布")
@@ -148,33 +249,32 @@ with stats_tab1:
     contribution_query = """
     SELECT
         p.name,
-        COUNT(DISTINCT pr.id) as project_count,
-        COUNT(DISTINCT s.id) as standard_count,
-        COUNT(DISTINCT CASE WHEN pt.owner_id = p.id THEN pt.id END) as patent_owner_count,
-        COUNT(DISTINCT CASE WHEN pt.participants LIKE '%' || p.id || '%' THEN pt.id END) as patent_participant_count,
-        COUNT(DISTINCT CASE WHEN pa.first_author_id = p.id THEN pa.id END) as paper_first_author_count,
-        COUNT(DISTINCT CASE WHEN pa.co_authors LIKE '%' || p.id || '%' THEN pa.id END) as paper_co_author_count
+        c.project_count,
+        c.standard_count,
+        c.patent_owner_count,
+        c.patent_participant_count,
+        c.paper_first_author_count,
+        c.paper_co_author_count
     FROM
-        person p
-    LEFT JOIN
-        (SELECT id, members, leader_id FROM project) pr
-        ON (pr.members LIKE '%' || p.id || '%' OR pr.leader_id = p.id)
-    LEFT JOIN
-        standard s ON p.id = s.participant_id
-    LEFT JOIN
-        patent pt ON (pt.owner_id = p.id OR pt.participants LIKE '%' || p.id || '%')
-    LEFT JOIN
-        paper pa ON (pa.first_author_id = p.id OR pa.co_authors LIKE '%' || p.id || '%')
-    GROUP BY
-        p.id
-    HAVING
-        project_count > 0 OR standard_count > 0 OR patent_owner_count > 0 OR patent_participant_count > 0 OR paper_first_author_count > 0 OR paper_co_author_count > 0
+        person_contribution c
+    JOIN
+        person p ON p.id = c.person_id
+    WHERE
+        c.total_count > 0
     ORDER BY
-        (project_count + standard_count + patent_owner_count + patent_participant_count + paper_first_author_count + paper_co_author_count) DESC
+        c.total_count DESC
     LIMIT 10
     """
 
-    contribution_df = pd.read_sql(contribution_query, conn)
+    if use_snapshot:
+        contribution_df = load_snapshot_frame('person_contribution')
+        contribution_df = contribution_df[contribution_df['total_count'] > 0].nlargest(10, 'total_count')
+        contribution_df = contribution_df.merge(person_df[['id', 'name']], left_on='person_id', right_on='id')
+        contribution_df = contribution_df[['name', 'project_count', 'standard_count', 'patent_owner_count',
+                                           'patent_participant_count', 'paper_first_author_count',
+                                           'paper_co_author_count']].reset_index(drop=True)
+    else:
+        contribution_df = pd.read_sql(contribution_query, conn)
 
     if not contribution_df.empty:
         st.subheader("人员综合贡献度排名（Top 10）")
@@ -296,7 +396,11 @@ with stats_tab1:
     GROUP BY department
     ORDER BY count DESC
     """
-    dept_df = pd.read_sql(dept_query, conn)
+    if use_snapshot:
+        dept_df = snapshot_counts(person_df[person_df['department'].notna() & (person_df['department'] != '')], 'department')
+        dept_df = dept_df.sort_values('count', ascending=False).reset_index(drop=True)
+    else:
+        dept_df = pd.read_sql(dept_query, conn)
 
     if not dept_df.empty:
         col1, col2 = st.columns(2)
@@ -344,7 +448,7 @@ with stats_tab2:
     show_statistics()
 
     # 添加项目相关统计分析
-    conn = get_connection()
+    conn = get_analytics_connection()
 
     # 项目时间跨度统计
     st.subheader("项目时间跨度统计")
@@ -511,23 +615,18 @@ with stats_tab3:
     show_standard_statistics()
 
     # 添加标准与人员关联的统计
-    conn = get_connection()
+    conn = get_analytics_connection()
 
     # 每个人参与标准和项目的对比
     st.subheader("人员参与项目与标准的对比")
     comparison_query = """
     SELECT p.name,
-           COUNT(DISTINCT pr.id) as project_count,
-           COUNT(DISTINCT s.id) as standard_count
-    FROM person p
-    LEFT JOIN (
-        SELECT id, members, leader_id
-        FROM project
-    ) pr ON (pr.members LIKE '%' || p.id || '%' OR pr.leader_id = p.id)
-    LEFT JOIN standard s ON p.id = s.participant_id
-    GROUP BY p.id
-    HAVING project_count > 0 OR standard_count > 0
-    ORDER BY (project_count + standard_count) DESC
+           c.project_count,
+           c.standard_count
+    FROM person_contribution c
+    JOIN person p ON p.id = c.person_id
+    WHERE c.project_count > 0 OR c.standard_count > 0
+    ORDER BY (c.project_count + c.standard_count) DESC
     LIMIT 10
     """
     comparison_df = pd.read_sql(comparison_query, conn)
@@ -560,23 +659,25 @@ with stats_tab4:
     show_patent_statistics()
 
     # 添加专利与其他数据的关联统计
-    conn = get_connection()
+    conn = get_analytics_connection()
 
     # 人员专利统计 - 包括所有人和参与者
     st.subheader("人员专利总数统计")
     patents_query = """
-    SELECT
-        p.name,
-        COUNT(DISTINCT CASE WHEN pt.owner_id = p.id THEN pt.id END) as owner_count,
-        COUNT(DISTINCT CASE WHEN pt.participants LIKE '%' || p.id || '%' THEN pt.id END) as participant_count,
-        COUNT(DISTINCT CASE WHEN pt.owner_id = p.id OR pt.participants LIKE '%' || p.id || '%' THEN pt.id END) as total_count
-    FROM
-        person p
-    LEFT JOIN
-        patent pt ON (pt.owner_id = p.id OR pt.participants LIKE '%' || p.id || '%')
-    GROUP BY
-        p.id
-    HAVING
+    SELECT * FROM (
+        SELECT
+            p.name,
+            (SELECT COUNT(*) FROM patent pt WHERE pt.owner_id = p.id) as owner_count,
+            (SELECT COUNT(*) FROM patent_participant pp WHERE pp.person_id = p.id) as participant_count,
+            (SELECT COUNT(*) FROM (
+                SELECT id FROM patent WHERE owner_id = p.id
+                UNION
+                SELECT patent_id FROM patent_participant WHERE person_id = p.id
+            )) as total_count
+        FROM
+            person p
+    )
+    WHERE
         total_count > 0
     ORDER BY
         total_count DESC
@@ -658,23 +759,26 @@ with stats_tab_network:
     )
 
     # 获取数据库连接
-    conn = get_connection()
+    conn = get_analytics_connection()
 
-    # 获取所有人员信息
-    persons_df = pd.read_sql("SELECT id, name, department FROM person", conn)
-    persons_dict = dict(zip(persons_df['id'], persons_df['name']))
+    # 获取所有人员信息，与合作关系来自同一数据源（快照或分析副本），节点和连线对应同一时间点
+    network_persons_df = load_table(conn, 'person', ['id', 'name', 'department'])
+    persons_dict = dict(zip(network_persons_df['id'], network_persons_df['name']))
+    departments_dict = dict(zip(network_persons_df['id'], network_persons_df['department']))
 
     # 创建网络图
     G = nx.Graph()
 
     # 添加节点
-    for _, person in persons_df.iterrows():
-        G.add_node(person['id'], name=person['name'], department=person['department'])
+    G.add_nodes_from(
+        (person_id, {'name': name, 'department': departments_dict.get(person_id)})
+        for person_id, name in persons_dict.items()
+    )
 
     # 根据选择的网络类型添加边
     if network_type == "专利合作网络" or network_type == "综合合作网络":
         # 获取专利数据
-        patents_df = pd.read_sql("SELECT id, name, owner_id, participants FROM patent", conn)
+        patents_df = load_table(conn, 'patent', ['id', 'name', 'owner_id', 'participants'])
 
         # 处理每个专利的合作关系
         for _, patent in patents_df.iterrows():
@@ -705,7 +809,7 @@ with stats_tab_network:
 
     if network_type == "论文合作网络" or network_type == "综合合作网络":
         # 获取论文数据
-        papers_df = pd.read_sql("SELECT id, title, first_author_id, co_authors FROM paper", conn)
+        papers_df = load_table(conn, 'paper', ['id', 'title', 'first_author_id', 'co_authors'])
 
         # 处理每篇论文的合作关系
         for _, paper in papers_df.iterrows():
@@ -923,8 +1027,7 @@ with stats_tab_network:
         # 创建图形
         fig = go.Figure(data=[edge_trace, node_trace, node_label_trace],
                         layout=go.Layout(
-                            title=f'人员{network_type}',
-                            titlefont=dict(size=16),
+                            title=dict(text=f'人员{network_type}', font=dict(size=16)),
                             showlegend=False,
                             hovermode='closest',
                             margin=dict(b=20, l=5, r=5, t=40),
@@ -1008,8 +1111,7 @@ with stats_tab_network:
                 # 创建社区图形
                 comm_fig = go.Figure(data=[edge_trace, node_comm_trace, node_comm_label_trace],
                                 layout=go.Layout(
-                                    title='人员合作社区',
-                                    titlefont=dict(size=16),
+                                    title=dict(text='人员合作社区', font=dict(size=16)),
                                     showlegend=False,
                                     hovermode='closest',
                                     margin=dict(b=20, l=5, r=5, t=40),
@@ -1047,14 +1149,11 @@ with stats_tab_custom:
     )
 
     # 根据数据源获取数据
-    conn = get_connection()
+    conn = get_analytics_connection()
 
     if data_source == "人员数据":
         # 获取人员数据
-        query = """
-        SELECT * FROM person
-        """
-        df = pd.read_sql(query, conn)
+        df = load_table(conn, 'person')
 
         # 可选的分析维度
         dimensions = [
@@ -1117,10 +1216,7 @@ with stats_tab_custom:
 
     elif data_source == "项目数据":
         # 获取项目数据
-        query = """
-        SELECT * FROM project
-        """
-        df = pd.read_sql(query, conn)
+        df = load_table(conn, 'project')
 
         # 可选的分析维度
         dimensions = [
@@ -1168,10 +1264,7 @@ with stats_tab_custom:
 
     elif data_source == "标准数据":
         # 获取标准数据
-        query = """
-        SELECT * FROM standard
-        """
-        df = pd.read_sql(query, conn)
+        df = load_table(conn, 'standard')
 
         # 可选的分析维度
         dimensions = [
@@ -1199,10 +1292,7 @@ with stats_tab_custom:
 
     elif data_source == "专利数据":
         # 获取专利数据
-        query = """
-        SELECT * FROM patent
-        """
-        df = pd.read_sql(query, conn)
+        df = load_table(conn, 'patent')
 
         # 可选的分析维度
         dimensions = [
@@ -1235,10 +1325,7 @@ with stats_tab_custom:
 
     elif data_source == "论文数据":
         # 获取论文数据
-        query = """
-        SELECT * FROM paper
-        """
-        df = pd.read_sql(query, conn)
+        df = load_table(conn, 'paper')
 
         # 可选的分析维度
         dimensions = [
@@ -1272,11 +1359,19 @@ with stats_tab_custom:
         query_patent = "SELECT COUNT(*) as count FROM patent"
         query_paper = "SELECT COUNT(*) as count FROM paper"
 
-        person_count = pd.read_sql(query_person, conn).iloc[0]['count']
-        project_count = pd.read_sql(query_project, conn).iloc[0]['count']
-        standard_count = pd.read_sql(query_standard, conn).iloc[0]['count']
-        patent_count = pd.read_sql(query_patent, conn).iloc[0]['count']
-        paper_count = pd.read_sql(query_paper, conn).iloc[0]['count']
+        if use_snapshot:
+            snapshot_rows = {table: info['rows'] for table, info in snapshot_manifest['tables'].items()}
+            person_count = snapshot_rows['person']
+            project_count = snapshot_rows['project']
+            standard_count = snapshot_rows['standard']
+            patent_count = snapshot_rows['patent']
+            paper_count = snapshot_rows['paper']
+        else:
+            person_count = pd.read_sql(query_person, conn).iloc[0]['count']
+            project_count = pd.read_sql(query_project, conn).iloc[0]['count']
+            standard_count = pd.read_sql(query_standard, conn).iloc[0]['count']
+            patent_count = pd.read_sql(query_patent, conn).iloc[0]['count']
+            paper_count = pd.read_sql(query_paper, conn).iloc[0]['count']
 
         analysis_df = pd.DataFrame({
             'category': ['人员', '项目', '标准', '专利', '论文'],
@@ -1,9 +1,9 @@
 import streamlit as st
 import pandas as pd
-from components.db_utils import get_connection
-from components.advanced_search import advanced_search
-import io
-import base64
+from components.db_utils import get_connection, keyword_condition, person_keyword_conditions
+from components.advanced_search import advanced_search, get_search_export_query
+from components.export_utils import excel_export_button, dataframe_chunks, query_chunks
+from components.lookup import get_person_names
 
 st.set_page_config(
     page_title="高级搜索",
@@ -75,51 +75,15 @@ def global_search(keyword):
         conditions = []
         params = []
 
-        # 对所有可搜索字段进行搜索
-        for field in fields:
-            conditions.append(f"{field} LIKE ?")
-            params.append(f"%{keyword}%")
-
-        # 特殊处理：如果关键词是人名，尝试在相关ID字段中查找
-        if table != 'person':
-            try:
-                # 尝试在人员表中查找匹配的人员
-                person_query = "SELECT id, name FROM person WHERE name LIKE ?"
-                person_df = pd.read_sql(person_query, conn, params=[f"%{keyword}%"])
-
-                if not person_df.empty:
-                    # 找到了匹配的人员，根据表类型添加相应的搜索条件
-                    for _, person in person_df.iterrows():
-                        person_id = person['id']
-
-                        if table == 'project':
-                            # 搜索项目的负责人和成员
-                            conditions.append(f"leader_id = ?")
-                            params.append(person_id)
-                            conditions.append(f"members LIKE ?")
-                            params.append(f"%{person_id}%")
-
-                        elif table == 'standard':
-                            # 搜索标准的参与人员
-                            conditions.append(f"participant_id = ?")
-                            params.append(person_id)
-
-                        elif table == 'patent':
-                            # 搜索专利的所有人和参与人员
-                            conditions.append(f"owner_id = ?")
-                            params.append(person_id)
-                            conditions.append(f"participants LIKE ?")
-                            params.append(f"%{person_id}%")
-
-                        elif table == 'paper':
-                            # 搜索论文的第一作者和参与作者
-                            conditions.append(f"first_author_id = ?")
-                            params.append(person_id)
-                            conditions.append(f"co_authors LIKE ?")
-                            params.append(f"%{person_id}%")
-            except Exception as e:
-                # 如果查询失败，忽略这部分搜索条件
-                pass
+        # 通过全文索引在所有可搜索字段中匹配
+        condition, condition_params = keyword_condition(table, fields, keyword)
+        conditions.append(condition)
+        params.extend(condition_params)
+
+        # 特殊处理：如果关键词是人名，通过人员关联表在相关ID字段中查找
+        person_conditions, person_params = person_keyword_conditions(table, keyword)
+        conditions.extend(person_conditions)
+        params.extend(person_params)
 
         # 构建SQL查询
         query = f"SELECT * FROM {table}"
@@ -137,8 +101,7 @@ def global_search(keyword):
                 # 处理特殊字段（如外键关联）
                 if table in ['project', 'standard', 'patent', 'paper']:
                     # 获取人员信息用于显示
-                    persons_df = pd.read_sql("SELECT id, name FROM person", conn)
-                    persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
+                    persons_dict = get_person_names()
 
                     if table == 'project':
                         # 处理负责人
@@ -208,21 +171,6 @@ def global_search(keyword):
     conn.close()
     return results
 
-# 生成Excel下载链接的函数
-def get_excel_download_link(df, filename):
-    # 使用BytesIO对象保存Excel文件
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        df.to_excel(writer, sheet_name='Sheet1', index=False)
-
-    # 获取二进制数据并转换为base64
-    excel_data = output.getvalue()
-    b64 = base64.b64encode(excel_data).decode()
-
-    # 生成下载链接
-    href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}">下载Excel文件</a>'
-    return href
-
 # 全局搜索
 with search_tab_global:
     st.subheader("全局搜索")
@@ -338,7 +286,66 @@ with search_tab_global:
                     st.markdown("### 导出所有搜索结果")
                     timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
                     filename = f"全局搜索结果_{timestamp}.xlsx"
-                    st.markdown(get_excel_download_link(combined_df, filename), unsafe_allow_html=True)
+                    excel_export_button(lambda: [("全局搜索结果", dataframe_chunks(combined_df))],
+                                        filename, key="global_search")
+
+# 导出数据格式化函数，对每一块查询结果将人员ID转换为姓名
+def format_person_list(ids_str, persons_dict):
+    if not ids_str:
+        return ""
+    try:
+        person_ids = [int(p_id) for p_id in ids_str.split(",")]
+        return ", ".join([persons_dict.get(p_id, f"ID:{p_id}") for p_id in person_ids])
+    except:
+        return ids_str
+
+def format_project_export(df):
+    persons_dict = get_person_names()
+    df['负责人'] = df['leader_id'].apply(
+        lambda x: persons_dict.get(x, "未找到") if x and x in persons_dict else "无"
+    )
+    df['成员'] = df['members'].apply(lambda x: format_person_list(x, persons_dict))
+    return df
+
+def format_standard_export(df):
+    persons_dict = get_person_names()
+    df['参与人员'] = df['participant_id'].apply(lambda x: persons_dict.get(x, "无") if x else "无")
+    return df
+
+def format_patent_export(df):
+    persons_dict = get_person_names()
+    df['专利所有人'] = df['owner_id'].apply(
+        lambda x: "无" if pd.isna(x) or x is None else persons_dict.get(x, f"ID:{x}")
+    )
+    df['参与人员'] = df['participants'].apply(lambda x: format_person_list(x, persons_dict))
+    return df
+
+def format_paper_export(df):
+    persons_dict = get_person_names()
+    df['第一作者'] = df['first_author_id'].apply(
+        lambda x: "无" if pd.isna(x) or x is None else persons_dict.get(x, f"ID:{x}")
+    )
+    df['参与作者'] = df['co_authors'].apply(lambda x: format_person_list(x, persons_dict))
+    return df
+
+def show_search_export(entity_type, title, transform=None):
+    """
+    导出全部搜索结果（不限于当前页），点击生成按钮后才分块读取并写入Excel文件
+
+    参数:
+    - entity_type: 实体类型
+    - title: 搜索结果名称，用于文件名和工作表名
+    - transform: 对每块结果进行格式化的函数
+    """
+    query, params = get_search_export_query(entity_type)
+    if query is None:
+        return
+
+    st.markdown("### 导出搜索结果")
+    timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{title}_{timestamp}.xlsx"
+    excel_export_button(lambda: [(title, query_chunks(query, params, transform=transform))],
+                        filename, key=f"search_{entity_type}")
 
 # 人员搜索
 with search_tab1:
@@ -349,10 +356,7 @@ with search_tab1:
 
     # 如果有搜索结果，提供导出功能
     if not person_df.empty:
-        st.markdown("### 导出搜索结果")
-        timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"人员搜索结果_{timestamp}.xlsx"
-        st.markdown(get_excel_download_link(person_df, filename), unsafe_allow_html=True)
+        show_search_export('person', "人员搜索结果")
 
 # 项目搜索
 with search_tab2:
@@ -363,39 +367,7 @@ with search_tab2:
 
     # 如果有搜索结果，提供导出功能
     if not project_df.empty:
-        # 获取人员信息用于显示
-        conn = get_connection()
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
-        persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
-
-        # 处理负责人
-        project_df['leader'] = project_df['leader_id'].apply(
-            lambda x: persons_dict.get(x, "未找到") if x and x in persons_dict else "无"
-        )
-
-        # 处理成员
-        def format_members(members_str):
-            if not members_str:
-                return ""
-            try:
-                member_ids = [int(m_id) for m_id in members_str.split(",")]
-                return ", ".join([persons_dict.get(m_id, f"ID:{m_id}") for m_id in member_ids])
-            except:
-                return members_str
-
-        project_df['members_display'] = project_df['members'].apply(format_members)
-
-        # 准备导出数据
-        export_df = project_df.copy()
-        export_df['负责人'] = export_df['leader']
-        export_df['成员'] = export_df['members_display']
-
-        st.markdown("### 导出搜索结果")
-        timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"项目搜索结果_{timestamp}.xlsx"
-        st.markdown(get_excel_download_link(export_df, filename), unsafe_allow_html=True)
-
-        conn.close()
+        show_search_export('project', "项目搜索结果", format_project_export)
 
 # 标准搜索
 with search_tab3:
@@ -406,26 +378,7 @@ with search_tab3:
 
     # 如果有搜索结果，提供导出功能
     if not standard_df.empty:
-        # 获取人员信息用于显示
-        conn = get_connection()
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
-        persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
-
-        # 处理参与人员
-        standard_df['participant'] = standard_df['participant_id'].apply(
-            lambda x: persons_dict.get(x, "无") if x else "无"
-        )
-
-        # 准备导出数据
-        export_df = standard_df.copy()
-        export_df['参与人员'] = export_df['participant']
-
-        st.markdown("### 导出搜索结果")
-        timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"标准搜索结果_{timestamp}.xlsx"
-        st.markdown(get_excel_download_link(export_df, filename), unsafe_allow_html=True)
-
-        conn.close()
+        show_search_export('standard', "标准搜索结果", format_standard_export)
 
 # 专利搜索
 with search_tab4:
@@ -436,39 +389,7 @@ with search_tab4:
 
     # 如果有搜索结果，提供导出功能
     if not patent_df.empty:
-        # 获取人员信息用于显示
-        conn = get_connection()
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
-        persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
-
-        # 定义格式化函数
-        def format_owner(owner_id):
-            if pd.isna(owner_id) or owner_id is None:
-                return "无"
-            return persons_dict.get(owner_id, f"ID:{owner_id}")
-
-        def format_participants(participants_str):
-            if not participants_str:
-                return ""
-            try:
-                participant_ids = [int(p_id) for p_id in participants_str.split(",")]
-                return ", ".join([persons_dict.get(p_id, f"ID:{p_id}") for p_id in participant_ids])
-            except:
-                return participants_str
-
-        # 格式化显示数据
-        patent_df['专利所有人'] = patent_df['owner_id'].apply(format_owner)
-        patent_df['参与人员'] = patent_df['participants'].apply(format_participants)
-
-        # 准备导出数据
-        export_df = patent_df.copy()
-
-        st.markdown("### 导出搜索结果")
-        timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"专利搜索结果_{timestamp}.xlsx"
-        st.markdown(get_excel_download_link(export_df, filename), unsafe_allow_html=True)
-
-        conn.close()
+        show_search_export('patent', "专利搜索结果", format_patent_export)
 
 # 论文搜索
 with search_tab5:
@@ -479,36 +400,4 @@ with search_tab5:
 
     # 如果有搜索结果，提供导出功能
     if not paper_df.empty:
-        # 获取人员信息用于显示
-        conn = get_connection()
-        persons_df = pd.read_sql("SELECT id, name FROM person", conn)
-        persons_dict = {row['id']: row['name'] for _, row in persons_df.iterrows()}
-
-        # 定义格式化函数
-        def format_first_author(author_id):
-            if pd.isna(author_id) or author_id is None:
-                return "无"
-            return persons_dict.get(author_id, f"ID:{author_id}")
-
-        def format_co_authors(co_authors_str):
-            if not co_authors_str:
-                return ""
-            try:
-                co_author_ids = [int(a_id) for a_id in co_authors_str.split(",")]
-                return ", ".join([persons_dict.get(a_id, f"ID:{a_id}") for a_id in co_author_ids])
-            except:
-                return co_authors_str
-
-        # 格式化显示数据
-        paper_df['第一作者'] = paper_df['first_author_id'].apply(format_first_author)
-        paper_df['参与作者'] = paper_df['co_authors'].apply(format_co_authors)
-
-        # 准备导出数据
-        export_df = paper_df.copy()
-
-        st.markdown("### 导出搜索结果")
-        timestamp = pd.Timestamp.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"论文搜索结果_{timestamp}.xlsx"
-        st.markdown(get_excel_download_link(export_df, filename), unsafe_allow_html=True)
-
-        conn.close()
+        show_search_export('paper', "论文搜索结果", format_paper_export)
@@ -0,0 +1,126 @@
+import streamlit as st
+import pandas as pd
+from components.db_utils import get_connection
+from components.query_log import (
+    SLOW_QUERY_MS, QUERY_BUFFER_SIZE, QUERY_LOG_ENABLED,
+    get_recent_queries, clear_recent_queries, get_slow_queries, clear_slow_queries, normalize_sql
+)
+
+st.set_page_config(
+    page_title="性能诊断",
+    page_icon="🩺",
+    layout="wide"
+)
+
+# 页面标题
+st.title("性能诊断")
+
+st.markdown(f"""
+本页面展示数据库查询的耗时统计，用于定位较慢或执行过于频繁的查询。
+
+- 最近 {QUERY_BUFFER_SIZE} 条查询保存在内存中（应用重启后清空），包括本页面自身的查询
+- 耗时超过 {SLOW_QUERY_MS} 毫秒的查询会写入慢查询日志表 (query_log)
+""")
+
+if not QUERY_LOG_ENABLED:
+    st.warning("查询记录已通过环境变量 PROJECT_MANAGER_QUERY_LOG=0 关闭")
+
+DISPLAY_COLUMNS = {
+    'logged_at': '时间',
+    'duration_ms': '耗时(毫秒)',
+    'rows': '返回行数',
+    'params': '参数',
+    'caller': '调用位置',
+    'page': '页面',
+    'sql': 'SQL',
+}
+
+def summarize_statements(df):
+    """
+    按规范化后的SQL汇总执行次数和耗时
+
+    参数:
+    - df: 查询记录
+
+    返回:
+    - DataFrame: 每条语句一行
+    """
+    df = df.assign(statement=df['sql'].map(normalize_sql))
+    summary = df.groupby('statement').agg(
+        count=('duration_ms', 'size'),
+        total_ms=('duration_ms', 'sum'),
+        avg_ms=('duration_ms', 'mean'),
+        max_ms=('duration_ms', 'max'),
+        avg_rows=('rows', 'mean'),
+        # 同一语句可能来自多处，显示最常见的调用位置
+        caller=('caller', lambda callers: callers.mode().iloc[0] if callers.notna().any() else None),
+    ).reset_index()
+    summary = summary.round({'total_ms': 1, 'avg_ms': 1, 'max_ms': 1, 'avg_rows': 1})
+    return summary.rename(columns={
+        'statement': 'SQL', 'count': '执行次数', 'total_ms': '总耗时(毫秒)', 'avg_ms': '平均耗时(毫秒)',
+        'max_ms': '最大耗时(毫秒)', 'avg_rows': '平均返回行数', 'caller': '调用位置'
+    })
+
+def format_queries(df):
+    # 单条查询记录的显示格式
+    df = df[list(DISPLAY_COLUMNS)].copy()
+    df['duration_ms'] = df['duration_ms'].round(1)
+    return df.rename(columns=DISPLAY_COLUMNS)
+
+recent_df = pd.DataFrame(get_recent_queries(), columns=list(DISPLAY_COLUMNS))
+
+conn = get_connection()
+slow_df = pd.DataFrame(get_slow_queries(conn), columns=list(DISPLAY_COLUMNS))
+conn.close()
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("内存中的查询记录", len(recent_df))
+with col2:
+    st.metric("查询总耗时(毫秒)", f"{recent_df['duration_ms'].sum():.0f}" if not recent_df.empty else 0)
+with col3:
+    st.metric("慢查询日志记录", len(slow_df))
+
+diag_tab1, diag_tab2, diag_tab3 = st.tabs(["最慢语句", "最频繁语句", "慢查询日志"])
+
+with diag_tab1:
+    st.subheader("最近查询中耗时最长的语句")
+    if recent_df.empty:
+        st.info("暂无查询记录")
+    else:
+        top_n = st.slider("显示条数", 10, 100, 20, key="slowest_top_n")
+        st.dataframe(format_queries(recent_df.nlargest(top_n, 'duration_ms')), use_container_width=True)
+
+        st.subheader("按语句汇总（按总耗时排序）")
+        summary = summarize_statements(recent_df).sort_values('总耗时(毫秒)', ascending=False)
+        st.dataframe(summary.head(top_n), use_container_width=True)
+
+with diag_tab2:
+    st.subheader("最近查询中执行次数最多的语句")
+    if recent_df.empty:
+        st.info("暂无查询记录")
+    else:
+        summary = summarize_statements(recent_df).sort_values(['执行次数', '总耗时(毫秒)'], ascending=False)
+        st.dataframe(summary.head(50), use_container_width=True)
+
+    if st.button("清空内存中的查询记录"):
+        clear_recent_queries()
+        st.rerun()
+
+with diag_tab3:
+    st.subheader(f"耗时超过 {SLOW_QUERY_MS} 毫秒的查询")
+    if slow_df.empty:
+        st.info("暂无慢查询记录")
+    else:
+        st.write("按语句汇总")
+        summary = summarize_statements(slow_df).sort_values('总耗时(毫秒)', ascending=False)
+        st.dataframe(summary, use_container_width=True)
+
+        st.write("最近的慢查询")
+        st.dataframe(format_queries(slow_df.head(100)), use_container_width=True)
+
+    if st.button("清空慢查询日志"):
+        conn = get_connection()
+        clear_slow_queries(conn)
+        conn.close()
+        st.rerun()